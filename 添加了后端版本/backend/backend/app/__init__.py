@@ -3,6 +3,7 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from .extensions import db, migrate, jwt
 from .config import config
+from .utils.engine import engine_options, apply_sqlite_pragmas
 
 def create_app(config_name=None):
     if config_name is None:
@@ -12,15 +13,59 @@ def create_app(config_name=None):
     app.config.from_object(config[config_name])
     
     # 初始化扩展
-    CORS(app, resources={r"/*": {"origins": "*"}})
+    CORS(app, resources={r"/*": {"origins": "*"}}, expose_headers=['ETag'])  # 浏览器端需读取 ETag 用于条件请求
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
     db.init_app(app)
-    migrate.init_app(app, db)
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+    migrate.init_app(app, db, render_as_batch=True)  # SQLite 修改表结构需要批量模式
     jwt.init_app(app)
     
+    # 响应 JSON 编码（安装了 orjson 时默认使用）
+    from .utils.json_provider import init_json
+    init_json(app)
+    
+    from .services.cache import stats_cache
+    stats_cache.init_app(app)
+    
+    from .services.user_cache import user_cache
+    user_cache.init_app(app)
+    
+    from .services.sales_cube import sales_cube
+    sales_cube.init_app(app)
+    
+    # 订单提交后的后台任务
+    from .services.jobs import job_queue
+    from .services import order_jobs  # noqa: F401  注册任务处理函数
+    job_queue.init_app(app)
+    
+    # 初始化关键字搜索索引
+    from .services.search import search_service
+    search_service.init_app(app)
+    
+    # 预热扫码商品索引
+    from .services.product_index import product_index
+    product_index.init_app(app)
+    if app.config.get('PRODUCT_INDEX_WARM'):
+        with app.app_context():
+            try:
+                product_index.warm()
+            except Exception as e:
+                # 数据库尚未初始化时在首次扫码时再加载
+                app.logger.warning(f'商品索引预热失败: {e}')
+    
     # 注册蓝图
     from .api import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
     
+    # 性能监控
+    from .services.metrics import metrics
+    metrics.init_app(app)
+    
+    # 注册命令行命令
+    from .commands import register_commands
+    register_commands(app)
+    
     # 添加健康检查路由
     @app.route('/health')
     def health_check():
@@ -30,7 +75,7 @@ def create_app(config_name=None):
             db_status = 'connected'
         except Exception as e:
             db_status = 'error'
-            
+        
         return jsonify({
             'status': 'healthy',
             'database': db_status
@@ -1,16 +1,20 @@
 from flask import Blueprint, jsonify
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended import verify_jwt_in_request
 from functools import wraps
+from ..utils.pagination import InvalidCursor
 
 api_bp = Blueprint('api', __name__)
 
+@api_bp.errorhandler(InvalidCursor)
+def handle_invalid_cursor(e):
+    return jsonify({'code': 400, 'message': '无效的分页游标'}), 400
+
 def admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        from ..models import User
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        from ..services.user_cache import get_current_user
+        current_user = get_current_user()
         if not current_user or current_user.role != 'admin':
             return jsonify({'code': 403, 'message': '权限不足'}), 403
         return fn(*args, **kwargs)
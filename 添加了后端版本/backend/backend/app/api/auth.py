@@ -1,9 +1,10 @@
 from flask import request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required
 import bcrypt
 from . import api_bp
 from ..models import User
 from ..extensions import db
+from ..services.user_cache import get_current_user
 
 @api_bp.route('/auth/login', methods=['POST'])
 def login():
@@ -22,8 +23,11 @@ def login():
     if not user or not bcrypt.checkpw(password.encode('utf-8'), user.password_hash.encode('utf-8')):
         return jsonify({'code': 401, 'message': '用户名或密码错误'}), 401
     
-    # 创建访问令牌
-    access_token = create_access_token(identity=user.id)
+    # 创建访问令牌，附带角色和姓名供客户端直接使用
+    access_token = create_access_token(
+        identity=user.id,
+        additional_claims={'role': user.role, 'name': user.name}
+    )
     
     return jsonify({
         'code': 200,
@@ -50,8 +54,7 @@ def logout():
 @jwt_required()
 def register():
     """注册新用户（仅管理员可操作）"""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_current_user()
     
     # 检查权限
     if not current_user or current_user.role != 'admin':
@@ -100,8 +103,7 @@ def register():
 @jwt_required()
 def get_users():
     """获取用户列表（仅管理员可操作）"""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_current_user()
     
     # 检查权限
     if not current_user or current_user.role != 'admin':
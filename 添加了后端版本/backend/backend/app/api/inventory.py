@@ -1,15 +1,22 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func
 from . import api_bp
 from ..models import Inventory, Product
 from ..extensions import db
+from ..services.product_index import product_index
+from ..services.search import search_service, rank_order
+from ..services.events import broker
+from ..services.stock_alert import CHANNEL as STOCK_ALERT_CHANNEL, list_alerts, alert_stream
+from ..utils.sse import sse_response
+from ..utils.pagination import paginate
+from ..utils.serializers import serialize_inventory
+from ..utils.etag import list_etag, is_fresh, not_modified, with_etag
 
 @api_bp.route('/inventory', methods=['GET'])
 @jwt_required()
 def get_inventory():
     """获取库存列表"""
-    page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', 10, type=int)
     keyword = request.args.get('keyword', '')
     alert = request.args.get('alert', type=int)  # 0/1
     
@@ -18,49 +25,55 @@ def get_inventory():
         Product, Inventory.product_id == Product.id
     )
     
-    # 关键字搜索
+    # 默认按ID排序，关键字搜索优先使用搜索索引并按相关度排序
+    order_keys = [(Inventory.id, False)]
+    ids = None
+    truncated = False
     if keyword:
-        query = query.filter(
-            (Product.code.like(f'%{keyword}%')) |
-            (Product.name.like(f'%{keyword}%')) |
-            (Product.barcode.like(f'%{keyword}%'))
-        )
+        result = search_service.search('products', keyword)
+        if result is None:
+            query = query.filter(
+                (Product.code.like(f'%{keyword}%')) |
+                (Product.name.like(f'%{keyword}%')) |
+                (Product.barcode.like(f'%{keyword}%'))
+            )
+        else:
+            ids, truncated = result
+            query = query.filter(Product.id.in_(ids))
+            order_keys = [(rank_order(Product.id, ids), False)]
     
     # 库存预警过滤
     if alert == 1:
         query = query.filter(Inventory.quantity <= Inventory.alert_threshold)
     
-    # 分页
-    pagination = query.paginate(page=page, per_page=limit, error_out=False)
-    items = pagination.items
+    # 记录数和库存、商品的最大更新时间作为版本，客户端缓存仍有效时返回304
+    if keyword or alert == 1:
+        version = query.with_entities(
+            func.count(Inventory.id), func.max(Inventory.updated_at), func.max(Product.updated_at)
+        ).one()
+    else:
+        # 未过滤时不联表，两个最大值直接走 updated_at 索引
+        version = db.session.query(
+            db.session.query(func.count(Inventory.id)).scalar_subquery(),
+            db.session.query(func.max(Inventory.updated_at)).scalar_subquery(),
+            db.session.query(func.max(Product.updated_at)).scalar_subquery()
+        ).one()
+    etag = list_etag(version, ids)
+    if is_fresh(etag):
+        return not_modified(etag)
     
-    inventory_list = []
-    for inventory, product in items:
-        status = "正常"
-        if inventory.quantity <= 0:
-            status = "缺货"
-        elif inventory.quantity <= inventory.alert_threshold:
-            status = "预警"
-        
-        inventory_data = {
-            'id': inventory.id,
-            'product_id': product.id,
-            'product_code': product.code,
-            'product_name': product.name,
-            'quantity': inventory.quantity,
-            'alert_threshold': inventory.alert_threshold,
-            'status': status
-        }
-        inventory_list.append(inventory_data)
+    # 分页
+    pagination = paginate(query, order_keys, version[0])
+    inventory_list = [serialize_inventory(inventory, product) for inventory, product in pagination.items]
+    data = pagination.response(inventory_list)
+    # 搜索命中超过 SEARCH_MAX_RESULTS 时 total 和分页只覆盖相关度最高的部分
+    data['truncated'] = truncated
     
-    return jsonify({
+    return with_etag(jsonify({
         'code': 200,
         'message': '获取成功',
-        'data': {
-            'total': pagination.total,
-            'items': inventory_list
-        }
-    })
+        'data': data
+    }), etag)
 
 @api_bp.route('/inventory/<int:product_id>', methods=['PUT'])
 @jwt_required()
@@ -85,6 +98,7 @@ def update_inventory(product_id):
         inventory.alert_threshold = data['alert_threshold']
     
     db.session.commit()
+    product_index.refresh([product.id])
     
     status = "正常"
     if inventory.quantity <= 0:
@@ -108,33 +122,16 @@ def update_inventory(product_id):
 @api_bp.route('/inventory/alert', methods=['GET'])
 @jwt_required()
 def get_inventory_alert():
-    """获取库存预警列表"""
-    # 联表查询
-    query = db.session.query(Inventory, Product).join(
-        Product, Inventory.product_id == Product.id
-    ).filter(Inventory.quantity <= Inventory.alert_threshold)
-    
-    items = query.all()
-    
-    alert_list = []
-    for inventory, product in items:
-        status = "预警"
-        if inventory.quantity <= 0:
-            status = "缺货"
-        
-        alert_data = {
-            'id': inventory.id,
-            'product_id': product.id,
-            'product_code': product.code,
-            'product_name': product.name,
-            'quantity': inventory.quantity,
-            'alert_threshold': inventory.alert_threshold,
-            'status': status
-        }
-        alert_list.append(alert_data)
-    
+    """获取库存预警列表（读取库存变化时维护的预警集合）"""
     return jsonify({
         'code': 200,
         'message': '获取成功',
-        'data': alert_list
+        'data': list_alerts()
     })
+
+@api_bp.route('/inventory/alert/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_inventory_alert():
+    """库存预警推送（Server-Sent Events），浏览器 EventSource 可通过 ?jwt= 传递令牌"""
+    subscription = broker.subscribe(STOCK_ALERT_CHANNEL, current_app.config.get('SSE_BUFFER_SIZE', 100))
+    return sse_response(alert_stream(subscription))
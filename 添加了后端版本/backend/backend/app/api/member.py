@@ -1,9 +1,14 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
+from sqlalchemy import func
 from . import api_bp
 from ..models import Member
 from ..extensions import db
+from ..services.search import search_service, rank_order
+from ..utils.pagination import paginate
+from ..utils.serializers import serialize_member
+from ..utils.etag import list_etag, is_fresh, not_modified, with_etag
 
 @api_bp.route('/members', methods=['POST'])
 @jwt_required()
@@ -61,46 +66,45 @@ def add_member():
 @jwt_required()
 def get_members():
     """获取会员列表"""
-    page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', 10, type=int)
     keyword = request.args.get('keyword', '')
     
     query = Member.query
     
-    # 关键字搜索
+    # 默认按ID排序，关键字搜索优先使用搜索索引并按相关度排序
+    order_keys = [(Member.id, False)]
+    ids = None
+    truncated = False
     if keyword:
-        query = query.filter(
-            (Member.card_no.like(f'%{keyword}%')) |
-            (Member.name.like(f'%{keyword}%')) |
-            (Member.phone.like(f'%{keyword}%'))
-        )
+        result = search_service.search('members', keyword)
+        if result is None:
+            query = query.filter(
+                (Member.card_no.like(f'%{keyword}%')) |
+                (Member.name.like(f'%{keyword}%')) |
+                (Member.phone.like(f'%{keyword}%'))
+            )
+        else:
+            ids, truncated = result
+            query = query.filter(Member.id.in_(ids))
+            order_keys = [(rank_order(Member.id, ids), False)]
+    
+    # 会员数和最大更新时间作为版本，客户端缓存仍有效时返回304
+    version = query.with_entities(func.count(Member.id), func.max(Member.updated_at)).one()
+    etag = list_etag(version, ids)
+    if is_fresh(etag):
+        return not_modified(etag)
     
     # 分页
-    pagination = query.paginate(page=page, per_page=limit, error_out=False)
-    members = pagination.items
+    pagination = paginate(query, order_keys, version[0])
+    member_list = [serialize_member(member) for member in pagination.items]
+    data = pagination.response(member_list)
+    # 搜索命中超过 SEARCH_MAX_RESULTS 时 total 和分页只覆盖相关度最高的部分
+    data['truncated'] = truncated
     
-    member_list = []
-    for member in members:
-        member_data = {
-            'id': member.id,
-            'card_no': member.card_no,
-            'name': member.name,
-            'phone': member.phone,
-            'join_date': member.join_date.strftime('%Y-%m-%d'),
-            'expire_date': member.expire_date.strftime('%Y-%m-%d'),
-            'total_amount': float(member.total_amount),
-            'status': member.status
-        }
-        member_list.append(member_data)
-    
-    return jsonify({
+    return with_etag(jsonify({
         'code': 200,
         'message': '获取成功',
-        'data': {
-            'total': pagination.total,
-            'items': member_list
-        }
-    })
+        'data': data
+    }), etag)
 
 @api_bp.route('/members/<int:member_id>', methods=['PUT'])
 @jwt_required()
@@ -132,16 +136,7 @@ def update_member(member_id):
     return jsonify({
         'code': 200,
         'message': '更新成功',
-        'data': {
-            'id': member.id,
-            'card_no': member.card_no,
-            'name': member.name,
-            'phone': member.phone,
-            'join_date': member.join_date.strftime('%Y-%m-%d'),
-            'expire_date': member.expire_date.strftime('%Y-%m-%d'),
-            'total_amount': float(member.total_amount),
-            'status': member.status
-        }
+        'data': serialize_member(member)
     })
 
 @api_bp.route('/members/search', methods=['GET'])
@@ -166,16 +161,7 @@ def search_member():
     return jsonify({
         'code': 200,
         'message': '查询成功',
-        'data': {
-            'id': member.id,
-            'card_no': member.card_no,
-            'name': member.name,
-            'phone': member.phone,
-            'join_date': member.join_date.strftime('%Y-%m-%d'),
-            'expire_date': member.expire_date.strftime('%Y-%m-%d'),
-            'total_amount': float(member.total_amount),
-            'status': member.status
-        }
+        'data': serialize_member(member)
     })
 
 @api_bp.route('/members/renew/<int:member_id>', methods=['POST'])
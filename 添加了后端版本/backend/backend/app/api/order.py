@@ -1,17 +1,30 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 import uuid
+from sqlalchemy.orm import joinedload
 from . import api_bp
-from ..models import Order, OrderItem, Product, Member, Inventory, User
+from ..models import Order, OrderItem, Product, Member
 from ..extensions import db
+from ..services.inventory import reserve_stock
+from ..services.rollup import record_order
+from ..services.shift import record_shift_orders
+from ..services.order_jobs import enqueue_orders
+from ..services.live_sales import track_orders
+from ..services.order_batch import import_orders
+from ..services.cache import stats_cache
+from ..services.product_index import product_index
+from ..services.order_export import iter_order_rows, csv_lines, ndjson_lines
+from ..utils.pagination import paginate
+from ..utils.serializers import serialize_order
+from ..services.user_cache import get_current_user
 
 @api_bp.route('/orders', methods=['POST'])
 @jwt_required()
 def create_order():
     """创建订单"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user:
         return jsonify({'code': 401, 'message': '用户未认证'}), 401
     
@@ -21,17 +34,19 @@ def create_order():
     
     member_id = data.get('member_id')
     items = data.get('items', [])
+    payment_method = data.get('payment_method', '现金')
     
     if not items:
         return jsonify({'code': 400, 'message': '订单项不能为空'}), 400
     
     # 生成订单编号
-    order_no = f"SO{datetime.now().strftime('%Y%m%d')}{str(uuid.uuid4().int)[:6]}"
+    order_no = f"SO{datetime.now().strftime('%Y%m%d')}{str(uuid.uuid4().int)[:12]}"
     
     # 计算订单金额
     total_amount = 0
     discount_amount = 0
     order_items = []
+    items_data = []
     
     # 验证会员
     member = None
@@ -45,7 +60,8 @@ def create_order():
         if member.expire_date < today or member.status == 0:
             return jsonify({'code': 400, 'message': '会员卡已过期或无效'}), 400
     
-    # 处理订单项
+    # 校验订单项，合并同一商品的数量
+    quantities = {}
     for item_data in items:
         product_id = item_data.get('product_id')
         quantity = item_data.get('quantity')
@@ -54,14 +70,28 @@ def create_order():
         if not product_id or not quantity or not price:
             return jsonify({'code': 400, 'message': '订单项数据不完整'}), 400
         
-        product = Product.query.get(product_id)
-        if not product:
-            return jsonify({'code': 400, 'message': f'商品ID {product_id} 不存在'}), 400
-        
-        # 检查库存
-        inventory = Inventory.query.filter_by(product_id=product_id).first()
-        if not inventory or inventory.quantity < quantity:
-            return jsonify({'code': 400, 'message': f'商品 {product.name} 库存不足'}), 400
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    
+    # 批量锁定并扣减库存
+    products, failures = reserve_stock(quantities)
+    if failures:
+        failure = failures[0]
+        if failure['reason'] == '商品不存在':
+            message = f"商品ID {failure['product_id']} 不存在"
+        else:
+            message = f"商品 {failure['product_name']} 库存不足"
+        return jsonify({
+            'code': 400,
+            'message': message,
+            'data': {'failed_items': failures}
+        }), 400
+    
+    # 处理订单项
+    for item_data in items:
+        product_id = item_data['product_id']
+        quantity = item_data['quantity']
+        price = item_data['price']
+        product = products[product_id]
         
         # 计算金额
         amount = float(price) * quantity
@@ -72,12 +102,16 @@ def create_order():
             product_id=product_id,
             quantity=quantity,
             price=price,
-            amount=amount
+            subtotal=amount
         )
         order_items.append(order_item)
-        
-        # 减少库存
-        inventory.quantity -= quantity
+        items_data.append({
+            'product_id': product_id,
+            'product_name': product.name,
+            'quantity': quantity,
+            'price': float(price),
+            'amount': amount
+        })
     
     # 计算会员折扣
     actual_amount = total_amount
@@ -85,8 +119,11 @@ def create_order():
         discount_amount = total_amount * 0.05  # 95折，折扣5%
         actual_amount = total_amount - discount_amount
         
-        # 更新会员累计消费金额
-        member.total_amount += actual_amount
+        # 更新会员累计消费金额（原子累加）
+        Member.query.filter_by(id=member.id).update(
+            {Member.total_amount: Member.total_amount + actual_amount},
+            synchronize_session=False
+        )
     
     # 创建订单
     new_order = Order(
@@ -95,7 +132,9 @@ def create_order():
         member_id=member_id,
         total_amount=total_amount,
         discount_amount=discount_amount,
-        actual_amount=actual_amount
+        actual_amount=actual_amount,
+        payment_method=payment_method,
+        status='completed'
     )
     
     # 添加订单项
@@ -103,19 +142,20 @@ def create_order():
         new_order.items.append(item)
     
     db.session.add(new_order)
+    db.session.flush()
+    
+    # 同一事务内更新销售汇总表和交班累计
+    record_order(new_order, order_items)
+    record_shift_orders(current_user_id, [new_order])
+    track_orders([(new_order, order_items)], {product_id: product.name for product_id, product in products.items()})
+    # 积分和等级在提交后由后台任务处理
+    enqueue_orders([new_order])
+    
     db.session.commit()
     
-    # 准备响应数据
-    items_data = []
-    for item in new_order.items:
-        product = Product.query.get(item.product_id)
-        items_data.append({
-            'product_id': item.product_id,
-            'product_name': product.name,
-            'quantity': item.quantity,
-            'price': float(item.price),
-            'amount': float(item.amount)
-        })
+    # 当日仪表盘缓存失效，刷新扫码索引中的库存
+    stats_cache.invalidate_day(new_order.created_at.date())
+    product_index.refresh(quantities)
     
     return jsonify({
         'code': 200,
@@ -133,17 +173,56 @@ def create_order():
         }
     })
 
+@api_bp.route('/orders/batch', methods=['POST'])
+@jwt_required()
+def create_orders_batch():
+    """批量上传离线订单"""
+    current_user_id = get_jwt_identity()
+    user = get_current_user()
+    if not user:
+        return jsonify({'code': 401, 'message': '用户未认证'}), 401
+    
+    data = request.get_json()
+    orders = data.get('orders') if isinstance(data, dict) else None
+    if not orders or not isinstance(orders, list) or not all(isinstance(order, dict) for order in orders):
+        return jsonify({'code': 400, 'message': '无效的请求数据'}), 400
+    
+    max_size = current_app.config['ORDER_BATCH_MAX_SIZE']
+    if len(orders) > max_size:
+        return jsonify({'code': 400, 'message': f'单次最多上传 {max_size} 个订单'}), 400
+    
+    results, days, product_ids = import_orders(current_user_id, orders, current_app.config['ORDER_BATCH_CHUNK_SIZE'])
+    
+    # 涉及日期的仪表盘缓存失效，刷新扫码索引中的库存
+    for day in days:
+        stats_cache.invalidate_day(day)
+    product_index.refresh(product_ids)
+    
+    summary = {'created': 0, 'duplicate': 0, 'failed': 0}
+    for result in results:
+        summary[result['status']] += 1
+    
+    return jsonify({
+        'code': 200,
+        'message': '上传完成',
+        'data': {
+            'summary': summary,
+            'results': results
+        }
+    })
+
 @api_bp.route('/orders', methods=['GET'])
 @jwt_required()
 def get_orders():
     """获取订单列表"""
-    page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', 10, type=int)
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     user_id = request.args.get('user_id', type=int)
     
-    query = Order.query
+    query = Order.query.options(
+        joinedload(Order.user),
+        joinedload(Order.member)
+    )
     
     # 日期过滤
     if start_date:
@@ -165,67 +244,73 @@ def get_orders():
     if user_id:
         query = query.filter(Order.user_id == user_id)
     
-    # 按时间倒序
-    query = query.order_by(Order.created_at.desc())
-    
-    # 分页
-    pagination = query.paginate(page=page, per_page=limit, error_out=False)
-    orders = pagination.items
-    
-    order_list = []
-    for order in orders:
-        user = User.query.get(order.user_id)
-        member_name = None
-        if order.member_id:
-            member = Member.query.get(order.member_id)
-            if member:
-                member_name = member.name
-        
-        order_data = {
-            'id': order.id,
-            'order_no': order.order_no,
-            'user_name': user.name if user else '未知',
-            'member_name': member_name,
-            'total_amount': float(order.total_amount),
-            'discount_amount': float(order.discount_amount),
-            'actual_amount': float(order.actual_amount),
-            'created_at': order.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        }
-        order_list.append(order_data)
+    # 按时间倒序分页
+    pagination = paginate(query, [(Order.created_at, True), (Order.id, True)])
+    order_list = [serialize_order(order) for order in pagination.items]
     
     return jsonify({
         'code': 200,
         'message': '获取成功',
-        'data': {
-            'total': pagination.total,
-            'items': order_list
-        }
+        'data': pagination.response(order_list)
     })
 
+@api_bp.route('/orders/export', methods=['GET'])
+@jwt_required()
+def export_orders():
+    """流式导出订单明细（CSV/NDJSON）"""
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    export_format = request.args.get('format', 'csv')
+    
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'code': 400, 'message': '不支持的导出格式'}), 400
+    
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+        end = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59) if end_date else None
+    except ValueError:
+        return jsonify({'code': 400, 'message': '日期格式错误'}), 400
+    
+    rows = iter_order_rows(start, end, current_app.config.get('ORDER_EXPORT_BATCH_SIZE', 1000))
+    filename = f"orders_{start_date or 'all'}_{end_date or 'all'}.{export_format}"
+    if export_format == 'csv':
+        body, mimetype = csv_lines(rows), 'text/csv; charset=utf-8'
+    else:
+        body, mimetype = ndjson_lines(rows), 'application/x-ndjson; charset=utf-8'
+    
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 @api_bp.route('/orders/<int:order_id>', methods=['GET'])
 @jwt_required()
 def get_order_detail(order_id):
     """获取订单详情"""
-    order = Order.query.get(order_id)
+    order = Order.query.options(
+        joinedload(Order.user),
+        joinedload(Order.member)
+    ).get(order_id)
     if not order:
         return jsonify({'code': 404, 'message': '订单不存在'}), 404
     
-    user = User.query.get(order.user_id)
-    member_name = None
-    if order.member_id:
-        member = Member.query.get(order.member_id)
-        if member:
-            member_name = member.name
+    user = order.user
+    member_name = order.member.name if order.member else None
+    
+    # 订单项与商品名称一次查出
+    items = db.session.query(OrderItem, Product.name).outerjoin(
+        Product, OrderItem.product_id == Product.id
+    ).filter(OrderItem.order_id == order.id).all()
     
     items_data = []
-    for item in order.items:
-        product = Product.query.get(item.product_id)
+    for item, product_name in items:
         items_data.append({
             'product_id': item.product_id,
-            'product_name': product.name if product else '未知商品',
+            'product_name': product_name or '未知商品',
             'quantity': item.quantity,
             'price': float(item.price),
-            'amount': float(item.amount)
+            'amount': float(item.subtotal)
         })
     
     return jsonify({
@@ -1,8 +1,16 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from . import api_bp
 from ..models import Product, Inventory
 from ..extensions import db
+from ..services.product_index import product_index
+from ..services.search import search_service, rank_order
+from ..services.catalog_sync import sync_catalog
+from ..utils.pagination import paginate
+from ..utils.serializers import serialize_product
+from ..utils.etag import list_etag, is_fresh, not_modified, with_etag
 
 @api_bp.route('/products', methods=['POST'])
 @jwt_required()
@@ -48,6 +56,7 @@ def add_product():
     
     db.session.add(inventory)
     db.session.commit()
+    product_index.refresh([new_product.id])
     
     return jsonify({
         'code': 200,
@@ -66,48 +75,53 @@ def add_product():
 @jwt_required()
 def get_products():
     """获取商品列表"""
-    page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', 10, type=int)
     keyword = request.args.get('keyword', '')
     
-    query = Product.query
-    
-    # 关键字搜索
+    # 默认按ID排序，关键字搜索优先使用搜索索引并按相关度排序
+    filters = []
+    order_keys = [(Product.id, False)]
+    ids = None
+    truncated = False
     if keyword:
-        query = query.filter(
-            (Product.code.like(f'%{keyword}%')) |
-            (Product.name.like(f'%{keyword}%')) |
-            (Product.barcode.like(f'%{keyword}%'))
-        )
+        result = search_service.search('products', keyword)
+        if result is None:
+            filters.append(
+                (Product.code.like(f'%{keyword}%')) |
+                (Product.name.like(f'%{keyword}%')) |
+                (Product.barcode.like(f'%{keyword}%'))
+            )
+        else:
+            ids, truncated = result
+            filters.append(Product.id.in_(ids))
+            order_keys = [(rank_order(Product.id, ids), False)]
+    
+    # 商品数和商品、库存的最大更新时间作为版本，客户端缓存仍有效时返回304
+    # 各自用标量子查询计算，未过滤时两个最大值直接走 updated_at 索引
+    inventory_updated = db.session.query(func.max(Inventory.updated_at))
+    if filters:
+        inventory_updated = inventory_updated.join(Product, Inventory.product_id == Product.id).filter(*filters)
+    total, product_updated, inventory_updated = db.session.query(
+        db.session.query(func.count(Product.id)).filter(*filters).scalar_subquery(),
+        db.session.query(func.max(Product.updated_at)).filter(*filters).scalar_subquery(),
+        inventory_updated.scalar_subquery()
+    ).one()
+    etag = list_etag((total, product_updated, inventory_updated), ids)
+    if is_fresh(etag):
+        return not_modified(etag)
     
     # 分页
-    pagination = query.paginate(page=page, per_page=limit, error_out=False)
-    products = pagination.items
-    
-    product_list = []
-    for product in products:
-        product_data = {
-            'id': product.id,
-            'code': product.code,
-            'name': product.name,
-            'barcode': product.barcode,
-            'price': float(product.price),
-            'status': product.status,
-            'inventory': {
-                'quantity': product.inventory.quantity if product.inventory else 0,
-                'alert_threshold': product.inventory.alert_threshold if product.inventory else 10
-            }
-        }
-        product_list.append(product_data)
-    
-    return jsonify({
+    query = Product.query.options(joinedload(Product.inventory)).filter(*filters)
+    pagination = paginate(query, order_keys, total)
+    product_list = [serialize_product(product) for product in pagination.items]
+    data = pagination.response(product_list)
+    # 搜索命中超过 SEARCH_MAX_RESULTS 时 total 和分页只覆盖相关度最高的部分
+    data['truncated'] = truncated
+    
+    return with_etag(jsonify({
         'code': 200,
         'message': '获取成功',
-        'data': {
-            'total': pagination.total,
-            'items': product_list
-        }
-    })
+        'data': data
+    }), etag)
 
 @api_bp.route('/products/<int:product_id>', methods=['PUT'])
 @jwt_required()
@@ -147,22 +161,12 @@ def update_product(product_id):
             inventory.alert_threshold = data['alert_threshold']
     
     db.session.commit()
+    product_index.refresh([product.id])
     
     return jsonify({
         'code': 200,
         'message': '更新成功',
-        'data': {
-            'id': product.id,
-            'code': product.code,
-            'name': product.name,
-            'barcode': product.barcode,
-            'price': float(product.price),
-            'status': product.status,
-            'inventory': {
-                'quantity': product.inventory.quantity if product.inventory else 0,
-                'alert_threshold': product.inventory.alert_threshold if product.inventory else 10
-            }
-        }
+        'data': serialize_product(product)
     })
 
 @api_bp.route('/products/search', methods=['GET'])
@@ -197,3 +201,38 @@ def search_product():
             }
         }
     })
+
+@api_bp.route('/products/scan/<string:code>', methods=['GET'])
+@jwt_required()
+def scan_product(code):
+    """扫码查询商品（按条形码或商品编号精确匹配，读取内存索引）"""
+    product = product_index.lookup(code)
+    if not product:
+        return jsonify({'code': 404, 'message': '商品不存在'}), 404
+    
+    return jsonify({
+        'code': 200,
+        'message': '查询成功',
+        'data': product
+    })
+
+@api_bp.route('/products/sync', methods=['GET'])
+@jwt_required()
+def sync_products():
+    """收银终端同步商品目录（NDJSON），带上次的令牌时只返回之后变化的商品"""
+    since = request.args.get('since')
+    if since and not since.isdigit():
+        return jsonify({'code': 400, 'message': '无效的同步令牌'}), 400
+    
+    config = current_app.config
+    lines = sync_catalog(
+        int(since) if since else None,
+        config.get('CATALOG_SYNC_BATCH_SIZE', 1000),
+        config.get('CATALOG_SYNC_MAX_CHANGES', 5000),
+        config.get('CATALOG_SYNC_GAP_WAIT', 10)
+    )
+    return Response(
+        stream_with_context(lines),
+        mimetype='application/x-ndjson; charset=utf-8',
+        headers={'Cache-Control': 'no-store'}
+    )
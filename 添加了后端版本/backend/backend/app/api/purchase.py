@@ -1,17 +1,22 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 import uuid
 from . import api_bp
-from ..models import PurchasePlan, StockIn, Product, Inventory, User
+from ..models import PurchasePlan, StockIn, Product, Inventory
 from ..extensions import db
+from ..services.product_index import product_index
+from ..utils.pagination import paginate
+from ..utils.serializers import serialize_stock_in
+from ..services.user_cache import get_current_user
 
 @api_bp.route('/purchase-plans', methods=['POST'])
 @jwt_required()
 def create_purchase_plan():
     """创建进货计划"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user:
         return jsonify({'code': 401, 'message': '用户未认证'}), 401
     
@@ -61,27 +66,25 @@ def create_purchase_plan():
 @jwt_required()
 def get_purchase_plans():
     """获取进货计划列表"""
-    page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', 10, type=int)
     status = request.args.get('status', type=int)  # 0:待执行, 1:已完成
     
-    query = PurchasePlan.query
+    query = PurchasePlan.query.options(
+        joinedload(PurchasePlan.product),
+        joinedload(PurchasePlan.creator)
+    )
     
     # 状态过滤
     if status is not None:
         query = query.filter(PurchasePlan.status == status)
     
-    # 按创建时间倒序
-    query = query.order_by(PurchasePlan.created_at.desc())
-    
-    # 分页
-    pagination = query.paginate(page=page, per_page=limit, error_out=False)
+    # 按创建时间倒序分页
+    pagination = paginate(query, [(PurchasePlan.created_at, True), (PurchasePlan.id, True)])
     plans = pagination.items
     
     plan_list = []
     for plan in plans:
-        product = Product.query.get(plan.product_id)
-        user = User.query.get(plan.created_by)
+        product = plan.product
+        user = plan.creator
         
         plan_data = {
             'id': plan.id,
@@ -98,10 +101,7 @@ def get_purchase_plans():
     return jsonify({
         'code': 200,
         'message': '获取成功',
-        'data': {
-            'total': pagination.total,
-            'items': plan_list
-        }
+        'data': pagination.response(plan_list)
     })
 
 @api_bp.route('/stock-in', methods=['POST'])
@@ -109,7 +109,7 @@ def get_purchase_plans():
 def create_stock_in():
     """入库操作"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user:
         return jsonify({'code': 401, 'message': '用户未认证'}), 401
     
@@ -163,6 +163,7 @@ def create_stock_in():
     inventory.quantity += quantity
     
     db.session.commit()
+    product_index.refresh([product_id])
     
     return jsonify({
         'code': 200,
@@ -182,12 +183,13 @@ def create_stock_in():
 @jwt_required()
 def get_stock_in_records():
     """获取入库记录列表"""
-    page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', 10, type=int)
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = StockIn.query
+    query = StockIn.query.options(
+        joinedload(StockIn.product),
+        joinedload(StockIn.operator)
+    )
     
     # 日期过滤
     if start_date:
@@ -205,36 +207,12 @@ def get_stock_in_records():
         except ValueError:
             pass
     
-    # 按创建时间倒序
-    query = query.order_by(StockIn.created_at.desc())
-    
-    # 分页
-    pagination = query.paginate(page=page, per_page=limit, error_out=False)
-    records = pagination.items
-    
-    record_list = []
-    for record in records:
-        product = Product.query.get(record.product_id)
-        user = User.query.get(record.created_by)
-        
-        record_data = {
-            'id': record.id,
-            'stock_in_no': record.stock_in_no,
-            'product_id': record.product_id,
-            'product_name': product.name if product else '未知商品',
-            'quantity': record.quantity,
-            'amount': float(record.amount),
-            'plan_id': record.plan_id,
-            'created_by': user.name if user else '未知',
-            'created_at': record.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        }
-        record_list.append(record_data)
+    # 按创建时间倒序分页
+    pagination = paginate(query, [(StockIn.created_at, True), (StockIn.id, True)])
+    record_list = [serialize_stock_in(record) for record in pagination.items]
     
     return jsonify({
         'code': 200,
         'message': '获取成功',
-        'data': {
-            'total': pagination.total,
-            'items': record_list
-        }
+        'data': pagination.response(record_list)
     })
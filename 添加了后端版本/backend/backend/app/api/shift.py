@@ -1,16 +1,20 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 from . import api_bp
-from ..models import Shift, User, Order
+from ..models import Shift
 from ..extensions import db
+from ..utils.pagination import paginate
+from ..utils.serializers import serialize_shift
+from ..services.user_cache import get_current_user, user_cache
 
 @api_bp.route('/shifts/start', methods=['POST'])
 @jwt_required()
 def start_shift():
     """开始交班"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user:
         return jsonify({'code': 401, 'message': '用户未认证'}), 401
     
@@ -46,7 +50,7 @@ def start_shift():
 def end_shift():
     """结束交班"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user:
         return jsonify({'code': 401, 'message': '用户未认证'}), 401
     
@@ -55,23 +59,8 @@ def end_shift():
     if not active_shift:
         return jsonify({'code': 400, 'message': '没有进行中的交班记录'}), 400
     
-    # 计算交班期间的订单数量和总金额
-    start_time = active_shift.start_time
-    end_time = datetime.now()
-    
-    orders = Order.query.filter(
-        Order.user_id == current_user_id,
-        Order.created_at >= start_time,
-        Order.created_at <= end_time
-    ).all()
-    
-    order_count = len(orders)
-    total_amount = sum(float(order.actual_amount) for order in orders)
-    
-    # 更新交班记录
-    active_shift.end_time = end_time
-    active_shift.order_count = order_count
-    active_shift.total_amount = total_amount
+    # 订单数量和总金额在下单时已累加，只需更新结束时间和状态
+    active_shift.end_time = datetime.now()
     active_shift.status = 1  # 已结束
     
     db.session.commit()
@@ -79,62 +68,32 @@ def end_shift():
     return jsonify({
         'code': 200,
         'message': '结束交班成功',
-        'data': {
-            'id': active_shift.id,
-            'user_id': active_shift.user_id,
-            'user_name': user.name,
-            'start_time': active_shift.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'end_time': active_shift.end_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'order_count': active_shift.order_count,
-            'total_amount': float(active_shift.total_amount),
-            'status': active_shift.status
-        }
+        'data': serialize_shift(active_shift, user.name)
     })
 
 @api_bp.route('/shifts', methods=['GET'])
 @jwt_required()
 def get_shifts():
     """获取交班记录列表"""
-    page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', 10, type=int)
     user_id = request.args.get('user_id', type=int)
     
-    query = Shift.query
+    query = Shift.query.options(joinedload(Shift.user))
     
     # 收银员过滤
     if user_id:
         query = query.filter(Shift.user_id == user_id)
     
-    # 按开始时间倒序
-    query = query.order_by(Shift.start_time.desc())
-    
-    # 分页
-    pagination = query.paginate(page=page, per_page=limit, error_out=False)
-    shifts = pagination.items
-    
+    # 按开始时间倒序分页
+    pagination = paginate(query, [(Shift.start_time, True), (Shift.id, True)])
     shift_list = []
-    for shift in shifts:
-        user = User.query.get(shift.user_id)
-        
-        shift_data = {
-            'id': shift.id,
-            'user_id': shift.user_id,
-            'user_name': user.name if user else '未知',
-            'start_time': shift.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'end_time': shift.end_time.strftime('%Y-%m-%d %H:%M:%S') if shift.end_time else None,
-            'order_count': shift.order_count,
-            'total_amount': float(shift.total_amount),
-            'status': shift.status
-        }
-        shift_list.append(shift_data)
+    for shift in pagination.items:
+        user = shift.user
+        shift_list.append(serialize_shift(shift, user.name if user else '未知'))
     
     return jsonify({
         'code': 200,
         'message': '获取成功',
-        'data': {
-            'total': pagination.total,
-            'items': shift_list
-        }
+        'data': pagination.response(shift_list)
     })
 
 @api_bp.route('/shifts/current', methods=['GET'])
@@ -147,21 +106,11 @@ def get_current_shift():
     if not active_shift:
         return jsonify({'code': 404, 'message': '没有进行中的交班记录'}), 404
     
-    user = User.query.get(active_shift.user_id)
+    user = user_cache.get(active_shift.user_id)
     
-    # 计算当前订单数量和总金额
-    start_time = active_shift.start_time
+    # 订单数量和总金额在下单时已累加
     end_time = datetime.now()
     
-    orders = Order.query.filter(
-        Order.user_id == current_user_id,
-        Order.created_at >= start_time,
-        Order.created_at <= end_time
-    ).all()
-    
-    order_count = len(orders)
-    total_amount = sum(float(order.actual_amount) for order in orders)
-    
     return jsonify({
         'code': 200,
         'message': '获取成功',
@@ -171,8 +120,8 @@ def get_current_shift():
             'user_name': user.name if user else '未知',
             'start_time': active_shift.start_time.strftime('%Y-%m-%d %H:%M:%S'),
             'duration': int((end_time - active_shift.start_time).total_seconds() / 60),  # 分钟
-            'order_count': order_count,
-            'total_amount': float(total_amount),
+            'order_count': active_shift.order_count,
+            'total_amount': float(active_shift.total_amount),
             'status': active_shift.status
         }
     })
@@ -1,27 +1,18 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from sqlalchemy import func
-from . import api_bp
-from ..models import Order, OrderItem, Product, Member, User
+from . import api_bp, admin_required
+from ..models import Product, SalesHourly, ProductSalesDaily
+from ..extensions import db
+from ..services.cache import stats_cache
+from ..services.live_sales import live_sales, live_stream
+from ..services.product_ranking import product_ranking, SORT_KEYS
+from ..services.sales_cube import sales_cube, DIMENSIONS, MEASURES
+from ..utils.sse import sse_response
 
-@api_bp.route('/stats/sales', methods=['GET'])
-@jwt_required()
-def get_sales_stats():
-    """获取销售统计数据"""
-    type_param = request.args.get('type', 'day')  # day/week/month
-    date_param = request.args.get('date')
-    
-    # 默认为今天
-    if not date_param:
-        date_param = datetime.now().strftime('%Y-%m-%d')
-    
-    try:
-        target_date = datetime.strptime(date_param, '%Y-%m-%d')
-    except ValueError:
-        return jsonify({'code': 400, 'message': '日期格式错误'}), 400
-    
-    # 根据类型确定日期范围
+def _get_date_range(type_param, target_date):
+    """根据统计类型确定日期范围，类型错误时返回None"""
     if type_param == 'day':
         start_date = target_date.replace(hour=0, minute=0, second=0)
         end_date = target_date.replace(hour=23, minute=59, second=59)
@@ -40,72 +31,72 @@ def get_sales_stats():
         else:
             end_date = datetime(target_date.year, target_date.month + 1, 1) - timedelta(seconds=1)
     else:
-        return jsonify({'code': 400, 'message': '类型参数错误'}), 400
-    
-    # 查询订单数据
-    orders = Order.query.filter(
-        Order.created_at >= start_date,
-        Order.created_at <= end_date
+        return None
+    return start_date, end_date
+
+def _hourly_rows(start_date, end_date):
+    """读取时间范围内的小时汇总行"""
+    return SalesHourly.query.filter(
+        SalesHourly.hour >= start_date,
+        SalesHourly.hour <= end_date
     ).all()
+
+@api_bp.route('/stats/sales', methods=['GET'])
+@jwt_required()
+def get_sales_stats():
+    """获取销售统计数据"""
+    type_param = request.args.get('type', 'day')  # day/week/month
+    date_param = request.args.get('date')
     
-    # 计算统计数据
-    total_amount = sum(float(order.actual_amount) for order in orders)
-    order_count = len(orders)
+    # 默认为今天
+    if not date_param:
+        date_param = datetime.now().strftime('%Y-%m-%d')
     
-    # 计算商品总数
-    product_count = 0
-    for order in orders:
-        product_count += sum(item.quantity for item in order.items)
+    try:
+        target_date = datetime.strptime(date_param, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'code': 400, 'message': '日期格式错误'}), 400
+    
+    date_range = _get_date_range(type_param, target_date)
+    if not date_range:
+        return jsonify({'code': 400, 'message': '类型参数错误'}), 400
+    start_date, end_date = date_range
     
-    # 计算会员订单数
-    member_order_count = sum(1 for order in orders if order.member_id is not None)
+    # 读取小时汇总行，按小时（日统计）或按天（周/月统计）分桶
+    total_amount = 0
+    order_count = 0
+    product_count = 0
+    member_order_count = 0
+    buckets = {}
+    for row in _hourly_rows(start_date, end_date):
+        total_amount += row.amount
+        order_count += row.order_count
+        product_count += row.product_count
+        member_order_count += row.member_order_count
+        
+        key = row.hour.hour if type_param == 'day' else row.hour.strftime('%Y-%m-%d')
+        count, amount = buckets.get(key, (0, 0))
+        buckets[key] = (count + row.order_count, amount + row.amount)
     
-    # 按日期分组统计
+    # 补齐没有订单的时间段
     details = []
     if type_param == 'day':
-        # 按小时统计
         for hour in range(24):
-            hour_start = start_date.replace(hour=hour, minute=0, second=0)
-            hour_end = start_date.replace(hour=hour, minute=59, second=59)
-            
-            hour_orders = [order for order in orders if hour_start <= order.created_at <= hour_end]
-            hour_amount = sum(float(order.actual_amount) for order in hour_orders)
-            
+            count, amount = buckets.get(hour, (0, 0))
             details.append({
                 'date': f"{hour:02d}:00",
-                'amount': hour_amount,
-                'count': len(hour_orders)
+                'amount': amount,
+                'count': count
             })
-    elif type_param == 'week':
-        # 按天统计
-        for day in range(7):
-            day_date = start_date + timedelta(days=day)
-            day_start = day_date.replace(hour=0, minute=0, second=0)
-            day_end = day_date.replace(hour=23, minute=59, second=59)
-            
-            day_orders = [order for order in orders if day_start <= order.created_at <= day_end]
-            day_amount = sum(float(order.actual_amount) for order in day_orders)
-            
-            details.append({
-                'date': day_date.strftime('%Y-%m-%d'),
-                'amount': day_amount,
-                'count': len(day_orders)
-            })
-    elif type_param == 'month':
-        # 按天统计
-        days_in_month = (end_date - start_date).days + 1
-        for day in range(days_in_month):
-            day_date = start_date + timedelta(days=day)
-            day_start = day_date.replace(hour=0, minute=0, second=0)
-            day_end = day_date.replace(hour=23, minute=59, second=59)
-            
-            day_orders = [order for order in orders if day_start <= order.created_at <= day_end]
-            day_amount = sum(float(order.actual_amount) for order in day_orders)
-            
+    else:
+        days = (end_date - start_date).days + 1
+        for day in range(days):
+            day_key = (start_date + timedelta(days=day)).strftime('%Y-%m-%d')
+            count, amount = buckets.get(day_key, (0, 0))
             details.append({
-                'date': day_date.strftime('%Y-%m-%d'),
-                'amount': day_amount,
-                'count': len(day_orders)
+                'date': day_key,
+                'amount': amount,
+                'count': count
             })
     
     return jsonify({
@@ -127,6 +118,7 @@ def get_product_stats():
     type_param = request.args.get('type', 'day')  # day/week/month
     date_param = request.args.get('date')
     limit = request.args.get('limit', 10, type=int)
+    sort = request.args.get('sort', 'amount')  # amount/quantity
     
     # 默认为今天
     if not date_param:
@@ -137,55 +129,32 @@ def get_product_stats():
     except ValueError:
         return jsonify({'code': 400, 'message': '日期格式错误'}), 400
     
-    # 根据类型确定日期范围
-    if type_param == 'day':
-        start_date = target_date.replace(hour=0, minute=0, second=0)
-        end_date = target_date.replace(hour=23, minute=59, second=59)
-    elif type_param == 'week':
-        # 获取本周的星期一
-        start_date = target_date - timedelta(days=target_date.weekday())
-        start_date = start_date.replace(hour=0, minute=0, second=0)
-        end_date = start_date + timedelta(days=6)
-        end_date = end_date.replace(hour=23, minute=59, second=59)
-    elif type_param == 'month':
-        # 获取本月第一天
-        start_date = target_date.replace(day=1, hour=0, minute=0, second=0)
-        # 获取下个月第一天，然后减去1秒
-        if target_date.month == 12:
-            end_date = datetime(target_date.year + 1, 1, 1) - timedelta(seconds=1)
-        else:
-            end_date = datetime(target_date.year, target_date.month + 1, 1) - timedelta(seconds=1)
-    else:
+    date_range = _get_date_range(type_param, target_date)
+    if not date_range:
         return jsonify({'code': 400, 'message': '类型参数错误'}), 400
+    start_date, end_date = date_range
     
-    # 查询订单项数据
-    orders = Order.query.filter(
-        Order.created_at >= start_date,
-        Order.created_at <= end_date
-    ).all()
+    if sort not in SORT_KEYS:
+        return jsonify({'code': 400, 'message': '排序参数错误，可选：amount/quantity'}), 400
+    if limit < 1:
+        return jsonify({'code': 400, 'message': 'limit 必须为正整数'}), 400
     
-    # 统计商品销售情况
-    product_stats = {}
-    for order in orders:
-        for item in order.items:
-            if item.product_id not in product_stats:
-                product = Product.query.get(item.product_id)
-                product_stats[item.product_id] = {
-                    'product_id': item.product_id,
-                    'product_name': product.name if product else '未知商品',
-                    'quantity': 0,
-                    'amount': 0
-                }
-            
-            product_stats[item.product_id]['quantity'] += item.quantity
-            product_stats[item.product_id]['amount'] += float(item.amount)
+    ranking = product_ranking.top(
+        start_date.date(), end_date.date(), sort, limit,
+        current_app.config.get('PRODUCT_RANKING_PERIODS', 64),
+        current_app.config.get('PRODUCT_RANKING_SYNC_INTERVAL', 30)
+    )
+    # 只查询上榜商品的名称
+    names = dict(db.session.query(Product.id, Product.name).filter(
+        Product.id.in_([product_id for product_id, _, _ in ranking])
+    ).all()) if ranking else {}
     
-    # 排序并限制数量
-    sorted_stats = sorted(
-        product_stats.values(),
-        key=lambda x: x['amount'],
-        reverse=True
-    )[:limit]
+    sorted_stats = [{
+        'product_id': product_id,
+        'product_name': names.get(product_id) or '未知商品',
+        'quantity': quantity,
+        'amount': round(amount, 2)
+    } for product_id, quantity, amount in ranking]
     
     return jsonify({
         'code': 200,
@@ -193,87 +162,68 @@ def get_product_stats():
         'data': sorted_stats
     })
 
+def _load_day_summary(day):
+    """读取某一天的销售汇总"""
+    day_start = datetime.combine(day, datetime.min.time())
+    day_end = datetime.combine(day, datetime.max.time())
+    summary = {'sales': 0, 'order_count': 0, 'product_count': 0, 'member_order_count': 0}
+    for row in _hourly_rows(day_start, day_end):
+        summary['sales'] += row.amount
+        summary['order_count'] += row.order_count
+        summary['product_count'] += row.product_count
+        summary['member_order_count'] += row.member_order_count
+    return summary
+
+def _load_day_categories(day):
+    """读取某一天各商品分类的销售额"""
+    category = func.coalesce(func.nullif(Product.category, ''), '未分类')
+    rows = db.session.query(
+        category,
+        func.sum(ProductSalesDaily.amount)
+    ).outerjoin(
+        Product, ProductSalesDaily.product_id == Product.id
+    ).filter(
+        ProductSalesDaily.date == day
+    ).group_by(category).all()
+    return [[name, float(amount)] for name, amount in rows]
+
+def _product_version():
+    """商品表版本，修改商品分类或删除商品后变化，分类占比的日缓存随之失效"""
+    count, updated_at = db.session.query(func.count(Product.id), func.max(Product.updated_at)).one()
+    return f'{count}:{updated_at}'
+
 @api_bp.route('/stats/dashboard', methods=['GET'])
 @jwt_required()
 def get_dashboard_stats():
     """获取仪表盘统计数据"""
     # 获取今日日期
     today = datetime.now().date()
-    today_start = datetime.combine(today, datetime.min.time())
-    today_end = datetime.combine(today, datetime.max.time())
-    
-    # 获取今日销售数据
-    today_orders = Order.query.filter(
-        Order.created_at >= today_start,
-        Order.created_at <= today_end
-    ).all()
-    
-    today_sales = sum(float(order.actual_amount) for order in today_orders)
-    today_order_count = len(today_orders)
-    
-    # 计算今日销售商品数量
-    today_product_count = 0
-    for order in today_orders:
-        today_product_count += sum(item.quantity for item in order.items)
-    
-    # 计算今日会员订单数
-    today_member_order_count = sum(1 for order in today_orders if order.member_id is not None)
-    
-    # 获取7天销售趋势
     seven_days_ago = today - timedelta(days=6)
-    seven_days_start = datetime.combine(seven_days_ago, datetime.min.time())
     
+    # 按天读取缓存，已结束的日期只计算一次
     seven_days_trend = []
+    category_amounts = {}
+    product_version = _product_version()
     for i in range(7):
         day = seven_days_ago + timedelta(days=i)
-        day_start = datetime.combine(day, datetime.min.time())
-        day_end = datetime.combine(day, datetime.max.time())
-        
-        day_orders = Order.query.filter(
-            Order.created_at >= day_start,
-            Order.created_at <= day_end
-        ).all()
-        
-        day_sales = sum(float(order.actual_amount) for order in day_orders)
-        
+        summary = stats_cache.get_day('dashboard_day', day, _load_day_summary)
         seven_days_trend.append({
             'date': day.strftime('%m-%d'),
-            'amount': day_sales
+            'amount': summary['sales']
         })
+        
+        for name, amount in stats_cache.get_day('dashboard_categories', day, _load_day_categories,
+                                                product_version):
+            category_amounts[name] = category_amounts.get(name, 0) + amount
     
-    # 获取商品分类占比（这里简化为按商品统计）
-    all_orders = Order.query.filter(
-        Order.created_at >= seven_days_start,
-        Order.created_at <= today_end
-    ).all()
-    
-    product_stats = {}
-    for order in all_orders:
-        for item in order.items:
-            if item.product_id not in product_stats:
-                product = Product.query.get(item.product_id)
-                product_stats[item.product_id] = {
-                    'name': product.name if product else '未知商品',
-                    'amount': 0
-                }
-            
-            product_stats[item.product_id]['amount'] += float(item.amount)
-    
-    # 取销售额前5的商品
-    top_products = sorted(
-        product_stats.values(),
-        key=lambda x: x['amount'],
-        reverse=True
-    )[:5]
-    
-    # 计算其他商品的总销售额
-    other_amount = sum(item['amount'] for item in list(product_stats.values())[5:]) if len(product_stats) > 5 else 0
-    
-    # 如果有其他商品，添加到列表中
+    # 商品分类占比：取销售额前5的分类，其余合并为"其他"
+    sorted_stats = sorted(category_amounts.items(), key=lambda item: item[1], reverse=True)
+    top_categories = [{'name': name, 'amount': round(amount, 2)} for name, amount in sorted_stats[:5]]
+    other_amount = sum(amount for _, amount in sorted_stats[5:])
     if other_amount > 0:
-        top_products.append({
+        top_categories.append({
             'name': '其他',
-            'amount': other_amount
+            'amount': round(other_amount, 2)
         })
     
     return jsonify({
@@ -281,12 +231,91 @@ def get_dashboard_stats():
         'message': '获取成功',
         'data': {
             'today': {
-                'sales': today_sales,
-                'order_count': today_order_count,
-                'product_count': today_product_count,
-                'member_order_count': today_member_order_count
+                'sales': summary['sales'],
+                'order_count': summary['order_count'],
+                'product_count': summary['product_count'],
+                'member_order_count': summary['member_order_count']
             },
             'trend': seven_days_trend,
-            'category': top_products
+            'category': top_categories
         }
     })
+
+@api_bp.route('/stats/live', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_live_stats():
+    """今日销售实时推送（Server-Sent Events），浏览器 EventSource 可通过 ?jwt= 传递令牌"""
+    subscription, snapshot = live_sales.subscribe(current_app.config.get('SSE_BUFFER_SIZE', 100))
+    return sse_response(live_stream(subscription, snapshot))
+
+@api_bp.route('/stats/query', methods=['POST'])
+@jwt_required()
+def query_stats():
+    """按时段、日期、星期、分类、收银员、是否会员任意组合分组统计销售明细"""
+    if not sales_cube.available:
+        return jsonify({'code': 501, 'message': '统计查询需要安装 numpy'}), 501
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'code': 400, 'message': '无效的请求数据'}), 400
+    
+    # group_by、measures 可以是单个名称或名称列表
+    group_by = data.get('group_by') or []
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    if not isinstance(group_by, list) or any(name not in DIMENSIONS for name in group_by) \
+            or len(set(group_by)) != len(group_by):
+        return jsonify({'code': 400, 'message': f"分组字段错误，可选：{'/'.join(DIMENSIONS)}"}), 400
+    
+    measures = data.get('measures') or list(MEASURES)
+    if isinstance(measures, str):
+        measures = [measures]
+    if not isinstance(measures, list) or any(name not in MEASURES for name in measures):
+        return jsonify({'code': 400, 'message': f"统计指标错误，可选：{'/'.join(MEASURES)}"}), 400
+    
+    sort = data.get('sort')
+    if sort is not None and sort not in measures:
+        return jsonify({'code': 400, 'message': '排序指标必须在统计指标中'}), 400
+    limit = data.get('limit')
+    if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit <= 0):
+        return jsonify({'code': 400, 'message': 'limit 必须为正整数'}), 400
+    
+    try:
+        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date() if data.get('start_date') else None
+        end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date() if data.get('end_date') else None
+    except (TypeError, ValueError):
+        return jsonify({'code': 400, 'message': '日期格式错误'}), 400
+    
+    # 过滤条件：member 为布尔值，category 为分类名列表，其余为整数列表
+    filters = data.get('filters') or {}
+    if not isinstance(filters, dict):
+        return jsonify({'code': 400, 'message': '过滤条件必须为对象'}), 400
+    for name, values in filters.items():
+        if name not in DIMENSIONS or name == 'day':
+            return jsonify({'code': 400, 'message': f'不支持的过滤字段：{name}，日期请使用 start_date/end_date'}), 400
+        if name == 'member':
+            if not isinstance(values, bool):
+                return jsonify({'code': 400, 'message': 'member 过滤值必须为 true 或 false'}), 400
+        elif not isinstance(values, list):
+            return jsonify({'code': 400, 'message': f'{name} 过滤值必须为列表'}), 400
+        elif name == 'category':
+            if not all(isinstance(value, str) for value in values):
+                return jsonify({'code': 400, 'message': 'category 过滤值必须为分类名'}), 400
+        elif not all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+            return jsonify({'code': 400, 'message': f'{name} 过滤值必须为整数'}), 400
+    
+    return jsonify({
+        'code': 200,
+        'message': '获取成功',
+        'data': sales_cube.query(group_by, measures, start_date, end_date, filters, sort, limit)
+    })
+
+@api_bp.route('/stats/cache', methods=['GET'])
+@admin_required
+def get_cache_stats():
+    """获取统计缓存命中情况"""
+    return jsonify({
+        'code': 200,
+        'message': '获取成功',
+        'data': stats_cache.stats()
+    })
@@ -0,0 +1,77 @@
+import click
+from datetime import datetime
+
+def register_commands(app):
+    """注册 flask 命令行命令"""
+    
+    @app.cli.command('rollup-rebuild')
+    @click.option('--start', help='起始日期 YYYY-MM-DD，默认全部')
+    @click.option('--end', help='结束日期 YYYY-MM-DD，默认全部')
+    def rollup_rebuild(start, end):
+        """根据原始订单重建销售汇总表"""
+        from .services.rollup import rebuild_rollups
+        start = datetime.strptime(start, '%Y-%m-%d') if start else None
+        end = datetime.strptime(end, '%Y-%m-%d') if end else None
+        from .services.cache import stats_cache
+        hours, product_days = rebuild_rollups(start, end)
+        stats_cache.clear()
+        click.echo(f'汇总表重建完成：小时汇总 {hours} 行，商品日汇总 {product_days} 行')
+    
+    @app.cli.command('shift-reconcile')
+    @click.option('--shift-id', type=int, help='只核对指定交班记录')
+    @click.option('--fix', is_flag=True, help='用原始订单重新计算并修正不一致的记录')
+    def shift_reconcile(shift_id, fix):
+        """核对交班累计的订单数和金额"""
+        from .services.shift import reconcile_shifts
+        mismatches = reconcile_shifts(shift_id, fix)
+        for item in mismatches:
+            click.echo(f"交班 {item['shift_id']}：订单数 {item['order_count']} -> {item['expected_order_count']}，"
+                       f"金额 {item['total_amount']:.2f} -> {item['expected_total_amount']:.2f}")
+        if not mismatches:
+            click.echo('交班累计值与订单一致')
+        elif fix:
+            click.echo(f'已修正 {len(mismatches)} 条交班记录')
+        else:
+            click.echo(f'{len(mismatches)} 条交班记录不一致，使用 --fix 修正')
+            raise SystemExit(1)
+    
+    @app.cli.command('jobs-run')
+    @click.option('--retry-failed', is_flag=True, help='同时重新执行已标记为失败的任务')
+    def jobs_run(retry_failed):
+        """在当前进程执行所有待处理的后台任务"""
+        from .services.jobs import job_queue
+        done, remaining = job_queue.run_pending(retry_failed)
+        click.echo(f'已执行 {done} 个任务' + (f'，{remaining} 个任务未完成' if remaining else ''))
+        if remaining:
+            raise SystemExit(1)
+    
+    @app.cli.command('jobs-prune')
+    @click.option('--days', type=int, default=7, show_default=True, help='保留最近几天完成的任务')
+    def jobs_prune(days):
+        """清理已完成的后台任务"""
+        from .services.jobs import job_queue
+        click.echo(f'已删除 {job_queue.prune(days)} 个已完成的任务')
+    
+    @app.cli.command('stock-alerts-rebuild')
+    def stock_alerts_rebuild():
+        """按当前库存重建库存预警集合"""
+        from .services.stock_alert import rebuild_stock_alerts
+        click.echo(f'库存预警重建完成：{rebuild_stock_alerts()} 个商品处于预警或缺货状态')
+    
+    @app.cli.command('sales-cube-build')
+    @click.option('--rebuild', is_flag=True, help='删除已有列文件后重新生成')
+    def sales_cube_build(rebuild):
+        """生成或追加 /stats/query 使用的订单明细列文件"""
+        from .services.sales_cube import sales_cube
+        if not sales_cube.available:
+            click.echo('需要安装 numpy')
+            raise SystemExit(1)
+        _, rows = sales_cube.refresh(rebuild)
+        click.echo(f'订单明细列文件共 {rows} 行，目录 {sales_cube.directory}')
+    
+    @app.cli.command('catalog-changes-prune')
+    @click.option('--days', type=int, default=7, show_default=True, help='保留最近几天的变更记录')
+    def catalog_changes_prune(days):
+        """清理 /products/sync 使用的商品变更记录"""
+        from .services.catalog_sync import prune_changes
+        click.echo(f'已删除 {prune_changes(days)} 条商品变更记录')
@@ -4,7 +4,80 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'hard-to-guess-string'
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = 24 * 60 * 60  # 24小时
+    
+    # 登录用户信息缓存，用户修改后立即失效，其他进程最迟 TTL 秒后生效
+    USER_CACHE_SIZE = 256
+    USER_CACHE_TTL = 60
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # 数据库连接：SQLite 在建立连接时执行 SQLITE_PRAGMAS，
+    # 服务器数据库使用以下连接池参数，None 表示使用 SQLAlchemy 默认值
+    SQLITE_PRAGMAS = {}
+    DB_POOL_SIZE = None
+    DB_MAX_OVERFLOW = None
+    DB_POOL_TIMEOUT = None
+    DB_POOL_RECYCLE = None
+    DB_POOL_PRE_PING = None
+    
+    # 统计缓存：memory（进程内LRU）或 redis（Redis兼容服务）
+    STATS_CACHE_BACKEND = os.environ.get('STATS_CACHE_BACKEND') or 'memory'
+    STATS_CACHE_REDIS_URL = os.environ.get('STATS_CACHE_REDIS_URL') or 'redis://localhost:6379/0'
+    STATS_CACHE_SIZE = 1024
+    STATS_CACHE_TODAY_TTL = 60  # 当日数据缓存秒数
+    
+    # 启动时预热扫码商品索引
+    PRODUCT_INDEX_WARM = True
+    PRODUCT_INDEX_SYNC_INTERVAL = 30  # 秒，扫码索引读取其他进程的商品和库存变更，0 表示不读取
+    
+    # 关键字搜索：auto（SQLite用FTS5，其他数据库用进程内n-gram索引）/fts5/ngram/like
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND') or 'auto'
+    SEARCH_MAX_RESULTS = 1000  # 单次搜索最多返回的匹配数，超过时列表接口返回 truncated
+    SEARCH_SYNC_INTERVAL = 30  # 秒，n-gram 索引读取其他进程的商品、会员修改，0 表示不读取
+    
+    # 离线订单批量上传
+    ORDER_BATCH_MAX_SIZE = 5000  # 单次请求最多订单数
+    ORDER_BATCH_CHUNK_SIZE = 200  # 每个事务写入的订单数
+    
+    # 订单提交后的后台任务（会员积分、等级；库存预警由 stock_alert 在下单事务内登记）
+    JOB_QUEUE_WORKERS = 2  # 每个进程的任务线程数
+    JOB_MAX_ATTEMPTS = 5  # 失败重试次数上限
+    JOB_RETRY_DELAY = 5  # 秒，第n次失败后等待 n 倍时间重试
+    MEMBER_POINTS_PER_YUAN = 1  # 每消费1元累计的积分
+    
+    # Server-Sent Events 推送
+    SSE_HEARTBEAT = 15  # 秒，无事件时发送心跳的间隔
+    SSE_BUFFER_SIZE = 100  # 每个连接积压的事件上限，超过后改为重新发送快照
+    STOCK_ALERT_SYNC_INTERVAL = 30  # 秒，比对预警表以发现其他进程产生的预警，0 表示不比对
+    LIVE_STATS_SYNC_INTERVAL = 30  # 秒，实时销售汇总重新加载以计入其他进程的订单，0 表示只在跨天时加载
+    
+    # /stats/query 使用的订单明细列文件（需要安装 numpy），默认放在 instance/sales_cube
+    SALES_CUBE_DIR = os.environ.get('SALES_CUBE_DIR')
+    SALES_CUBE_CHUNK_SIZE = 200000  # 每批从数据库读取的订单明细数
+    SALES_CUBE_RESULT_CACHE_SIZE = 256  # 缓存的查询结果数，有新明细时自动失效
+    SALES_CUBE_GAP_WAIT = 600  # 秒，明细ID出现空缺时继续补读未提交事务的时间，超过后视为回滚留下的空号
+    
+    # /stats/products 的进程内商品排行
+    PRODUCT_RANKING_SYNC_INTERVAL = 30  # 秒，进行中周期的商品排行重新加载以计入其他进程的订单，0 表示不重新加载
+    PRODUCT_RANKING_PERIODS = 64  # 进程内保留排行的统计周期数
+    
+    # 响应 JSON 编码：auto（安装了 orjson 时使用）/orjson/json
+    JSON_SERIALIZER = os.environ.get('JSON_SERIALIZER', 'auto')
+    
+    # /products/sync 收银终端商品目录同步
+    CATALOG_SYNC_BATCH_SIZE = 1000  # 完整同步每批读取的商品数
+    CATALOG_SYNC_MAX_CHANGES = 5000  # 每次增量同步最多读取的变更记录数，超过时 has_more 为 true
+    CATALOG_SYNC_GAP_WAIT = 10  # 秒，变更ID出现空缺时等待未提交事务的时间，超过后视为回滚留下的空号
+    
+    # 订单导出每批从数据库读取的行数
+    ORDER_EXPORT_BATCH_SIZE = 1000
+    
+    # 性能监控：接口耗时、SQL统计、慢查询日志和 /metrics，关闭时无额外开销
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+    METRICS_PATH = '/metrics'
+    # /metrics 允许访问的地址或网段（逗号分隔），以及可从其他地址访问的 Bearer 令牌
+    METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_SLOW_QUERY_MS = int(os.environ.get('METRICS_SLOW_QUERY_MS') or 200)  # 慢查询阈值（毫秒）
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -13,12 +86,27 @@ class DevelopmentConfig(Config):
 
 class TestingConfig(Config):
     TESTING = True
+    PRODUCT_INDEX_WARM = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
         'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), '../test.db')
 
 class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), '../data.db')
+    
+    # WAL 模式下读写互不阻塞，多台收银机同时提交时写入排队等待而不是立即报错
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 15000),  # 毫秒，等待写锁的最长时间
+        'synchronous': 'NORMAL',  # WAL 模式下断电最多丢失最近的事务，不会损坏数据库
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # 负数单位为KB，即64MB
+    }
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 20)
+    DB_POOL_TIMEOUT = 30
+    DB_POOL_RECYCLE = 1800  # 秒，早于 MySQL wait_timeout 回收连接
+    DB_POOL_PRE_PING = True
 
 config = {
     'development': DevelopmentConfig,
@@ -2,6 +2,10 @@ from ..models.user import User
 from ..models.product import Product
 from ..models.member import Member
 from ..models.inventory import Inventory
-from ..models.order import Order, OrderItem
+from ..models.order import Order, OrderItem, OrderRequest
 from ..models.purchase import PurchasePlan, StockIn
 from ..models.shift import Shift
+from ..models.rollup import SalesHourly, ProductSalesDaily
+from ..models.outbox import OutboxJob
+from ..models.stock_alert import StockAlert
+from ..models.product_change import ProductChange
@@ -3,6 +3,10 @@ from ..extensions import db
 
 class Inventory(db.Model):
     __tablename__ = 'inventory'
+    __table_args__ = (
+        db.UniqueConstraint('product_id', name='uq_inventory_product_id'),
+        db.Index('ix_inventory_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
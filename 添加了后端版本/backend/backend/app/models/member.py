@@ -3,6 +3,9 @@ from ..extensions import db
 
 class Member(db.Model):
     __tablename__ = 'members'
+    __table_args__ = (
+        db.Index('ix_members_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     card_no = db.Column(db.String(50), unique=True, nullable=False)
@@ -3,6 +3,10 @@ from ..extensions import db
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_orders_created_at', 'created_at'),
+        db.Index('ix_orders_user_id_created_at', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_no = db.Column(db.String(50), unique=True, nullable=False)
@@ -23,6 +27,10 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),
+        db.Index('ix_order_items_product_id', 'product_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
@@ -33,3 +41,15 @@ class OrderItem(db.Model):
     
     def __repr__(self):
         return f'<OrderItem order_id={self.order_id}, product_id={self.product_id}>'
+
+class OrderRequest(db.Model):
+    """离线收银批量上传的幂等记录"""
+    __tablename__ = 'order_requests'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    idempotency_key = db.Column(db.String(64), unique=True, nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    
+    def __repr__(self):
+        return f'<OrderRequest {self.idempotency_key}>'
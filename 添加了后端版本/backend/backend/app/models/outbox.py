@@ -0,0 +1,21 @@
+from datetime import datetime
+from ..extensions import db
+
+class OutboxJob(db.Model):
+    """提交后执行的后台任务，与业务数据在同一事务内写入，进程崩溃后重启时继续执行"""
+    __tablename__ = 'outbox_jobs'
+    __table_args__ = (
+        db.Index('ix_outbox_jobs_status_id', 'status', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    status = db.Column(db.Integer, default=0, nullable=False)  # 0:待执行, 1:已完成, 2:失败
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    processed_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<OutboxJob {self.job_type} id={self.id}, status={self.status}>'
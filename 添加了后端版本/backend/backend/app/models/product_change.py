@@ -0,0 +1,16 @@
+from datetime import datetime
+from ..extensions import db
+
+class ProductChange(db.Model):
+    """商品或库存的变更记录，自增ID作为收银终端增量同步的令牌"""
+    __tablename__ = 'product_changes'
+    __table_args__ = (
+        db.Index('ix_product_changes_created_at', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, nullable=False)  # 不设外键，商品删除后仍保留记录
+    created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    
+    def __repr__(self):
+        return f'<ProductChange {self.id} product_id={self.product_id}>'
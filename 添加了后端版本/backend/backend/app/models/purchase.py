@@ -3,6 +3,9 @@ from ..extensions import db
 
 class PurchasePlan(db.Model):
     __tablename__ = 'purchase_plans'
+    __table_args__ = (
+        db.Index('ix_purchase_plans_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     plan_no = db.Column(db.String(50), unique=True, nullable=False)
@@ -21,6 +24,9 @@ class PurchasePlan(db.Model):
 
 class StockIn(db.Model):
     __tablename__ = 'stock_in'
+    __table_args__ = (
+        db.Index('ix_stock_in_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     stock_in_no = db.Column(db.String(50), unique=True, nullable=False)
@@ -0,0 +1,31 @@
+from ..extensions import db
+
+class SalesHourly(db.Model):
+    """按小时汇总的销售数据，随订单写入增量维护"""
+    __tablename__ = 'sales_hourly'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    hour = db.Column(db.DateTime, unique=True, nullable=False)  # 整点时间
+    order_count = db.Column(db.Integer, default=0, nullable=False)
+    member_order_count = db.Column(db.Integer, default=0, nullable=False)
+    product_count = db.Column(db.Integer, default=0, nullable=False)
+    amount = db.Column(db.Float, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<SalesHourly {self.hour}>'
+
+class ProductSalesDaily(db.Model):
+    """按天汇总的商品销售数据，随订单写入增量维护"""
+    __tablename__ = 'product_sales_daily'
+    __table_args__ = (
+        db.UniqueConstraint('date', 'product_id', name='uq_product_sales_daily_date_product'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, default=0, nullable=False)
+    amount = db.Column(db.Float, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<ProductSalesDaily date={self.date}, product_id={self.product_id}>'
@@ -3,6 +3,10 @@ from ..extensions import db
 
 class Shift(db.Model):
     __tablename__ = 'shifts'
+    __table_args__ = (
+        db.Index('ix_shifts_user_id_status', 'user_id', 'status'),
+        db.Index('ix_shifts_start_time', 'start_time'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
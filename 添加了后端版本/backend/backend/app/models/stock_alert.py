@@ -0,0 +1,17 @@
+from datetime import datetime
+from ..extensions import db
+
+class StockAlert(db.Model):
+    """当前处于预警或缺货状态的商品，库存跨越预警值时维护"""
+    __tablename__ = 'stock_alerts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), unique=True, nullable=False)
+    status = db.Column(db.String(10), nullable=False)  # 预警 / 缺货
+    quantity = db.Column(db.Integer, nullable=False)  # 状态变化时的库存
+    alert_threshold = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    
+    def __repr__(self):
+        return f'<StockAlert product_id={self.product_id}, status={self.status}>'
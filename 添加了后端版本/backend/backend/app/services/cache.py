@@ -0,0 +1,142 @@
+"""统计数据缓存
+
+默认使用进程内 LRU 缓存（支持过期时间），也可通过配置切换到 Redis 兼容服务。
+仪表盘按日期缓存：已结束的日期永久缓存，当日数据在订单提交后失效；
+依赖其他表的数据可带上该表的版本，版本变化后失效。
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+class LRUCache:
+    """线程安全的进程内 LRU 缓存，ttl 为 None 表示不过期"""
+    
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expire_at = entry
+            if expire_at is not None and expire_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key, value, ttl=None):
+        expire_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expire_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self):
+        return len(self._data)
+
+class RedisCache:
+    """Redis 兼容服务的缓存后端，值以 JSON 存储"""
+    
+    def __init__(self, client, prefix='smms:'):
+        self.client = client
+        self.prefix = prefix
+    
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+    
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+    
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+    
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+    
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(self.prefix + '*'))
+
+class StatsCache:
+    """统计缓存入口，记录命中/未命中次数"""
+    
+    def __init__(self, app=None):
+        self.backend = LRUCache()
+        self.today_ttl = 60
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        backend = app.config.get('STATS_CACHE_BACKEND', 'memory')
+        if backend == 'redis':
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError('STATS_CACHE_BACKEND=redis 需要安装 redis 包')
+            client = redis.Redis.from_url(app.config['STATS_CACHE_REDIS_URL'])
+            self.backend = RedisCache(client)
+        else:
+            self.backend = LRUCache(app.config.get('STATS_CACHE_SIZE', 1024))
+        self.today_ttl = app.config.get('STATS_CACHE_TODAY_TTL', 60)
+    
+    def get_day(self, name, day, loader, version=None):
+        """读取某一天的缓存数据，未命中时调用 loader 计算并写入
+        
+        version 为数据依赖的其他表的版本（字符串），与缓存值一同保存，版本不同时视为未命中。
+        """
+        key = f'{name}:{day.isoformat()}'
+        value = self.backend.get(key)
+        if value is not None and version is not None:
+            value = value['value'] if value.get('version') == version else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is not None:
+            return value
+        
+        value = loader(day)
+        # 已结束的日期不会再变化，永久缓存；当日数据设置过期时间兜底
+        ttl = None if day < datetime.now().date() else self.today_ttl
+        self.backend.set(key, value if version is None else {'version': version, 'value': value}, ttl)
+        return value
+    
+    def invalidate_day(self, day, names=('dashboard_day', 'dashboard_categories')):
+        for name in names:
+            self.backend.delete(f'{name}:{day.isoformat()}')
+    
+    def clear(self):
+        self.backend.clear()
+    
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': 'redis' if isinstance(self.backend, RedisCache) else 'memory',
+            'size': len(self.backend),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0
+        }
+
+stats_cache = StatsCache()
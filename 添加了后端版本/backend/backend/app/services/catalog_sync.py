@@ -0,0 +1,168 @@
+"""收银终端商品目录增量同步
+
+商品或库存每次变化都在同一事务内写入 product_changes 表，自增ID即同步令牌。终端带上次返回的令牌请求，
+只下载之后变化过的商品的当前数据，已删除的商品单独列出；没有令牌或令牌已失效时下载完整目录。
+ORM 修改 Product/Inventory 时在 flush 后自动记录，批量 UPDATE 扣减库存时由调用方调用 track_product_changes。
+
+自增ID在插入时分配、提交后才可见，并发事务可能先提交较大的ID。令牌只推进到第一个空缺之前，
+空缺在 gap_wait 秒后仍未填上时视为回滚留下的空号跳过。
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session
+from ..extensions import db
+from ..models import Product, Inventory, ProductChange
+from ..utils.json_provider import dumps_line
+
+# 每行商品数组的字段顺序
+FIELDS = ('id', 'code', 'name', 'barcode', 'category', 'price', 'status', 'quantity', 'alert_threshold')
+
+def track_product_changes(product_ids, session=None):
+    """记录商品或库存发生变化的商品，需在修改的事务内调用"""
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return
+    session = session or db.session
+    now = datetime.now()
+    session.execute(insert(ProductChange.__table__), [
+        {'product_id': product_id, 'created_at': now} for product_id in product_ids
+    ])
+
+def _changes(since, limit, gap_wait):
+    """读取 since 之后的变更，返回 (新令牌, 变化的商品ID集合, 是否还有未读取的变更)"""
+    query = db.session.query(
+        ProductChange.id, ProductChange.product_id, ProductChange.created_at
+    ).filter(ProductChange.id > since).order_by(ProductChange.id)
+    if limit:
+        query = query.limit(limit)
+    rows = query.all()
+    
+    recent = datetime.now() - timedelta(seconds=gap_wait)
+    token, product_ids = since, set()
+    for change_id, product_id, created_at in rows:
+        if change_id != token + 1 and created_at > recent:
+            # 空缺的ID可能属于尚未提交的事务，停在空缺之前，下次同步时再读取
+            return token, product_ids, False
+        token = change_id
+        product_ids.add(product_id)
+    return token, product_ids, bool(limit) and len(rows) == limit
+
+def _valid_since(since):
+    """令牌是否仍可用于增量同步：早于已清理的记录或大于当前最大ID（数据库已重建）时需完整同步"""
+    if since is None:
+        return False
+    first, last = db.session.query(
+        select(func.min(ProductChange.id)).scalar_subquery(),
+        select(func.max(ProductChange.id)).scalar_subquery()
+    ).one()
+    if last is None:
+        # 还没有变更记录，完整同步返回的令牌为0
+        return since == 0
+    return first - 1 <= since <= last
+
+def snapshot_token(gap_wait=10):
+    """完整读取商品的起始令牌，在读取商品之前确定"""
+    recent = datetime.now() - timedelta(seconds=gap_wait)
+    first_recent = db.session.query(func.min(ProductChange.id)).filter(ProductChange.created_at > recent).scalar()
+    if first_recent is None:
+        return db.session.query(func.max(ProductChange.id)).scalar() or 0
+    # 只需检查最近 gap_wait 秒内的记录是否有空缺
+    start = db.session.query(func.max(ProductChange.id)).filter(ProductChange.id < first_recent).scalar() or 0
+    token, _, _ = _changes(start, None, gap_wait)
+    return token
+
+def changed_products(since, max_changes=5000, gap_wait=10):
+    """进程内缓存读取 since 之后变化的商品，返回 (新令牌, 商品ID集合)
+    
+    令牌已失效或变更超过 max_changes 条时返回 None，调用方需重新完整加载。
+    """
+    if not _valid_since(since):
+        return None
+    token, product_ids, has_more = _changes(since, max_changes, gap_wait)
+    return None if has_more else (token, product_ids)
+
+def _catalog_query():
+    return select(
+        Product.id, Product.code, Product.name, Product.barcode, Product.category, Product.price,
+        Product.status, Inventory.quantity, Inventory.alert_threshold
+    ).outerjoin(Inventory, Inventory.product_id == Product.id).order_by(Product.id)
+
+def _row(row):
+    product_id, code, name, barcode, category, price, status, quantity, alert_threshold = row
+    if quantity is None:
+        # 没有库存记录，与商品列表一致
+        quantity, alert_threshold = 0, 10
+    return [product_id, code, name, barcode, category, float(price), status, quantity, alert_threshold]
+
+def _iter_catalog(batch_size):
+    result = db.session.execute(_catalog_query().execution_options(stream_results=True, yield_per=batch_size))
+    for row in result:
+        yield row
+    result.close()
+
+def _load_products(product_ids, batch_size):
+    rows = []
+    ids = sorted(product_ids)
+    for start in range(0, len(ids), batch_size):
+        rows.extend(db.session.execute(_catalog_query().where(Product.id.in_(ids[start:start + batch_size]))).all())
+    return rows
+
+def _lines(header, rows, deleted, batch_size):
+    lines = [dumps_line(header)]
+    for row in rows:
+        lines.append(dumps_line(_row(row)))
+        if len(lines) >= batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    lines.append(dumps_line({'deleted': deleted}))
+    yield '\n'.join(lines) + '\n'
+
+def sync_catalog(since, batch_size=1000, max_changes=5000, gap_wait=10):
+    """生成同步响应的 NDJSON 行
+    
+    since 为 None 时完整同步。第一行为 {"token", "full", "has_more", "fields"}，之后每行一个按 fields 排列的商品数组，
+    最后一行为 {"deleted": [商品ID, ...]}。令牌和增量数据在调用时读取，完整目录在迭代时分批读取。
+    """
+    full = not _valid_since(since)
+    if full:
+        token, has_more, deleted = snapshot_token(gap_wait), False, []
+        rows = _iter_catalog(batch_size)
+    else:
+        token, product_ids, has_more = _changes(since, max_changes, gap_wait)
+        rows = _load_products(product_ids, batch_size) if product_ids else []
+        deleted = sorted(product_ids - {row[0] for row in rows})
+    header = {'token': token, 'full': full, 'has_more': has_more, 'fields': FIELDS}
+    return _lines(header, rows, deleted, batch_size)
+
+def prune_changes(days):
+    """删除 days 天前的变更记录（始终保留最新一条），返回删除的行数
+    
+    令牌早于剩余记录的终端下次同步时下载完整目录。
+    """
+    last = db.session.query(func.max(ProductChange.id)).scalar()
+    if last is None:
+        return 0
+    deleted = ProductChange.query.filter(
+        ProductChange.created_at < datetime.now() - timedelta(days=days),
+        ProductChange.id < last
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+@event.listens_for(Session, 'after_flush')
+def _track_catalog_changes(session, flush_context):
+    product_ids = set()
+    for objects, check in ((session.new, False), (session.dirty, True), (session.deleted, False)):
+        for obj in objects:
+            if isinstance(obj, Product):
+                product_id = obj.id
+            elif isinstance(obj, Inventory):
+                product_id = obj.product_id
+            else:
+                continue
+            if check and not session.is_modified(obj, include_collections=False):
+                continue
+            product_ids.add(product_id)
+    product_ids.discard(None)
+    if product_ids:
+        track_product_changes(product_ids, session)
@@ -0,0 +1,68 @@
+"""进程内事件广播
+
+事务提交后按频道发布事件，SSE 连接订阅频道接收。每个订阅者的缓冲区有上限，
+客户端读取过慢导致积压超过上限时丢弃积压的事件并标记溢出，由连接重新发送完整快照。
+事件只在发布它的进程内广播，多进程部署时由各频道定期比对数据库状态补发快照。
+"""
+import threading
+from collections import deque
+
+class Subscription:
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.maxsize = maxsize
+        self.overflowed = False
+        self._events = deque()
+        self._condition = threading.Condition()
+    
+    def put(self, event):
+        with self._condition:
+            if len(self._events) >= self.maxsize:
+                self._events.clear()
+                self.overflowed = True
+            else:
+                self._events.append(event)
+            self._condition.notify()
+    
+    def get(self, timeout):
+        """等待最多 timeout 秒，返回 ([(事件名, 数据), ...], 是否发生过溢出)"""
+        with self._condition:
+            if not self._events and not self.overflowed:
+                self._condition.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            overflowed, self.overflowed = self.overflowed, False
+        return events, overflowed
+    
+    def close(self):
+        self.broker.unsubscribe(self)
+
+class EventBroker:
+
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+    
+    def subscribe(self, channel, maxsize=100):
+        subscription = Subscription(self, channel, maxsize)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._channels.get(subscription.channel, set()).discard(subscription)
+    
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._channels.get(channel, ()))
+    
+    def publish(self, channel, event, data):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put((event, data))
+
+broker = EventBroker()
@@ -0,0 +1,102 @@
+"""库存扣减
+
+一次查询锁定整单商品的库存行（支持的数据库上使用 SELECT ... FOR UPDATE），
+再用一条带条件的 UPDATE 扣减全部商品，避免并发收银导致超卖。
+"""
+from sqlalchemy import case, update
+from ..extensions import db
+from ..models import Product, Inventory
+from .stock_alert import track_stock_changes
+from .catalog_sync import track_product_changes
+
+def _failure(product_id, product_name, requested, available, reason):
+    return {
+        'product_id': product_id,
+        'product_name': product_name,
+        'requested': requested,
+        'available': available,
+        'reason': reason
+    }
+
+def _check(quantities, rows):
+    """比对锁定的库存行，返回无法满足的商品列表"""
+    failures = []
+    missing = [product_id for product_id in quantities if product_id not in rows]
+    if missing:
+        names = dict(db.session.query(Product.id, Product.name).filter(Product.id.in_(missing)).all())
+        for product_id in missing:
+            if product_id in names:
+                failures.append(_failure(product_id, names[product_id], quantities[product_id], 0, '库存不足'))
+            else:
+                failures.append(_failure(product_id, None, quantities[product_id], 0, '商品不存在'))
+    
+    for product_id, (product, inventory) in rows.items():
+        if inventory.quantity < quantities[product_id]:
+            failures.append(_failure(product_id, product.name, quantities[product_id],
+                                     inventory.quantity, '库存不足'))
+    return failures
+
+def load_stock_rows(product_ids):
+    """一次查询读取商品及库存行，按商品ID顺序加锁避免死锁
+
+    返回 {商品ID: (Product, Inventory)}，没有库存记录的商品不在结果中。
+    """
+    query = db.session.query(Product, Inventory).join(
+        Inventory, Inventory.product_id == Product.id
+    ).filter(
+        Product.id.in_(sorted(product_ids))
+    ).order_by(Product.id, Inventory.id).with_for_update(of=Inventory)
+    
+    rows = {}
+    for product, inventory in query:
+        # 同一商品存在多条库存记录时与原逻辑一致取第一条
+        rows.setdefault(product.id, (product, inventory))
+    return rows
+
+def deduct_stock(deductions):
+    """按 {库存ID: 数量} 用一条条件 UPDATE 扣减库存
+
+    仅当所有库存行都足够时返回 True；返回 False 时调用方需回滚事务。
+    """
+    requested = case(deductions, value=Inventory.id)
+    result = db.session.execute(
+        update(Inventory).where(
+            Inventory.id.in_(list(deductions)),
+            Inventory.quantity >= requested
+        ).values(
+            quantity=Inventory.quantity - requested
+        ).execution_options(synchronize_session=False)
+    )
+    return result.rowcount == len(deductions)
+
+def reserve_stock(quantities):
+    """按 {商品ID: 数量} 批量扣减库存
+
+    成功返回 ({商品ID: Product}, [])；失败时回滚当前事务并返回 (None, 失败项列表)。
+    """
+    rows = load_stock_rows(quantities)
+    failures = _check(quantities, rows)
+    if failures:
+        db.session.rollback()
+        return None, failures
+    
+    deductions = {inventory.id: quantities[product_id] for product_id, (_, inventory) in rows.items()}
+    if not deduct_stock(deductions):
+        # 读取后库存被其他事务扣减，重新读取以确定失败的商品
+        db.session.rollback()
+        failures = _check(quantities, load_stock_rows(quantities))
+        db.session.rollback()
+        return None, failures or [
+            _failure(product_id, product.name, quantities[product_id], None, '库存不足')
+            for product_id, (product, _) in rows.items()
+        ]
+    
+    track_stock_changes([
+        (product_id, inventory.quantity, inventory.alert_threshold,
+         inventory.quantity - quantities[product_id], inventory.alert_threshold)
+        for product_id, (_, inventory) in rows.items()
+    ])
+    track_product_changes(rows.keys())
+    for _, inventory in rows.values():
+        db.session.expire(inventory, ['quantity'])
+    return {product_id: product for product_id, (product, _) in rows.items()}, []
@@ -0,0 +1,192 @@
+"""事务提交后执行的后台任务队列
+
+业务代码在事务内调用 job_queue.enqueue 写入 outbox_jobs 表，事务提交后任务交给进程内线程池执行，
+事务回滚时任务随之丢弃。任务的处理结果与完成标记在同一事务内提交，同一任务被重复投递时只执行一次；
+执行失败后按次数延迟重试，达到 JOB_MAX_ATTEMPTS 次后标记为失败。
+进程退出时未执行完的任务保留在表中，重启后处理第一个请求时重新投递，也可执行 flask jobs-run。
+已完成的任务定期执行 flask jobs-prune 清理。
+"""
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from ..extensions import db
+from ..models import OutboxJob
+
+PENDING, DONE, FAILED = 0, 1, 2
+
+logger = logging.getLogger('app.jobs')
+
+class JobQueue:
+
+    def __init__(self):
+        self.app = None
+        self.handlers = {}
+        self.workers = 2
+        self.max_attempts = 5
+        self.retry_delay = 5
+        self._executor = None
+        self._pid = None
+        self._futures = set()
+        self._lock = threading.Lock()
+        self._recovered = False
+    
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('JOB_QUEUE_WORKERS', 2)
+        self.max_attempts = app.config.get('JOB_MAX_ATTEMPTS', 5)
+        self.retry_delay = app.config.get('JOB_RETRY_DELAY', 5)
+        self._recovered = False
+        app.before_request(self._recover_once)
+    
+    def handler(self, job_type):
+        """注册任务处理函数，处理函数接收 payload，在标记任务完成的同一事务内执行"""
+        def decorator(func):
+            self.handlers[job_type] = func
+            return func
+        return decorator
+    
+    def enqueue(self, job_type, payload):
+        """在当前事务内写入任务，提交后执行，返回任务ID"""
+        job = OutboxJob(job_type=job_type, payload=json.dumps(payload, ensure_ascii=False))
+        db.session.add(job)
+        db.session.flush()
+        db.session.info.setdefault('outbox_jobs', []).append(job.id)
+        return job.id
+    
+    def submit(self, job_id, delay=0):
+        """把任务交给线程池，delay 秒后执行"""
+        if delay:
+            timer = threading.Timer(delay, self.submit, (job_id,))
+            timer.daemon = True
+            timer.start()
+            return
+        with self._lock:
+            # fork 出的子进程不会继承父进程的线程，需要重新创建线程池
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='outbox')
+                self._pid = os.getpid()
+                self._futures = set()
+            future = self._executor.submit(self._run, job_id)
+            self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+    
+    def wait(self, timeout=None):
+        """等待已投递的任务执行完，不包括等待重试的任务"""
+        wait(list(self._futures), timeout)
+    
+    def _run(self, job_id):
+        with self.app.app_context():
+            try:
+                delay = self.process(job_id)
+            finally:
+                db.session.remove()
+        if delay is not None:
+            self.submit(job_id, delay)
+    
+    def process(self, job_id):
+        """执行一个待处理任务，返回重试前等待的秒数，不需要重试时返回 None"""
+        job = db.session.get(OutboxJob, job_id)
+        if job is None or job.status != PENDING:
+            db.session.rollback()
+            return None
+        job_type, payload, attempts = job.job_type, job.payload, job.attempts + 1
+        
+        try:
+            # 先标记完成再执行，多个线程或进程同时执行同一任务时只有一个能更新成功
+            claimed = db.session.query(OutboxJob).filter(
+                OutboxJob.id == job_id,
+                OutboxJob.status == PENDING
+            ).update({
+                OutboxJob.status: DONE,
+                OutboxJob.attempts: attempts,
+                OutboxJob.last_error: None,
+                OutboxJob.processed_at: datetime.now()
+            }, synchronize_session=False)
+            if not claimed:
+                db.session.rollback()
+                return None
+            handler = self.handlers.get(job_type)
+            if handler is None:
+                raise LookupError(f'未注册的任务类型: {job_type}')
+            handler(json.loads(payload))
+            db.session.commit()
+            return None
+        except Exception as e:
+            db.session.rollback()
+            failed = attempts >= self.max_attempts
+            logger.exception('后台任务 %s(%s) 第%d次执行失败', job_type, job_id, attempts)
+            db.session.query(OutboxJob).filter(
+                OutboxJob.id == job_id,
+                OutboxJob.status == PENDING
+            ).update({
+                OutboxJob.status: FAILED if failed else PENDING,
+                OutboxJob.attempts: attempts,
+                OutboxJob.last_error: f'{type(e).__name__}: {e}'
+            }, synchronize_session=False)
+            db.session.commit()
+            return None if failed else self.retry_delay * attempts
+    
+    def run_pending(self, retry_failed=False):
+        """在当前线程依次执行所有待处理任务，返回 (完成数, 未完成数)"""
+        if retry_failed:
+            db.session.query(OutboxJob).filter(OutboxJob.status == FAILED).update(
+                {OutboxJob.status: PENDING, OutboxJob.attempts: 0}, synchronize_session=False)
+            db.session.commit()
+        job_ids = [job_id for job_id, in db.session.query(OutboxJob.id).filter(
+            OutboxJob.status == PENDING
+        ).order_by(OutboxJob.id)]
+        db.session.rollback()
+        done = 0
+        for job_id in job_ids:
+            self.process(job_id)
+            if db.session.query(OutboxJob.status).filter(OutboxJob.id == job_id).scalar() == DONE:
+                done += 1
+            db.session.rollback()
+        return done, len(job_ids) - done
+    
+    def prune(self, days):
+        """删除 days 天前已完成的任务，返回删除的行数；失败的任务保留供排查"""
+        deleted = db.session.query(OutboxJob).filter(
+            OutboxJob.status == DONE,
+            OutboxJob.processed_at < datetime.now() - timedelta(days=days)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+    
+    def _recover_once(self):
+        """进程处理第一个请求时重新投递上次退出时未执行完的任务"""
+        if self._recovered:
+            return
+        with self._lock:
+            if self._recovered:
+                return
+            self._recovered = True
+        try:
+            job_ids = [job_id for job_id, in db.session.query(OutboxJob.id).filter(
+                OutboxJob.status == PENDING
+            ).order_by(OutboxJob.id)]
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.warning(f'读取待执行任务失败: {e}')
+            return
+        for job_id in job_ids:
+            self.submit(job_id)
+
+job_queue = JobQueue()
+
+@event.listens_for(Session, 'after_commit')
+def _submit_jobs(session):
+    for job_id in session.info.pop('outbox_jobs', ()):
+        job_queue.submit(job_id)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_jobs(session, previous_transaction):
+    # 回滚保存点时不丢弃外层事务登记的任务
+    if not previous_transaction.nested:
+        session.info.pop('outbox_jobs', None)
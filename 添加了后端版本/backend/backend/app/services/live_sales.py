@@ -0,0 +1,218 @@
+"""今日销售实时汇总
+
+进程内维护当日销售额、订单数、会员订单数和商品销售额排行，订单提交后按订单增量更新，
+并推送给 /stats/live 的订阅者。首次订阅时从订单表加载当日数据，新连接直接读取内存中的快照。
+事件只在产生它的进程内推送，多进程部署时定期重新加载并在数据变化时向所有连接补发快照。
+"""
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from ..extensions import db
+from ..models import Order, OrderItem, Product
+from ..utils.sse import sse_event, sse_comment
+from .events import broker
+
+CHANNEL = 'live_sales'
+TOP_N = 5  # 取销售额前5的商品
+
+class LiveSales:
+
+    def __init__(self):
+        self.day = None
+        self.totals = {}
+        self.products = {}     # 商品ID -> [名称, 数量, 金额]
+        self.top = []          # 销售额前 TOP_N 的商品ID
+        self.counted = set()   # 已计入的当日订单ID；并发事务可能先提交较大的ID，不能按最大ID判断
+        self.synced_at = 0
+        self._lock = threading.Lock()
+    
+    def _reload(self, day):
+        """从订单表重新加载某一天的数据，需持有锁"""
+        day_start = datetime.combine(day, datetime.min.time())
+        day_end = datetime.combine(day, datetime.max.time())
+        # 汇总和已计入的订单ID来自同一条查询，之后提交的订单不论ID大小都由增量更新计入
+        counted = set()
+        sales, member_order_count = 0.0, 0
+        products = {}
+        for order_id, member_id, actual_amount, product_id, name, quantity, amount in db.session.query(
+            Order.id, Order.member_id, Order.actual_amount,
+            OrderItem.product_id, Product.name, OrderItem.quantity, OrderItem.subtotal
+        ).join(OrderItem, OrderItem.order_id == Order.id).outerjoin(
+            Product, OrderItem.product_id == Product.id
+        ).filter(Order.created_at >= day_start, Order.created_at <= day_end):
+            if order_id not in counted:
+                counted.add(order_id)
+                sales += float(actual_amount)
+                member_order_count += 1 if member_id is not None else 0
+            entry = products.setdefault(product_id, [name or '未知商品', 0, 0.0])
+            entry[1] += quantity
+            entry[2] += float(amount)
+        
+        self.day = day
+        self.totals = {
+            'sales': sales,
+            'order_count': len(counted),
+            'product_count': sum(quantity for _, quantity, _ in products.values()),
+            'member_order_count': member_order_count
+        }
+        self.products = products
+        self.top = self._rank(products)
+        self.counted = counted
+        self.synced_at = time.monotonic()
+    
+    def _rank(self, product_ids):
+        return sorted(product_ids, key=lambda product_id: self.products[product_id][2], reverse=True)[:TOP_N]
+    
+    def _top_products(self):
+        return [{
+            'product_id': product_id,
+            'name': self.products[product_id][0],
+            'quantity': self.products[product_id][1],
+            'amount': round(self.products[product_id][2], 2)
+        } for product_id in self.top]
+    
+    def _today(self):
+        return {key: round(value, 2) if key == 'sales' else value for key, value in self.totals.items()}
+    
+    def _snapshot(self):
+        return {
+            'date': self.day.isoformat(),
+            'today': self._today(),
+            'top_products': self._top_products()
+        }
+    
+    def subscribe(self, maxsize=100):
+        """订阅实时事件，返回 (订阅, 当前快照)，快照之后的变化都会进入订阅"""
+        with self._lock:
+            today = datetime.now().date()
+            if self.day != today:
+                self._reload(today)
+            subscription = broker.subscribe(CHANNEL, maxsize)
+            return subscription, self._snapshot()
+    
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot()
+    
+    def sync(self, interval):
+        """日期变化或距上次加载超过 interval 秒时重新加载，数据有变化时向所有连接推送快照
+        
+        interval 为 0 时只在日期变化时加载。
+        """
+        with self._lock:
+            today = datetime.now().date()
+            if self.day == today and (not interval or time.monotonic() - self.synced_at < interval):
+                return
+            previous = self._snapshot() if self.day is not None else None
+            self._reload(today)
+            snapshot = self._snapshot()
+            if snapshot != previous:
+                broker.publish(CHANNEL, 'snapshot', snapshot)
+    
+    def apply(self, orders):
+        """计入已提交的订单并推送变化"""
+        with self._lock:
+            if self.day is None:
+                return
+            previous = [(product_id, self.products[product_id][2]) for product_id in self.top]
+            changed = set()
+            for order in orders:
+                if order['day'] < self.day or (order['day'] == self.day and order['id'] in self.counted):
+                    continue
+                if order['day'] > self.day:
+                    # 跨天后从零开始累计，其他进程的订单在下次加载时补齐
+                    self.day = order['day']
+                    self.totals = dict.fromkeys(self.totals, 0)
+                    self.products = {}
+                    self.top = []
+                    self.counted = set()
+                    previous = []
+                    changed = set()
+                    broker.publish(CHANNEL, 'snapshot', self._snapshot())
+                self.counted.add(order['id'])
+                self.totals['sales'] += order['amount']
+                self.totals['order_count'] += 1
+                self.totals['product_count'] += order['product_count']
+                self.totals['member_order_count'] += 1 if order['member'] else 0
+                for product_id, name, quantity, amount in order['items']:
+                    entry = self.products.setdefault(product_id, [name, 0, 0.0])
+                    entry[1] += quantity
+                    entry[2] += amount
+                    changed.add(product_id)
+                broker.publish(CHANNEL, 'order', {
+                    'id': order['id'],
+                    'order_no': order['order_no'],
+                    'amount': round(order['amount'], 2),
+                    'member': order['member'],
+                    'product_count': order['product_count'],
+                    'created_at': order['created_at'],
+                    'today': self._today()
+                })
+            if not changed:
+                return
+            
+            # 当日销售额只增不减，新的前几名只可能来自原前几名和本次售出的商品
+            self.top = self._rank(set(self.top) | changed)
+            if [(product_id, self.products[product_id][2]) for product_id in self.top] != previous:
+                broker.publish(CHANNEL, 'top_products', self._top_products())
+
+live_sales = LiveSales()
+
+def track_orders(orders, names):
+    """登记新订单的实时汇总增量，提交后生效，需在订单事务内调用
+    
+    orders 为 [(order, items), ...]，names 为 {商品ID: 商品名称}。
+    """
+    entries = []
+    for order, items in orders:
+        per_product = {}
+        for item in items:
+            quantity, amount = per_product.get(item.product_id, (0, 0.0))
+            per_product[item.product_id] = (quantity + item.quantity, amount + float(item.subtotal))
+        entries.append({
+            'id': order.id,
+            'order_no': order.order_no,
+            'day': order.created_at.date(),
+            'created_at': order.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'amount': float(order.actual_amount),
+            'member': order.member_id is not None,
+            'product_count': sum(quantity for quantity, _ in per_product.values()),
+            'items': [(product_id, names.get(product_id) or '未知商品', quantity, amount)
+                      for product_id, (quantity, amount) in per_product.items()]
+        })
+    db.session.info.setdefault('live_sales_orders', []).extend(entries)
+
+def live_stream(subscription, snapshot):
+    """SSE 事件：连接时发送 snapshot，之后推送 order（新订单及今日累计）和 top_products（排行变化）"""
+    heartbeat = current_app.config.get('SSE_HEARTBEAT', 15)
+    sync_interval = current_app.config.get('LIVE_STATS_SYNC_INTERVAL', 30)
+    try:
+        yield sse_event('snapshot', snapshot)
+        while True:
+            events, overflowed = subscription.get(heartbeat)
+            for event_name, data in events:
+                yield sse_event(event_name, data)
+            if overflowed:
+                yield sse_event('snapshot', live_sales.snapshot())
+            elif not events:
+                yield sse_comment()
+            
+            live_sales.sync(sync_interval)
+            db.session.remove()
+    finally:
+        subscription.close()
+
+@event.listens_for(Session, 'after_commit')
+def _apply_orders(session):
+    orders = session.info.pop('live_sales_orders', None)
+    if orders:
+        live_sales.apply(orders)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_orders(session, previous_transaction):
+    # 回滚保存点时不丢弃外层事务的订单
+    if not previous_transaction.nested:
+        session.info.pop('live_sales_orders', None)
@@ -0,0 +1,198 @@
+"""请求性能监控
+
+开启 METRICS_ENABLED 后记录每个接口的响应时间分布、每个请求执行的SQL语句数和SQL耗时，
+记录超过 METRICS_SLOW_QUERY_MS 的慢查询（含参数），并提供 Prometheus 文本格式的 /metrics。
+/metrics 只允许 METRICS_ALLOWED_IPS 中的地址（默认仅本机）或带 METRICS_TOKEN 的请求访问。
+关闭时不注册任何钩子，没有额外开销。指标按进程统计，多进程部署时需分别采集。
+"""
+import bisect
+import hmac
+import ipaddress
+import logging
+import threading
+import time
+from flask import g, jsonify, request, Response
+from sqlalchemy import event
+from ..extensions import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+INF_BOUND = 'le="+Inf"'
+
+slow_query_logger = logging.getLogger('app.slow_query')
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """按标签累加的计数器"""
+    
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}')
+        return lines
+
+class Histogram:
+    """按标签统计的直方图，桶上限按升序排列"""
+    
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._values = {}  # 标签 -> [各桶计数, 总和, 次数]
+        self._lock = threading.Lock()
+    
+    def observe(self, label_values, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * len(self.buckets), 0, 0]
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = f'le="{_format_number(bound)}"'
+                    lines.append(f'{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}')
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, label_values, INF_BOUND)} {count}')
+                lines.append(f'{self.name}_sum{_format_labels(self.labels, label_values)} {_format_number(total)}')
+                lines.append(f'{self.name}_count{_format_labels(self.labels, label_values)} {count}')
+        return lines
+
+class Metrics:
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_query_seconds = None
+        self.token = None
+        self.allowed_networks = []
+        self._local = threading.local()
+        self.requests = Counter(
+            'http_requests_total', '按接口和状态码统计的请求数', ('method', 'endpoint', 'status'))
+        self.latency = Histogram(
+            'http_request_duration_seconds', '接口响应时间', ('method', 'endpoint'), LATENCY_BUCKETS)
+        self.sql_count = Histogram(
+            'http_request_sql_queries', '单个请求执行的SQL语句数', ('method', 'endpoint'), QUERY_COUNT_BUCKETS)
+        self.sql_time = Histogram(
+            'http_request_sql_duration_seconds', '单个请求的SQL总耗时', ('method', 'endpoint'), LATENCY_BUCKETS)
+        self.slow_queries = Counter('db_slow_queries_total', '慢查询次数', ())
+    
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', False)
+        if not self.enabled:
+            return
+        slow_query_ms = app.config.get('METRICS_SLOW_QUERY_MS')
+        self.slow_query_seconds = slow_query_ms / 1000 if slow_query_ms is not None else None
+        self.token = app.config.get('METRICS_TOKEN') or None
+        allowed = app.config.get('METRICS_ALLOWED_IPS') or ''
+        try:
+            self.allowed_networks = [ipaddress.ip_network(item.strip(), strict=False)
+                                     for item in allowed.split(',') if item.strip()]
+        except ValueError:
+            raise RuntimeError(f'METRICS_ALLOWED_IPS 格式错误: {allowed}')
+        
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', self.render_response)
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+            event.listen(db.engine, 'handle_error', self._handle_error)
+    
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        self._local.sql_count = 0
+        self._local.sql_time = 0.0
+        self._local.active = True
+    
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        self._local.active = False
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        labels = (request.method, endpoint)
+        self.requests.inc(labels + (str(response.status_code),))
+        self.latency.observe(labels, elapsed)
+        self.sql_count.observe(labels, self._local.sql_count)
+        self.sql_time.observe(labels, self._local.sql_time)
+        response.headers['Server-Timing'] = (
+            f'db;dur={self._local.sql_time * 1000:.1f};desc="{self._local.sql_count} queries", '
+            f'total;dur={elapsed * 1000:.1f}'
+        )
+        return response
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+    
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_query_start'].pop()
+        if getattr(self._local, 'active', False):
+            self._local.sql_count += 1
+            self._local.sql_time += elapsed
+        if self.slow_query_seconds is not None and elapsed >= self.slow_query_seconds:
+            self.slow_queries.inc(())
+            slow_query_logger.warning('慢查询 %.1fms: %s 参数: %r', elapsed * 1000, statement, parameters)
+    
+    def _handle_error(self, exception_context):
+        # 执行失败时不会触发 after_cursor_execute，丢弃对应的开始时间
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('metrics_query_start'):
+            connection.info['metrics_query_start'].pop()
+    
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.latency, self.sql_count, self.sql_time, self.slow_queries):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+    
+    def _authorized(self):
+        """请求来自允许的地址，或带有正确的 Bearer 令牌"""
+        if self.token:
+            header = request.headers.get('Authorization', '')
+            if hmac.compare_digest(header.encode(), f'Bearer {self.token}'.encode()):
+                return True
+        try:
+            address = ipaddress.ip_address(request.remote_addr or '')
+        except ValueError:
+            return False
+        return any(address in network for network in self.allowed_networks)
+    
+    def render_response(self):
+        if not self._authorized():
+            return jsonify({'code': 403, 'message': '无权访问性能指标'}), 403
+        return Response(self.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+metrics = Metrics()
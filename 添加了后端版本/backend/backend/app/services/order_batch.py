@@ -0,0 +1,277 @@
+"""离线收银订单批量导入
+
+按客户端生成的幂等键去重，分块在独立事务中校验并批量写入订单，
+每个订单单独返回处理结果，重复上传同一批数据是安全的。
+"""
+import uuid
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from ..extensions import db
+from ..models import Order, OrderItem, OrderRequest, Member
+from .inventory import load_stock_rows, deduct_stock
+from .rollup import record_orders
+from .shift import record_shift_orders
+from .order_jobs import enqueue_orders
+from .stock_alert import track_stock_changes
+from .catalog_sync import track_product_changes
+from .live_sales import track_orders
+
+def _result(index, key, status, order=None, message=None, **extra):
+    result = {
+        'index': index,
+        'idempotency_key': key,
+        'status': status,
+        'order_id': order.id if order else None,
+        'order_no': order.order_no if order else None
+    }
+    if message:
+        result['message'] = message
+    result.update(extra)
+    return result
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _parse(order_data):
+    """校验单个订单的结构和字段类型，返回 (created_at, items) 或错误信息"""
+    items = order_data.get('items') or []
+    if not items:
+        return None, '订单项不能为空'
+    if not isinstance(items, list):
+        return None, '订单项格式错误'
+    for item_data in items:
+        if not isinstance(item_data, dict):
+            return None, '订单项格式错误'
+        if not item_data.get('product_id') or not item_data.get('quantity') or not item_data.get('price'):
+            return None, '订单项数据不完整'
+        if not _is_int(item_data['product_id']) or not _is_int(item_data['quantity']) \
+                or not _is_number(item_data['price']):
+            return None, '订单项的商品ID、数量须为整数，单价须为数字'
+        if item_data['quantity'] <= 0 or item_data['price'] <= 0:
+            return None, '订单项的数量和单价须大于0'
+    
+    member_id = order_data.get('member_id')
+    if member_id is not None and not _is_int(member_id):
+        return None, '会员ID须为整数'
+    payment_method = order_data.get('payment_method')
+    if payment_method is not None and not isinstance(payment_method, str):
+        return None, '支付方式格式错误'
+    
+    created_at = order_data.get('created_at')
+    if created_at:
+        if not isinstance(created_at, str):
+            return None, '下单时间格式错误'
+        try:
+            created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            return None, '下单时间格式错误'
+    else:
+        created_at = datetime.now()
+    return (created_at, items), None
+
+def _import_chunk(user_id, chunk, retry=True):
+    """在一个事务内导入一块订单，chunk 为 [(index, key, order_data), ...]
+    
+    返回 ({序号: 结果}, 新订单涉及的日期集合, 扣减了库存的商品ID集合)。
+    """
+    results = {}
+    
+    # 已上传过的幂等键直接返回原订单
+    keys = [key for _, key, _ in chunk]
+    existing = dict(db.session.query(OrderRequest.idempotency_key, Order).join(
+        Order, OrderRequest.order_id == Order.id
+    ).filter(OrderRequest.idempotency_key.in_(keys)).all())
+    
+    pending = []
+    for index, key, order_data in chunk:
+        if key in existing:
+            results[index] = _result(index, key, 'duplicate', existing[key])
+            continue
+        parsed, error = _parse(order_data)
+        if error:
+            results[index] = _result(index, key, 'failed', message=error)
+            continue
+        pending.append((index, key, order_data, parsed))
+    
+    if not pending:
+        return results, set(), set()
+    
+    # 一次读取本块涉及的会员、商品和库存
+    member_ids = {order_data.get('member_id') for _, _, order_data, _ in pending if order_data.get('member_id')}
+    members = {member.id: member for member in Member.query.filter(Member.id.in_(member_ids))} if member_ids else {}
+    product_ids = {item['product_id'] for _, _, _, (_, items) in pending for item in items}
+    stock_rows = load_stock_rows(product_ids)
+    available = {product_id: inventory.quantity for product_id, (_, inventory) in stock_rows.items()}
+    
+    accepted = []
+    for index, key, order_data, (created_at, items) in pending:
+        member_id = order_data.get('member_id')
+        member = members.get(member_id) if member_id else None
+        if member_id and not member:
+            results[index] = _result(index, key, 'failed', message='会员不存在')
+            continue
+        if member and (member.expire_date < created_at.date() or member.status == 0):
+            results[index] = _result(index, key, 'failed', message='会员卡已过期或无效')
+            continue
+        
+        quantities = {}
+        for item_data in items:
+            quantities[item_data['product_id']] = quantities.get(item_data['product_id'], 0) + item_data['quantity']
+        failed_items = []
+        for product_id, quantity in quantities.items():
+            if product_id not in stock_rows:
+                failed_items.append({'product_id': product_id, 'requested': quantity, 'available': 0,
+                                     'reason': '商品不存在或无库存记录'})
+            elif available[product_id] < quantity:
+                failed_items.append({'product_id': product_id, 'requested': quantity,
+                                     'available': available[product_id], 'reason': '库存不足'})
+        if failed_items:
+            results[index] = _result(index, key, 'failed', message='库存不足', failed_items=failed_items)
+            continue
+        
+        for product_id, quantity in quantities.items():
+            available[product_id] -= quantity
+        accepted.append((index, key, order_data, created_at, items, member))
+    
+    if not accepted:
+        db.session.rollback()
+        return results, set(), set()
+    
+    # 批量写入订单
+    orders = []
+    member_amounts = {}
+    for index, key, order_data, created_at, items, member in accepted:
+        total_amount = sum(float(item['price']) * item['quantity'] for item in items)
+        discount_amount = total_amount * 0.05 if member else 0  # 会员95折
+        actual_amount = total_amount - discount_amount
+        if member:
+            member_amounts[member.id] = member_amounts.get(member.id, 0) + actual_amount
+        orders.append(Order(
+            order_no=f"SO{created_at.strftime('%Y%m%d')}{str(uuid.uuid4().int)[:12]}",
+            user_id=user_id,
+            member_id=member.id if member else None,
+            total_amount=total_amount,
+            discount_amount=discount_amount,
+            actual_amount=actual_amount,
+            payment_method=order_data.get('payment_method', '现金'),
+            status='completed',
+            created_at=created_at
+        ))
+    db.session.add_all(orders)
+    db.session.flush()
+    
+    # 幂等键的查询未加锁，同一幂等键的并发上传会在这里触发唯一约束
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(OrderRequest), [{
+                'idempotency_key': key,
+                'order_id': order.id
+            } for order, (_, key, _, _, _, _) in zip(orders, accepted)])
+    except IntegrityError:
+        # 另一请求已提交这些幂等键：放弃本块写入，重新处理时按已有订单返回 duplicate
+        db.session.rollback()
+        if not retry:
+            raise
+        return _import_chunk(user_id, chunk, retry=False)
+    
+    order_items = []
+    rollup_input = []
+    for order, (_, _, _, _, items, _) in zip(orders, accepted):
+        rows = [OrderItem(
+            order_id=order.id,
+            product_id=item['product_id'],
+            quantity=item['quantity'],
+            price=item['price'],
+            subtotal=float(item['price']) * item['quantity']
+        ) for item in items]
+        order_items.extend(rows)
+        rollup_input.append((order, rows))
+    
+    db.session.execute(insert(OrderItem), [{
+        'order_id': item.order_id,
+        'product_id': item.product_id,
+        'quantity': item.quantity,
+        'price': item.price,
+        'subtotal': item.subtotal
+    } for item in order_items])
+    
+    # 扣减库存
+    deductions = {}
+    sold_products = set()
+    for product_id, (_, inventory) in stock_rows.items():
+        consumed = inventory.quantity - available[product_id]
+        if consumed:
+            deductions[inventory.id] = consumed
+            sold_products.add(product_id)
+    if not deduct_stock(deductions):
+        db.session.rollback()
+        for index, key, _, _, _, _ in accepted:
+            results[index] = _result(index, key, 'failed', message='库存被并发修改，请重新上传')
+        return results, set(), set()
+    
+    track_stock_changes([
+        (product_id, inventory.quantity, inventory.alert_threshold, available[product_id], inventory.alert_threshold)
+        for product_id, (_, inventory) in stock_rows.items() if product_id in sold_products
+    ])
+    track_product_changes(sold_products)
+    for member_id, amount in member_amounts.items():
+        Member.query.filter_by(id=member_id).update(
+            {Member.total_amount: Member.total_amount + amount},
+            synchronize_session=False
+        )
+    
+    record_orders(rollup_input)
+    record_shift_orders(user_id, orders)
+    track_orders(rollup_input, {product_id: product.name for product_id, (product, _) in stock_rows.items()})
+    enqueue_orders(orders)
+    
+    # 提交前生成结果，避免提交后逐个刷新订单对象
+    for order, (index, key, _, _, _, _) in zip(orders, accepted):
+        results[index] = _result(index, key, 'created', order)
+    days = {order.created_at.date() for order in orders}
+    db.session.commit()
+    return results, days, sold_products
+
+def import_orders(user_id, orders_data, chunk_size=100):
+    """批量导入订单，返回 (按提交顺序排列的处理结果, 涉及的日期集合, 扣减了库存的商品ID集合)"""
+    results = {}
+    days = set()
+    product_ids = set()
+    seen = {}
+    chunk = []
+    
+    def flush():
+        chunk_results, chunk_days, chunk_products = _import_chunk(user_id, chunk)
+        results.update(chunk_results)
+        days.update(chunk_days)
+        product_ids.update(chunk_products)
+        chunk.clear()
+    
+    for index, order_data in enumerate(orders_data):
+        key = str(order_data.get('idempotency_key') or '').strip()
+        if not key:
+            results[index] = _result(index, None, 'failed', message='缺少幂等键')
+            continue
+        if key in seen:
+            # 同一批次内重复的订单在前一条处理完成后再回填结果
+            continue
+        seen[key] = index
+        chunk.append((index, key, order_data))
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    
+    for index, order_data in enumerate(orders_data):
+        if index in results:
+            continue
+        key = str(order_data.get('idempotency_key')).strip()
+        first = results[seen[key]]
+        status = 'duplicate' if first['status'] in ('created', 'duplicate') else 'failed'
+        results[index] = dict(first, index=index, status=status)
+    
+    return [results[index] for index in range(len(orders_data))], days, product_ids
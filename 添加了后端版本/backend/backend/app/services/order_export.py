@@ -0,0 +1,105 @@
+"""订单明细导出
+
+一次联表查询订单、订单项、收银员、会员和商品，使用服务端游标按批读取，
+逐行生成 CSV 或 NDJSON，内存占用与导出范围无关。
+"""
+import csv
+import io
+from datetime import datetime
+from sqlalchemy import select
+from ..extensions import db
+from ..models import Order, OrderItem, Product, Member, User
+from ..utils.json_provider import dumps_line
+
+# (列名, 表头)
+EXPORT_COLUMNS = [
+    ('order_id', '订单ID'),
+    ('order_no', '订单号'),
+    ('created_at', '下单时间'),
+    ('user_name', '收银员'),
+    ('member_card_no', '会员卡号'),
+    ('member_name', '会员姓名'),
+    ('payment_method', '支付方式'),
+    ('status', '订单状态'),
+    ('total_amount', '订单金额'),
+    ('discount_amount', '优惠金额'),
+    ('actual_amount', '实付金额'),
+    ('item_id', '订单项ID'),
+    ('product_id', '商品ID'),
+    ('product_code', '商品编号'),
+    ('product_name', '商品名称'),
+    ('quantity', '数量'),
+    ('price', '单价'),
+    ('subtotal', '小计'),
+]
+
+def iter_order_rows(start=None, end=None, batch_size=1000):
+    """按下单时间顺序逐行返回订单明细，每个订单项一行"""
+    stmt = select(
+        Order.id.label('order_id'),
+        Order.order_no,
+        Order.created_at,
+        User.name.label('user_name'),
+        Member.card_no.label('member_card_no'),
+        Member.name.label('member_name'),
+        Order.payment_method,
+        Order.status,
+        Order.total_amount,
+        Order.discount_amount,
+        Order.actual_amount,
+        OrderItem.id.label('item_id'),
+        OrderItem.product_id,
+        Product.code.label('product_code'),
+        Product.name.label('product_name'),
+        OrderItem.quantity,
+        OrderItem.price,
+        OrderItem.subtotal
+    ).select_from(Order).outerjoin(
+        OrderItem, OrderItem.order_id == Order.id
+    ).outerjoin(
+        Product, OrderItem.product_id == Product.id
+    ).outerjoin(
+        User, Order.user_id == User.id
+    ).outerjoin(
+        Member, Order.member_id == Member.id
+    )
+    if start:
+        stmt = stmt.where(Order.created_at >= start)
+    if end:
+        stmt = stmt.where(Order.created_at <= end)
+    stmt = stmt.order_by(Order.created_at, Order.id, OrderItem.id)
+    
+    result = db.session.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+    for row in result:
+        yield row._mapping
+    result.close()
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(' ', 'seconds')
+    return value
+
+def csv_lines(rows, chunk_rows=500):
+    """生成带 BOM 的 CSV，便于 Excel 直接打开；每 chunk_rows 行输出一次"""
+    buffer = io.StringIO()
+    buffer.write('\ufeff')
+    writer = csv.writer(buffer)
+    writer.writerow([title for _, title in EXPORT_COLUMNS])
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_value(row[name]) for name, _ in EXPORT_COLUMNS])
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def ndjson_lines(rows, chunk_rows=500):
+    """每行一个 JSON 对象；每 chunk_rows 行输出一次"""
+    lines = []
+    for row in rows:
+        lines.append(dumps_line({name: _value(row[name]) for name, _ in EXPORT_COLUMNS}))
+        if len(lines) >= chunk_rows:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
@@ -0,0 +1,58 @@
+"""订单提交后的后台任务：会员积分和等级
+
+下单接口只在事务内登记任务，积分累计和等级重算在后台线程执行，不占用收银响应时间。
+"""
+from collections import defaultdict
+from flask import current_app
+from ..extensions import db
+from ..models import Member
+from .jobs import job_queue
+
+# 按累计消费金额从高到低匹配会员等级
+MEMBER_LEVELS = [
+    (20000, '钻石会员'),
+    (5000, '金卡会员'),
+    (1000, '银卡会员'),
+    (0, '普通会员'),
+]
+
+def member_level(total_amount):
+    for threshold, level in MEMBER_LEVELS:
+        if total_amount >= threshold:
+            return level
+    return MEMBER_LEVELS[-1][1]
+
+def enqueue_orders(orders):
+    """登记新订单的后台任务，需在订单事务的其他写入完成后、提交前调用
+    
+    任务只处理会员积分和等级，没有会员订单时不登记。
+    """
+    member_orders = [{
+        'id': order.id,
+        'member_id': order.member_id,
+        'amount': float(order.actual_amount)
+    } for order in orders if order.member_id]
+    if member_orders:
+        job_queue.enqueue('orders_created', {'orders': member_orders})
+
+@job_queue.handler('orders_created')
+def process_orders(payload):
+    points_per_yuan = current_app.config.get('MEMBER_POINTS_PER_YUAN', 1)
+    points = defaultdict(int)
+    for order in payload['orders']:
+        if order['member_id']:
+            points[order['member_id']] += int(order['amount'] * points_per_yuan)
+    
+    if points:
+        # 积分原子累加，等级按下单时已更新的累计消费金额重算
+        for member_id, earned in points.items():
+            if earned:
+                Member.query.filter_by(id=member_id).update(
+                    {Member.points: Member.points + earned},
+                    synchronize_session=False
+                )
+        rows = db.session.query(Member.id, Member.total_amount, Member.level).filter(Member.id.in_(list(points)))
+        for member_id, total_amount, level in rows.all():
+            new_level = member_level(float(total_amount))
+            if new_level != level:
+                Member.query.filter_by(id=member_id).update({Member.level: new_level}, synchronize_session=False)
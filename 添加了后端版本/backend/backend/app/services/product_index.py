@@ -0,0 +1,127 @@
+"""扫码商品索引
+
+进程内按条形码和商品编号建立哈希索引，扫码接口直接查内存，不访问数据库。
+启动时预热；本进程的商品或库存变更提交后调用 refresh 重新读取对应商品，
+其他进程的变更在查找时每隔 sync_interval 秒按 product_changes 变更记录增量读取。
+"""
+import threading
+import time
+from ..extensions import db
+from ..models import Product, Inventory
+from .catalog_sync import changed_products, snapshot_token
+
+class ProductIndex:
+
+    def __init__(self):
+        self._keys = {}      # 条形码/商品编号 -> 商品ID
+        self._entries = {}   # 商品ID -> 商品数据
+        self._lock = threading.Lock()
+        self.warmed = False
+        self.token = None    # 已读取到的商品变更记录ID
+        self.synced_at = 0
+        self.sync_interval = 30
+        self.gap_wait = 10
+    
+    def init_app(self, app):
+        self.sync_interval = app.config.get('PRODUCT_INDEX_SYNC_INTERVAL', 30)
+        self.gap_wait = app.config.get('CATALOG_SYNC_GAP_WAIT', 10)
+        self._keys = {}
+        self._entries = {}
+        self.warmed = False
+        self.token = None
+    
+    def _query(self):
+        # 同一商品有多条库存记录时取ID最小的一条
+        return db.session.query(
+            Product.id, Product.code, Product.name, Product.barcode,
+            Product.price, Product.status, Inventory.quantity
+        ).outerjoin(Inventory, Inventory.product_id == Product.id).order_by(Product.id, Inventory.id)
+    
+    def _remove(self, product_id):
+        old = self._entries.pop(product_id, None)
+        if old:
+            for key in (old['code'], old['barcode']):
+                if key and self._keys.get(key) == product_id:
+                    del self._keys[key]
+    
+    def _put(self, row):
+        product_id, code, name, barcode, price, status, quantity = row
+        self._remove(product_id)
+        # 条目发布后不再修改，读取方无需加锁
+        self._entries[product_id] = {
+            'id': product_id,
+            'code': code,
+            'name': name,
+            'barcode': barcode,
+            'price': float(price),
+            'status': status,
+            'inventory': {
+                'quantity': quantity or 0
+            }
+        }
+        self._keys[code] = product_id
+        if barcode:
+            self._keys[barcode] = product_id
+    
+    def _put_rows(self, rows):
+        """写入查询结果，返回写入的商品ID集合"""
+        seen = set()
+        for row in rows:
+            if row[0] not in seen:
+                seen.add(row[0])
+                self._put(row)
+        return seen
+    
+    def warm(self):
+        """从数据库全量加载索引"""
+        token = snapshot_token(self.gap_wait)
+        rows = self._query().all()
+        with self._lock:
+            self._keys = {}
+            self._entries = {}
+            self._put_rows(rows)
+            self.token = token
+            self.synced_at = time.monotonic()
+            self.warmed = True
+    
+    def refresh(self, product_ids):
+        """重新读取指定商品，需在相关事务提交后调用"""
+        product_ids = set(product_ids)
+        if not product_ids or not self.warmed:
+            return
+        rows = self._query().filter(Product.id.in_(product_ids)).all()
+        with self._lock:
+            found = self._put_rows(rows)
+            # 已删除的商品
+            for product_id in product_ids - found:
+                self._remove(product_id)
+    
+    def sync(self):
+        """距上次检查超过 sync_interval 秒时读取其他进程的商品和库存变更，0 表示不检查"""
+        if not self.sync_interval or time.monotonic() - self.synced_at < self.sync_interval:
+            return
+        self.synced_at = time.monotonic()
+        changes = changed_products(self.token, gap_wait=self.gap_wait)
+        if changes is None:
+            # 变更记录已清理或变化太多
+            self.warm()
+            return
+        token, product_ids = changes
+        self.refresh(product_ids)
+        self.token = token
+    
+    def lookup(self, key):
+        """按条形码或商品编号查找，未找到返回None"""
+        if not self.warmed:
+            self.warm()
+        else:
+            self.sync()
+        product_id = self._keys.get(key)
+        if product_id is None:
+            return None
+        return self._entries.get(product_id)
+    
+    def __len__(self):
+        return len(self._entries)
+
+product_index = ProductIndex()
@@ -0,0 +1,140 @@
+"""商品销售排行
+
+按统计周期（日/周/月）在进程内维护各商品的销量和销售额，并为销量、销售额各保存一个有序索引，
+排行接口直接截取前 K 项，耗时与订单明细数无关。周期首次查询时从 product_sales_daily 加载，
+之后随订单提交增量更新；进行中的周期定期重新加载以计入其他进程的订单。
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from ..extensions import db
+from ..models import Order, ProductSalesDaily
+
+SORT_KEYS = ('amount', 'quantity')
+
+class PeriodRanking:
+    """一个统计周期内的商品计数和有序索引"""
+    
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.counters = {}  # 商品ID -> [销量, 销售额]
+        self.index = {key: [] for key in SORT_KEYS}  # 排序键 -> [(-值, 商品ID), ...] 升序
+        self.last_order_id = 0  # 加载时已计入的最大订单ID，之后的订单由增量更新计入
+        self.loaded_at = 0
+    
+    def load(self, rows, last_order_id):
+        self.counters = {product_id: [int(quantity), float(amount)] for product_id, quantity, amount in rows}
+        self.index = {
+            'quantity': sorted((-quantity, product_id) for product_id, (quantity, _) in self.counters.items()),
+            'amount': sorted((-amount, product_id) for product_id, (_, amount) in self.counters.items())
+        }
+        self.last_order_id = last_order_id
+        self.loaded_at = time.monotonic()
+    
+    def _remove(self, key, value, product_id):
+        entries = self.index[key]
+        del entries[bisect_left(entries, (-value, product_id))]
+    
+    def add(self, product_id, quantity, amount):
+        counter = self.counters.get(product_id)
+        if counter is None:
+            counter = self.counters[product_id] = [0, 0.0]
+        else:
+            self._remove('quantity', counter[0], product_id)
+            self._remove('amount', counter[1], product_id)
+        counter[0] += quantity
+        counter[1] += amount
+        insort(self.index['quantity'], (-counter[0], product_id))
+        insort(self.index['amount'], (-counter[1], product_id))
+    
+    def top(self, sort, limit):
+        """前 limit 名 [(商品ID, 销量, 销售额), ...]"""
+        return [(product_id, *self.counters[product_id]) for _, product_id in self.index[sort][:limit]]
+
+class ProductRanking:
+
+    def __init__(self):
+        self._periods = OrderedDict()  # (开始日期, 结束日期) -> PeriodRanking
+        self._lock = threading.Lock()
+    
+    def _load(self, period):
+        """从商品日汇总加载周期数据，需持有锁"""
+        rows = db.session.query(
+            ProductSalesDaily.product_id,
+            func.sum(ProductSalesDaily.quantity),
+            func.sum(ProductSalesDaily.amount)
+        ).filter(
+            ProductSalesDaily.date >= period.start,
+            ProductSalesDaily.date <= period.end
+        ).group_by(ProductSalesDaily.product_id).all()
+        # 在汇总之后读取订单ID上界：两次查询之间提交的订单会被跳过，下次重新加载时补齐，不会重复计入
+        last_order_id = db.session.query(func.max(Order.id)).scalar() or 0
+        period.load(rows, last_order_id)
+    
+    def top(self, start, end, sort='amount', limit=10, max_periods=64, sync_interval=30):
+        """start~end（日期，含两端）内按 sort 倒序的前 limit 名商品 [(商品ID, 销量, 销售额), ...]
+        
+        进行中的周期距上次加载超过 sync_interval 秒时重新加载，0 表示不重新加载。
+        """
+        with self._lock:
+            key = (start, end)
+            period = self._periods.get(key)
+            if period is None:
+                period = PeriodRanking(start, end)
+                self._load(period)
+                self._periods[key] = period
+                while len(self._periods) > max_periods:
+                    self._periods.popitem(last=False)
+            elif sync_interval and end >= datetime.now().date() \
+                    and time.monotonic() - period.loaded_at >= sync_interval:
+                self._load(period)
+            self._periods.move_to_end(key)
+            return period.top(sort, limit)
+    
+    def apply(self, orders):
+        """计入已提交的订单，orders 为 [(订单ID, 日期, [(商品ID, 数量, 金额), ...]), ...]"""
+        with self._lock:
+            for period in self._periods.values():
+                for order_id, day, items in orders:
+                    if order_id <= period.last_order_id or not period.start <= day <= period.end:
+                        continue
+                    for product_id, quantity, amount in items:
+                        period.add(product_id, quantity, amount)
+    
+    def clear(self):
+        with self._lock:
+            self._periods.clear()
+
+product_ranking = ProductRanking()
+
+def track_sales(orders):
+    """登记新订单的排行增量，提交后生效，需在订单事务内调用
+    
+    orders 为 [(order, items), ...]。
+    """
+    entries = []
+    for order, items in orders:
+        per_product = {}
+        for item in items:
+            quantity, amount = per_product.get(item.product_id, (0, 0.0))
+            per_product[item.product_id] = (quantity + item.quantity, amount + float(item.subtotal))
+        entries.append((order.id, order.created_at.date(),
+                        [(product_id, quantity, amount) for product_id, (quantity, amount) in per_product.items()]))
+    db.session.info.setdefault('product_ranking_orders', []).extend(entries)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_sales(session):
+    orders = session.info.pop('product_ranking_orders', None)
+    if orders:
+        product_ranking.apply(orders)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_sales(session, previous_transaction):
+    # 回滚保存点时不丢弃外层事务的订单
+    if not previous_transaction.nested:
+        session.info.pop('product_ranking_orders', None)
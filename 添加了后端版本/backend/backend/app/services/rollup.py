@@ -0,0 +1,154 @@
+"""销售汇总表维护
+
+订单写入时在同一事务内增量更新 sales_hourly / product_sales_daily，
+统计接口直接读取汇总行，响应时间与订单量无关。
+"""
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import func, literal_column
+from sqlalchemy.exc import IntegrityError
+from ..extensions import db
+from ..models import Order, OrderItem, SalesHourly, ProductSalesDaily
+from .product_ranking import track_sales
+
+def _increment(model, keys, values):
+    """对汇总行做原子累加，行不存在时插入"""
+    table = model.__table__
+    where = [table.c[k] == v for k, v in keys.items()]
+    increments = {table.c[k]: table.c[k] + v for k, v in values.items()}
+    
+    result = db.session.execute(table.update().where(*where).values(increments))
+    if result.rowcount:
+        return
+    
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values(**keys, **values))
+    except IntegrityError:
+        # 并发事务已插入该行，改为累加
+        db.session.execute(table.update().where(*where).values(increments))
+
+def record_order(order, items):
+    """将一笔订单计入汇总表，需在订单提交前调用"""
+    record_orders([(order, items)])
+
+def record_orders(orders):
+    """将多笔订单 [(order, items), ...] 合并后计入汇总表，需在订单提交前调用"""
+    per_hour = defaultdict(lambda: [0, 0, 0, 0.0])
+    per_product = defaultdict(lambda: [0, 0.0])
+    for order, items in orders:
+        hour = order.created_at.replace(minute=0, second=0, microsecond=0)
+        bucket = per_hour[hour]
+        bucket[0] += 1
+        bucket[1] += 1 if order.member_id is not None else 0
+        bucket[2] += sum(item.quantity for item in items)
+        bucket[3] += float(order.actual_amount)
+        
+        day = order.created_at.date()
+        for item in items:
+            per_product[(day, item.product_id)][0] += item.quantity
+            per_product[(day, item.product_id)][1] += float(item.subtotal)
+    
+    for hour, (count, member_count, product_count, amount) in per_hour.items():
+        _increment(SalesHourly, {'hour': hour}, {
+            'order_count': count,
+            'member_order_count': member_count,
+            'product_count': product_count,
+            'amount': amount
+        })
+    
+    for (day, product_id), (quantity, amount) in per_product.items():
+        _increment(ProductSalesDaily, {'date': day, 'product_id': product_id}, {
+            'quantity': quantity,
+            'amount': amount
+        })
+    # 进程内商品排行在提交后按同样的增量更新
+    track_sales(orders)
+
+def _hour_key(column):
+    """按小时取整的分组表达式，SQLite/MySQL 返回字符串，PostgreSQL 返回时间"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        return func.strftime('%Y-%m-%d %H:00:00', column)
+    if dialect in ('mysql', 'mariadb'):
+        return func.date_format(column, '%Y-%m-%d %H:00:00')
+    if dialect == 'postgresql':
+        # 字面量参数，使 SELECT 与 GROUP BY 中的表达式一致
+        return func.date_trunc(literal_column("'hour'"), column)
+    raise RuntimeError(f'汇总表重建不支持 {dialect} 数据库')
+
+def _hour_value(key):
+    if isinstance(key, datetime):
+        return key
+    return datetime.strptime(key, '%Y-%m-%d %H:00:00')
+
+def rebuild_rollups(start=None, end=None):
+    """根据原始订单重建汇总表
+    
+    start/end 为 datetime，按整天处理；均为空时重建全部数据。
+    """
+    if start is not None:
+        start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    if end is not None:
+        end = end.replace(hour=23, minute=59, second=59, microsecond=999999)
+    
+    def in_range(query, column):
+        if start is not None:
+            query = query.filter(column >= start)
+        if end is not None:
+            query = query.filter(column <= end)
+        return query
+    
+    in_range(SalesHourly.query, SalesHourly.hour).delete(synchronize_session=False)
+    daily = ProductSalesDaily.query
+    if start is not None:
+        daily = daily.filter(ProductSalesDaily.date >= start.date())
+    if end is not None:
+        daily = daily.filter(ProductSalesDaily.date <= end.date())
+    daily.delete(synchronize_session=False)
+    
+    # 订单级汇总：按小时分组
+    hour_key = _hour_key(Order.created_at)
+    order_rows = in_range(db.session.query(
+        hour_key,
+        func.count(Order.id),
+        func.count(Order.member_id),
+        func.coalesce(func.sum(Order.actual_amount), 0)
+    ), Order.created_at).group_by(hour_key).all()
+    
+    item_rows = in_range(db.session.query(
+        hour_key,
+        func.coalesce(func.sum(OrderItem.quantity), 0)
+    ).join(Order, OrderItem.order_id == Order.id), Order.created_at).group_by(hour_key).all()
+    product_counts = {key: int(quantity) for key, quantity in item_rows}
+    
+    if order_rows:
+        db.session.execute(SalesHourly.__table__.insert(), [{
+            'hour': _hour_value(key),
+            'order_count': count,
+            'member_order_count': member_count,
+            'product_count': product_counts.get(key, 0),
+            'amount': float(amount)
+        } for key, count, member_count, amount in order_rows])
+    
+    # 商品级汇总：按天、商品分组
+    day_key = func.date(Order.created_at)
+    product_rows = in_range(db.session.query(
+        day_key,
+        OrderItem.product_id,
+        func.sum(OrderItem.quantity),
+        func.sum(OrderItem.subtotal)
+    ).join(Order, OrderItem.order_id == Order.id), Order.created_at).group_by(
+        day_key, OrderItem.product_id
+    ).all()
+    
+    if product_rows:
+        db.session.execute(ProductSalesDaily.__table__.insert(), [{
+            'date': datetime.strptime(str(day)[:10], '%Y-%m-%d').date(),
+            'product_id': product_id,
+            'quantity': int(quantity),
+            'amount': float(amount)
+        } for day, product_id, quantity, amount in product_rows])
+    
+    db.session.commit()
+    return len(order_rows), len(product_rows)
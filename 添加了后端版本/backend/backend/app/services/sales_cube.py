@@ -0,0 +1,450 @@
+"""订单明细列式统计
+
+把订单明细连同下单日期、时段、收银员、是否会员订单整理为 NumPy 列数组，保存为磁盘上的内存映射文件，
+进程重启后直接映射，每次查询前只追加上次之后新增的明细。/stats/query 在列数组上做向量化分组求和，
+不访问订单表。商品分类在查询时按商品ID映射，商品修改分类后立即生效。
+订单明细只增不改，直接修改数据库中的历史订单后需执行 flask sales-cube-build --rebuild。
+自增ID在插入时分配、提交后才可见，并发事务可能先提交较大的ID。追加时跳过的ID记为空缺，
+之后每次刷新重新读取空缺内的明细，gap_wait 秒后仍未出现的空缺视为回滚留下的空号不再检查。
+需要安装 numpy，未安装时 /stats/query 不可用，其他统计接口不受影响。
+"""
+import os
+import json
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from sqlalchemy import Integer, case, cast, extract, func, literal_column, or_, select
+from ..extensions import db
+from ..models import Order, OrderItem, Product, User
+from .cache import LRUCache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 上没有文件锁，多个进程需配置不同的 SALES_CUBE_DIR
+    fcntl = None
+
+EPOCH = date(1970, 1, 1)
+WEEKDAY_OFFSET = EPOCH.weekday()  # 1970-01-01 是星期四
+
+# 列名 -> 类型，按订单明细ID顺序追加；时段、星期在追加时算好，查询时不再换算
+COLUMNS = {
+    'day': 'int32',       # 下单日期，1970-01-01 起的天数（按本地时间）
+    'hour': 'int8',       # 下单时段 0-23
+    'weekday': 'int8',    # 星期，0 为星期一
+    'order': 'int32',     # 订单ID，同一订单的明细相邻
+    'first': 'int8',      # 是否为所属订单的第一条明细，用于统计订单数
+    'product': 'int32',
+    'cashier': 'int32',
+    'member': 'int8',     # 是否会员订单
+    'quantity': 'int32',
+    'amount': 'float64',  # 实收金额，会员折扣按金额比例分摊到明细
+}
+DIMENSIONS = ('hour', 'day', 'weekday', 'category', 'cashier', 'member')
+MEASURES = ('amount', 'quantity', 'items', 'orders')
+ORDER_DIMENSIONS = {'hour', 'day', 'weekday', 'cashier', 'member'}  # 同一订单的明细取值相同的维度
+DENSE_LIMIT = 1 << 22  # 分组组合数不超过该值时直接按组合编号计数，否则先去重
+MIN_CAPACITY = 1 << 16
+
+class SalesCube:
+
+    def __init__(self):
+        self.directory = None
+        self.chunk_size = 200000
+        self.gap_wait = 600
+        self.rows = 0
+        self.watermark = 0   # 已加载的最大订单明细ID
+        self.gaps = []       # 低于 watermark 但尚未出现的明细ID：[[起, 止, 发现时间], ...]
+        self.sorted = True   # 下单日期是否随明细ID递增，递增时按日期范围二分截取
+        self.capacity = 0
+        self.results = LRUCache(256)
+        self._columns = {}
+        self._database = None
+        self._categories = (None, [], None)  # (商品表版本, 分类名, 商品ID -> 分类编号)
+        self._lock = threading.Lock()
+    
+    @property
+    def available(self):
+        return np is not None
+    
+    def init_app(self, app):
+        self.directory = app.config.get('SALES_CUBE_DIR') or os.path.join(app.instance_path, 'sales_cube')
+        self.chunk_size = app.config.get('SALES_CUBE_CHUNK_SIZE', 200000)
+        self.gap_wait = app.config.get('SALES_CUBE_GAP_WAIT', 600)
+        self.results = LRUCache(app.config.get('SALES_CUBE_RESULT_CACHE_SIZE', 256))
+        # 列文件属于哪个数据库，切换数据库后重新生成
+        self._database = hashlib.sha1(app.config['SQLALCHEMY_DATABASE_URI'].encode()).hexdigest()[:16]
+        self.rows = 0
+        self.gaps = []
+        self.capacity = 0
+        self._columns = {}
+        self._categories = (None, [], None)
+    
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+    
+    @contextmanager
+    def _file_lock(self):
+        """多个进程共用同一目录时串行追加"""
+        os.makedirs(self.directory, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self._path('lock'), 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    
+    def _read_meta(self):
+        try:
+            with open(self._path('meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('database') != self._database or meta.get('columns') != COLUMNS:
+            return None
+        return meta
+    
+    def _write_meta(self):
+        for column in self._columns.values():
+            column.flush()
+        path = self._path('meta.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({
+                'database': self._database,
+                'columns': COLUMNS,
+                'rows': self.rows,
+                'watermark': self.watermark,
+                'gaps': self.gaps,
+                'sorted': self.sorted,
+                'capacity': self.capacity
+            }, f)
+        os.replace(path + '.tmp', path)
+    
+    def _map(self, capacity):
+        """映射各列文件，文件小于容量时扩展"""
+        columns = {}
+        for name, dtype in COLUMNS.items():
+            path = self._path(f'{name}.bin')
+            size = capacity * np.dtype(dtype).itemsize
+            with open(path, 'ab') as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            columns[name] = np.memmap(path, dtype=dtype, mode='r+', shape=(capacity,))
+        # 查询线程可能仍在使用旧的映射，整体替换而不是逐列修改
+        self._columns = columns
+        self.capacity = capacity
+    
+    def _reset(self):
+        for name in [f'{name}.bin' for name in COLUMNS] + ['meta.json']:
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+        self.rows = 0
+        self.watermark = 0
+        self.gaps = []
+        self.sorted = True
+        self._map(MIN_CAPACITY)
+        self._write_meta()
+    
+    def _source(self):
+        """读取订单明细及所属订单信息的查询，下单时间换算为 1970-01-01 起的小时数"""
+        dialect = db.engine.dialect.name
+        if dialect == 'sqlite':
+            hours = cast(func.strftime('%s', Order.created_at), Integer) // 3600
+        elif dialect in ('mysql', 'mariadb'):
+            hours = func.timestampdiff(literal_column('HOUR'), '1970-01-01 00:00:00', Order.created_at)
+        elif dialect == 'postgresql':
+            # 不带时区的时间按原值换算，与 SQLite/MySQL 一致
+            hours = cast(func.floor(extract('epoch', Order.created_at) / 3600), Integer)
+        else:
+            raise RuntimeError(f'订单明细列式统计不支持 {dialect} 数据库')
+        return select(
+            OrderItem.id,
+            OrderItem.order_id,
+            hours,
+            OrderItem.product_id,
+            Order.user_id,
+            case((Order.member_id.is_(None), 0), else_=1),
+            OrderItem.quantity,
+            OrderItem.subtotal,
+            Order.actual_amount,
+            Order.total_amount
+        ).join(Order, OrderItem.order_id == Order.id)
+    
+    def _append(self, rows, late=False):
+        """追加一批按ID排序的明细，late 为空缺内补读的明细，不移动 watermark"""
+        data = np.array(rows, dtype=np.float64)
+        item_id, order, hours, product, cashier, member, quantity, subtotal, actual, total = data.T
+        day = hours // 24
+        previous_order = self._columns['order'][self.rows - 1] if self.rows else -1
+        # 按实收/应收比例分摊会员折扣，同一订单的明细金额合计等于实收金额
+        ratio = np.divide(actual, total, out=np.ones_like(total), where=total > 0)
+        values = {
+            'day': day,
+            'hour': hours % 24,
+            'weekday': (day + WEEKDAY_OFFSET) % 7,
+            'order': order,
+            'first': order != np.concatenate(([previous_order], order[:-1])),
+            'product': product,
+            'cashier': cashier,
+            'member': member,
+            'quantity': quantity,
+            'amount': subtotal * ratio
+        }
+        
+        count = len(rows)
+        if self.rows + count > self.capacity:
+            self._map(max(self.rows + count, self.capacity * 2))
+        if self.sorted:
+            previous_day = self._columns['day'][self.rows - 1] if self.rows else day[0]
+            self.sorted = bool(day[0] >= previous_day and np.all(np.diff(day) >= 0))
+        for name, dtype in COLUMNS.items():
+            self._columns[name][self.rows:self.rows + count] = values[name].astype(dtype)
+        self.rows += count
+        if not late:
+            ids = item_id.astype(np.int64)
+            previous = np.concatenate(([self.watermark], ids[:-1]))
+            now = time.time()
+            for position in np.flatnonzero(ids - previous > 1):
+                self.gaps.append([int(previous[position]) + 1, int(ids[position]) - 1, now])
+            self.watermark = int(ids[-1])
+    
+    def _fill_gaps(self, source):
+        """补读已提交的空缺内明细，返回空缺是否有变化"""
+        now = time.time()
+        gaps = [gap for gap in self.gaps if now - gap[2] < self.gap_wait]
+        changed = len(gaps) != len(self.gaps)
+        self.gaps = gaps
+        if not gaps:
+            return changed
+        rows = db.session.execute(
+            source.where(or_(*[OrderItem.id.between(low, high) for low, high, _ in gaps])).order_by(OrderItem.id)
+        ).all()
+        if not rows:
+            return changed
+        self._append(rows, late=True)
+        # 从空缺中去掉已读取的ID，剩余部分保留原发现时间
+        found = [row[0] for row in rows]
+        self.gaps = []
+        for low, high, seen in gaps:
+            start = low
+            for item_id in found:
+                if start <= item_id <= high:
+                    if item_id > start:
+                        self.gaps.append([start, item_id - 1, seen])
+                    start = item_id + 1
+            if start <= high:
+                self.gaps.append([start, high, seen])
+        return True
+    
+    def refresh(self, rebuild=False):
+        """映射磁盘上的列文件并追加新增的订单明细，返回 (列数组, 行数)"""
+        with self._lock, self._file_lock():
+            meta = None if rebuild else self._read_meta()
+            if meta is None:
+                self._reset()
+            elif meta['rows'] != self.rows or meta['capacity'] != self.capacity:
+                # 首次映射，或其他进程已追加
+                self.rows, self.watermark, self.sorted = meta['rows'], meta['watermark'], meta['sorted']
+                self.gaps = meta.get('gaps', [])
+                self._map(meta['capacity'])
+                # 数据库重新初始化后明细ID变小，列文件已失效
+                if (db.session.query(func.max(OrderItem.id)).scalar() or 0) < self.watermark:
+                    self._reset()
+            
+            source = self._source()
+            if self._fill_gaps(source):
+                self._write_meta()
+            while True:
+                rows = db.session.execute(
+                    source.where(OrderItem.id > self.watermark).order_by(OrderItem.id).limit(self.chunk_size)
+                ).all()
+                if rows:
+                    self._append(rows)
+                    self._write_meta()
+                if len(rows) < self.chunk_size:
+                    break
+            return self._columns, self.rows
+    
+    def _category_codes(self):
+        """返回 (商品表版本, 分类名, 商品ID -> 分类编号)，商品表有变化时重新读取"""
+        version = tuple(db.session.query(func.count(Product.id), func.max(Product.updated_at)).one())
+        if version != self._categories[0]:
+            rows = db.session.query(Product.id, Product.category).all()
+            names = sorted({category or '未分类' for _, category in rows} | {'未分类'})
+            index = {name: code for code, name in enumerate(names)}
+            # 多留一项“未分类”，已删除的商品超出范围时取最后一项
+            codes = np.full(max([product_id for product_id, _ in rows], default=0) + 2,
+                            index['未分类'], dtype=np.int16)
+            for product_id, category in rows:
+                codes[product_id] = index[category or '未分类']
+            self._categories = (version, names, codes)
+        return self._categories
+    
+    def query(self, group_by=(), measures=MEASURES, start_date=None, end_date=None, filters=None,
+              sort=None, limit=None):
+        """分组统计订单明细
+        
+        group_by 为 DIMENSIONS 中的维度，start_date/end_date 为包含两端的日期，
+        filters 为 {维度: 取值列表}（member 为布尔值），sort 为按其倒序排列的指标。
+        """
+        columns, rows = self.refresh()
+        filters = filters or {}
+        version, names, category_codes = self._category_codes()
+        
+        # 明细只追加，行数和商品分类不变时结果不变
+        key = json.dumps([rows, str(version), list(group_by), list(measures), str(start_date), str(end_date),
+                          filters, sort, limit], sort_keys=True, ensure_ascii=False)
+        result = self.results.get(key)
+        if result is None:
+            result = self._aggregate(columns, rows, names, category_codes, list(group_by), list(measures),
+                                     start_date, end_date, filters, sort, limit)
+            self.results.set(key, result)
+        return result
+    
+    def _aggregate(self, columns, rows, names, category_codes, group_by, measures, start_date, end_date,
+                   filters, sort, limit):
+        # 按日期范围截取，日期随明细ID递增时二分查找，否则逐行比较
+        days = columns['day'][:rows]
+        begin, end, mask = 0, rows, None
+        low = (start_date - EPOCH).days if start_date else None
+        high = (end_date - EPOCH).days + 1 if end_date else None
+        if self.sorted:
+            begin = int(np.searchsorted(days, low, 'left')) if low is not None else 0
+            end = int(np.searchsorted(days, high, 'left')) if high is not None else rows
+        else:
+            if low is not None:
+                mask = days >= low
+            if high is not None:
+                mask = days < high if mask is None else mask & (days < high)
+        cache = {}
+        
+        def column(name):
+            # 按需读取选中的行，分类只映射一次
+            if name not in cache:
+                if name == 'category':
+                    cache[name] = np.take(category_codes, column('product'), mode='clip')
+                else:
+                    values = columns[name][begin:end]
+                    cache[name] = values[mask] if mask is not None else values
+            return cache[name]
+        
+        # 维度过滤，合并到日期范围的行选择中
+        selected = None
+        for name, values in filters.items():
+            if name == 'member':
+                condition = column('member') == (1 if values else 0)
+            elif name == 'category':
+                condition = np.isin(column('category'), [names.index(value) for value in values if value in names])
+            else:
+                condition = np.isin(column(name), values)
+            selected = condition if selected is None else selected & condition
+        if selected is not None:
+            if mask is None:
+                mask = selected
+            else:
+                mask[mask] = selected
+            cache.clear()
+        scanned = len(column('order'))
+        
+        # 各维度编号按混合进制合成分组编号，第一个维度为最高位
+        key = np.zeros(scanned, dtype=np.intp)
+        dims = []
+        for name in group_by:
+            codes, offset = column(name), 0
+            if name == 'day':
+                offset = int(codes.min()) if scanned else 0
+                size = int(codes.max()) - offset + 1 if scanned else 1
+            elif name == 'hour':
+                size = 24
+            elif name == 'weekday':
+                size = 7
+            elif name == 'category':
+                size = len(names)
+            elif name == 'cashier':
+                size = int(codes.max()) + 1 if scanned else 1
+            else:
+                size = 2
+            key *= size
+            key += codes
+            if offset:
+                key -= offset
+            dims.append((name, size, offset))
+        
+        groups = 1
+        for _, size, _ in dims:
+            groups *= size
+        if groups <= DENSE_LIMIT:
+            keys, inverse = None, key
+        else:
+            keys, inverse = np.unique(key, return_inverse=True)
+            groups = len(keys)
+        counts = np.bincount(inverse, minlength=groups)
+        totals = {'items': counts}
+        if 'amount' in measures:
+            totals['amount'] = np.bincount(inverse, weights=column('amount'), minlength=groups)
+        if 'quantity' in measures:
+            totals['quantity'] = np.bincount(inverse, weights=column('quantity'), minlength=groups)
+        if 'orders' in measures:
+            if set(group_by) <= ORDER_DIMENSIONS and set(filters) <= ORDER_DIMENSIONS:
+                # 按订单级维度分组和过滤时订单的明细同进同出，每个订单只计第一条明细
+                totals['orders'] = np.bincount(inverse[column('first').view(bool)], minlength=groups)
+            else:
+                # 一个订单的明细可能分属多个分类，按 (订单, 分组) 去重；
+                # 订单ID随明细递增，组合值基本有序，稳定排序（归并）接近线性时间
+                pairs = np.sort(column('order').astype(np.int64) * groups + inverse, kind='stable')
+                distinct = np.ones(len(pairs), dtype=bool)
+                np.not_equal(pairs[1:], pairs[:-1], out=distinct[1:])
+                totals['orders'] = np.bincount(pairs[distinct] % groups, minlength=groups)
+        
+        present = np.flatnonzero(counts)
+        if sort:
+            present = present[np.argsort(-totals[sort][present], kind='stable')]
+        if limit:
+            present = present[:limit]
+        codes = keys[present] if keys is not None else present
+        
+        # 分组编号还原为各维度的取值
+        labels = {}
+        stride = 1
+        for name, size, offset in reversed(dims):
+            values = (codes // stride) % size + offset
+            stride *= size
+            if name == 'day':
+                labels[name] = [(EPOCH + timedelta(days=int(value))).isoformat() for value in values]
+            elif name == 'category':
+                labels[name] = [names[value] for value in values]
+            elif name == 'member':
+                labels[name] = [bool(value) for value in values]
+            else:
+                labels[name] = [int(value) for value in values]
+        cashier_names = dict(db.session.query(User.id, User.name).filter(
+            User.id.in_(set(labels['cashier']))
+        ).all()) if 'cashier' in labels else None
+        
+        data = []
+        for position, group in enumerate(present):
+            row = {name: labels[name][position] for name in group_by}
+            if cashier_names is not None:
+                row['cashier_name'] = cashier_names.get(row['cashier'])
+            for name in measures:
+                value = totals[name][group]
+                row[name] = round(float(value), 2) if name == 'amount' else int(value)
+            data.append(row)
+        return {
+            'group_by': group_by,
+            'rows': data,
+            'group_count': int(np.count_nonzero(counts)),
+            'scanned': scanned
+        }
+
+sales_cube = SalesCube()
@@ -0,0 +1,292 @@
+"""商品、会员关键字搜索
+
+SQLite 上使用 FTS5 trigram 全文索引（由触发器与原表保持同步）；
+其他数据库使用进程内 n-gram 倒排索引（本进程的事务提交后根据 ORM 事件同步，
+其他进程的修改每隔 SEARCH_SYNC_INTERVAL 秒按 updated_at 增量读取）。
+搜索结果按匹配程度排序，最多返回 max_results 个并标明是否截断；不可用时返回 None，由调用方回退到 LIKE 查询。
+"""
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from sqlalchemy import case, event, func, inspect, text
+from sqlalchemy.orm import Session
+from ..extensions import db
+from ..models import Product, Member
+
+# 表名 -> (模型, 参与搜索的字段)
+SEARCH_FIELDS = {
+    'products': (Product, ('code', 'name', 'barcode')),
+    'members': (Member, ('card_no', 'name', 'phone')),
+}
+
+def _rank_key(keyword, values):
+    """完全匹配优先，其次前缀匹配，再按字段长度排序"""
+    values = [value.lower() for value in values if value]
+    if keyword in values:
+        return (0, 0)
+    if any(value.startswith(keyword) for value in values):
+        return (1, min(len(value) for value in values))
+    return (2, min(len(value) for value in values) if values else 0)
+
+def rank_order(column, ids):
+    """按搜索结果顺序排序的 ORDER BY 表达式"""
+    if not ids:
+        return column
+    return case({doc_id: position for position, doc_id in enumerate(ids)}, value=column)
+
+class NgramIndex:
+    """进程内 n-gram 倒排索引，单字查询使用一元索引，其余使用二元索引"""
+    
+    def __init__(self, fields):
+        self.fields = fields
+        self._docs = {}      # 文档ID -> 字段值元组
+        self._postings = {}  # gram -> 文档ID集合
+        self._lock = threading.Lock()
+        self.warmed = False
+        self.since = None    # 加载或上次同步时原表的最大 updated_at
+        self.synced_at = 0
+    
+    @staticmethod
+    def _grams(value):
+        value = value.lower()
+        grams = set(value)
+        grams.update(value[i:i + 2] for i in range(len(value) - 1))
+        return grams
+    
+    def _remove(self, doc_id):
+        values = self._docs.pop(doc_id, None)
+        if values is None:
+            return
+        for value in values:
+            for gram in self._grams(value or ''):
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(doc_id)
+                    if not postings:
+                        del self._postings[gram]
+    
+    def load(self, rows, since=None):
+        with self._lock:
+            self._docs = {}
+            self._postings = {}
+            for doc_id, *values in rows:
+                self._add(doc_id, values)
+            self.since = since
+            self.synced_at = time.monotonic()
+            self.warmed = True
+    
+    def _add(self, doc_id, values):
+        self._docs[doc_id] = tuple(values)
+        for value in values:
+            for gram in self._grams(value or ''):
+                self._postings.setdefault(gram, set()).add(doc_id)
+    
+    def update(self, doc_id, values):
+        with self._lock:
+            self._remove(doc_id)
+            if values is not None:
+                self._add(doc_id, values)
+    
+    def search(self, keyword, limit):
+        keyword = keyword.lower()
+        grams = {keyword} if len(keyword) == 1 else {keyword[i:i + 2] for i in range(len(keyword) - 1)}
+        with self._lock:
+            postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:]) if postings else set()
+            matches = []
+            for doc_id in candidates:
+                values = self._docs[doc_id]
+                # 二元组命中不代表连续出现，需要校验子串
+                if any(value and keyword in value.lower() for value in values):
+                    matches.append((_rank_key(keyword, values), doc_id))
+        matches.sort()
+        return [doc_id for _, doc_id in matches[:limit]]
+    
+    def __len__(self):
+        return len(self._docs)
+
+class Fts5Index:
+    """SQLite FTS5 trigram 外部内容索引，依赖触发器同步"""
+    
+    def __init__(self, table, fields):
+        self.table = table
+        self.fields = fields
+        self.fts_table = f'{table}_fts'
+    
+    def create(self, connection):
+        """创建全文索引表和同步触发器，并从原表重建索引"""
+        columns = ', '.join(self.fields)
+        new_values = ', '.join(f'new.{field}' for field in self.fields)
+        old_values = ', '.join(f'old.{field}' for field in self.fields)
+        statements = [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} USING fts5("
+            f"{columns}, content='{self.table}', content_rowid='id', tokenize='trigram')",
+            f"CREATE TRIGGER IF NOT EXISTS {self.fts_table}_ai AFTER INSERT ON {self.table} BEGIN "
+            f"INSERT INTO {self.fts_table}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.fts_table}_ad AFTER DELETE ON {self.table} BEGIN "
+            f"INSERT INTO {self.fts_table}({self.fts_table}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.fts_table}_au AFTER UPDATE OF {columns} ON {self.table} BEGIN "
+            f"INSERT INTO {self.fts_table}({self.fts_table}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {self.fts_table}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+            f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('rebuild')",
+        ]
+        for statement in statements:
+            connection.execute(text(statement))
+    
+    def drop(self, connection):
+        connection.execute(text(f'DROP TABLE IF EXISTS {self.fts_table}'))
+    
+    def exists(self, connection):
+        return inspect(connection).has_table(self.fts_table)
+    
+    def search(self, keyword, limit):
+        # trigram 分词至少需要3个字符
+        if len(keyword) < 3:
+            return None
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        columns = ', '.join(self.fields)
+        rows = db.session.execute(text(
+            f'SELECT rowid, {columns} FROM {self.fts_table} '
+            f'WHERE {self.fts_table} MATCH :phrase ORDER BY rank LIMIT :limit'
+        ), {'phrase': phrase, 'limit': limit}).all()
+        keyword = keyword.lower()
+        # 在 bm25 排序基础上把编号、条码完全匹配的结果提前
+        ranked = sorted(enumerate(rows), key=lambda item: (_rank_key(keyword, item[1][1:])[0], item[0]))
+        return [row[0] for _, row in ranked]
+
+def _sqlite_has_trigram():
+    try:
+        sqlite3.connect(':memory:').execute("CREATE VIRTUAL TABLE t USING fts5(a, tokenize='trigram')")
+        return True
+    except sqlite3.Error:
+        return False
+
+class SearchService:
+
+    def __init__(self):
+        self.backend = 'like'
+        self.max_results = 1000
+        self.sync_interval = 30
+        self.indexes = {}
+    
+    def init_app(self, app):
+        self.max_results = app.config.get('SEARCH_MAX_RESULTS', 1000)
+        self.sync_interval = app.config.get('SEARCH_SYNC_INTERVAL', 30)
+        backend = app.config.get('SEARCH_BACKEND', 'auto')
+        with app.app_context():
+            dialect = db.engine.dialect.name
+        if backend == 'auto':
+            backend = 'fts5' if dialect == 'sqlite' and _sqlite_has_trigram() else 'ngram'
+        self.backend = backend
+        
+        if backend == 'fts5':
+            self.indexes = {table: Fts5Index(table, fields) for table, (_, fields) in SEARCH_FIELDS.items()}
+        elif backend == 'ngram':
+            self.indexes = {table: NgramIndex(fields) for table, (_, fields) in SEARCH_FIELDS.items()}
+        else:
+            self.indexes = {}
+            return
+        
+        with app.app_context():
+            try:
+                self.warm()
+            except Exception as e:
+                # 数据库尚未初始化时跳过，建表时再创建索引
+                app.logger.warning(f'搜索索引初始化失败: {e}')
+    
+    def warm(self):
+        """创建缺失的 FTS5 索引，或加载 n-gram 索引"""
+        if self.backend == 'fts5':
+            with db.engine.begin() as connection:
+                for table, index in self.indexes.items():
+                    if inspect(connection).has_table(table) and not index.exists(connection):
+                        index.create(connection)
+        elif self.backend == 'ngram':
+            for table, index in self.indexes.items():
+                model, fields = SEARCH_FIELDS[table]
+                # 先读取最大更新时间，读取期间的修改在下次同步时补读
+                since = db.session.query(func.max(model.updated_at)).scalar()
+                index.load(db.session.query(model.id, *[getattr(model, field) for field in fields]).all(), since)
+    
+    def _sync(self, table, index):
+        """距上次同步超过 sync_interval 秒时读取其他进程的修改，0 表示不同步"""
+        if not self.sync_interval or time.monotonic() - index.synced_at < self.sync_interval:
+            return
+        index.synced_at = time.monotonic()
+        model, fields = SEARCH_FIELDS[table]
+        count, since = db.session.query(func.count(model.id), func.max(model.updated_at)).one()
+        if count != len(index) or (index.since is None) != (since is None):
+            # 行数不一致时可能有删除，重新加载
+            self.warm()
+            return
+        if since is None:
+            return
+        # 多读取上次最大更新时间之前 sync_interval 秒内的记录，覆盖较晚提交的事务
+        rows = db.session.query(model.id, *[getattr(model, field) for field in fields]).filter(
+            model.updated_at >= index.since - timedelta(seconds=self.sync_interval)
+        ).all()
+        for doc_id, *values in rows:
+            index.update(doc_id, values)
+        index.since = since
+    
+    def search(self, table, keyword):
+        """返回 (按相关度排序的ID列表, 是否超过 max_results 被截断)，返回None表示需要回退到LIKE查询"""
+        index = self.indexes.get(table)
+        if index is None:
+            return None
+        if self.backend == 'ngram':
+            if not index.warmed:
+                self.warm()
+            else:
+                self._sync(table, index)
+        ids = index.search(keyword.strip(), self.max_results + 1)
+        if ids is None:
+            return None
+        return ids[:self.max_results], len(ids) > self.max_results
+
+search_service = SearchService()
+
+# FTS5：随 create_all/drop_all 创建和删除索引表
+def _after_create(target, connection, **kw):
+    index = search_service.indexes.get(target.name)
+    if isinstance(index, Fts5Index):
+        index.create(connection)
+
+def _before_drop(target, connection, **kw):
+    index = search_service.indexes.get(target.name)
+    if isinstance(index, Fts5Index):
+        index.drop(connection)
+
+for _table, (_model, _) in SEARCH_FIELDS.items():
+    event.listen(_model.__table__, 'after_create', _after_create)
+    event.listen(_model.__table__, 'before_drop', _before_drop)
+
+# n-gram：记录会话中变更的文档，提交后更新索引
+def _track_change(deleted):
+    def listener(mapper, connection, target):
+        index = search_service.indexes.get(target.__tablename__)
+        if not isinstance(index, NgramIndex):
+            return
+        values = None if deleted else [getattr(target, field) for field in index.fields]
+        session = Session.object_session(target)
+        session.info.setdefault('search_changes', []).append((index, target.id, values))
+    return listener
+
+for _model, _ in SEARCH_FIELDS.values():
+    event.listen(_model, 'after_insert', _track_change(False))
+    event.listen(_model, 'after_update', _track_change(False))
+    event.listen(_model, 'after_delete', _track_change(True))
+
+@event.listens_for(Session, 'after_commit')
+def _apply_changes(session):
+    for index, doc_id, values in session.info.pop('search_changes', []):
+        index.update(doc_id, values)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_changes(session, previous_transaction):
+    # 回滚保存点时不丢弃外层事务的变更
+    if not previous_transaction.nested:
+        session.info.pop('search_changes', None)
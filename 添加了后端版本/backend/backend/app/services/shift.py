@@ -0,0 +1,64 @@
+"""交班订单数和金额的增量维护
+
+订单写入时在同一事务内累加到收银员进行中的交班，
+交班查询和结束交班直接读取累计值，reconcile_shifts 用原始订单核对。
+"""
+from datetime import datetime
+from sqlalchemy import and_, func
+from ..extensions import db
+from ..models import Order, Shift
+
+def record_shift_orders(user_id, orders):
+    """把新订单计入收银员进行中的交班，只计入交班开始之后的订单"""
+    shift = db.session.query(Shift.id, Shift.start_time).filter(
+        Shift.user_id == user_id,
+        Shift.status == 0
+    ).first()
+    if not shift:
+        return
+    
+    counted = [order for order in orders if order.created_at >= shift.start_time]
+    if not counted:
+        return
+    # 条件中带上状态，避免累加到刚被结束的交班
+    db.session.query(Shift).filter(Shift.id == shift.id, Shift.status == 0).update({
+        Shift.order_count: Shift.order_count + len(counted),
+        Shift.total_amount: Shift.total_amount + sum(float(order.actual_amount) for order in counted)
+    }, synchronize_session=False)
+
+def reconcile_shifts(shift_id=None, fix=False):
+    """用原始订单核对交班累计值，返回不一致的记录列表，fix 为 True 时修正"""
+    end_time = func.coalesce(Shift.end_time, datetime.now())
+    query = db.session.query(
+        Shift.id,
+        Shift.order_count,
+        Shift.total_amount,
+        func.count(Order.id),
+        func.coalesce(func.sum(Order.actual_amount), 0)
+    ).outerjoin(Order, and_(
+        Order.user_id == Shift.user_id,
+        Order.created_at >= Shift.start_time,
+        Order.created_at <= end_time
+    )).group_by(Shift.id, Shift.order_count, Shift.total_amount)
+    if shift_id:
+        query = query.filter(Shift.id == shift_id)
+    
+    mismatches = []
+    for sid, order_count, total_amount, actual_count, actual_amount in query.all():
+        if order_count != actual_count or abs(float(total_amount) - float(actual_amount)) > 0.005:
+            mismatches.append({
+                'shift_id': sid,
+                'order_count': order_count,
+                'expected_order_count': actual_count,
+                'total_amount': float(total_amount),
+                'expected_total_amount': round(float(actual_amount), 2)
+            })
+    
+    if fix and mismatches:
+        db.session.bulk_update_mappings(Shift, [{
+            'id': item['shift_id'],
+            'order_count': item['expected_order_count'],
+            'total_amount': item['expected_total_amount']
+        } for item in mismatches])
+        db.session.commit()
+    return mismatches
@@ -0,0 +1,201 @@
+"""库存预警集合的增量维护
+
+库存数量或预警值变化时比较变化前后的预警状态，只有跨越预警值（正常/预警/缺货之间切换）的商品
+才在同一事务内写入 stock_alerts 表，表中只保留当前处于预警或缺货状态的商品；
+事务提交后把变化推送给 SSE 订阅者。ORM 修改 Inventory 时在 flush 后自动检测，
+批量 UPDATE 扣减库存时由调用方调用 track_stock_changes。
+"""
+import logging
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import case, delete, event, func, inspect, insert, literal, select, update
+from sqlalchemy.orm import Session
+from ..extensions import db
+from ..models import Product, Inventory, StockAlert
+from ..utils.sse import sse_event, sse_comment
+from .events import broker
+
+CHANNEL = 'stock_alerts'
+UNKNOWN = object()  # 变化前的值未加载，需要与预警表比对
+
+alert_logger = logging.getLogger('app.stock_alert')
+
+def alert_status(quantity, alert_threshold):
+    """库存所处的预警状态，正常时返回 None"""
+    if quantity is None or alert_threshold is None or quantity > alert_threshold:
+        return None
+    return '缺货' if quantity <= 0 else '预警'
+
+def track_stock_changes(changes, session=None):
+    """检测跨越预警值的库存变化并更新预警表，需在库存修改的事务内调用
+    
+    changes 为 [(商品ID, 原库存, 原预警值, 新库存, 新预警值), ...]，原值未知时传 UNKNOWN。
+    """
+    session = session or db.session
+    crossed = {}
+    for product_id, old_quantity, old_threshold, quantity, alert_threshold in changes:
+        status = alert_status(quantity, alert_threshold)
+        if old_quantity is not UNKNOWN and old_threshold is not UNKNOWN \
+                and alert_status(old_quantity, old_threshold) == status:
+            continue
+        crossed[product_id] = (status, quantity, alert_threshold)
+    if not crossed:
+        return
+    
+    table = StockAlert.__table__
+    existing = dict(session.execute(
+        select(table.c.product_id, table.c.status).where(table.c.product_id.in_(list(crossed)))
+    ).all())
+    names = dict(session.execute(
+        select(Product.id, Product.name).where(Product.id.in_(list(crossed)))
+    ).all())
+    now = datetime.now()
+    events = []
+    for product_id, (status, quantity, alert_threshold) in crossed.items():
+        previous = existing.get(product_id)
+        if status == previous:
+            continue
+        if status is None:
+            session.execute(delete(table).where(table.c.product_id == product_id))
+            event_name = 'cleared'
+        elif previous is None:
+            session.execute(insert(table).values(
+                product_id=product_id, status=status, quantity=quantity,
+                alert_threshold=alert_threshold, created_at=now, updated_at=now
+            ))
+            event_name = 'raised'
+        else:
+            session.execute(update(table).where(table.c.product_id == product_id).values(
+                status=status, quantity=quantity, alert_threshold=alert_threshold, updated_at=now
+            ))
+            event_name = 'changed'
+        events.append((event_name, {
+            'product_id': product_id,
+            'product_name': names.get(product_id),
+            'quantity': quantity,
+            'alert_threshold': alert_threshold,
+            'status': status or '正常',
+            'time': now.strftime('%Y-%m-%d %H:%M:%S')
+        }))
+    session.info.setdefault('stock_alert_events', []).extend(events)
+
+def list_alerts():
+    """当前的预警商品，库存为实时值"""
+    rows = db.session.query(
+        Inventory.id, Product.id, Product.code, Product.name,
+        Inventory.quantity, Inventory.alert_threshold, StockAlert.updated_at
+    ).select_from(StockAlert).join(
+        Product, Product.id == StockAlert.product_id
+    ).join(
+        Inventory, Inventory.product_id == StockAlert.product_id
+    ).order_by(StockAlert.id).all()
+    return [{
+        'id': inventory_id,
+        'product_id': product_id,
+        'product_code': code,
+        'product_name': name,
+        'quantity': quantity,
+        'alert_threshold': alert_threshold,
+        'status': alert_status(quantity, alert_threshold) or '正常',
+        'alerted_at': alerted_at.strftime('%Y-%m-%d %H:%M:%S')
+    } for inventory_id, product_id, code, name, quantity, alert_threshold, alerted_at in rows]
+
+def alert_signature():
+    """预警表的版本标识，任何增删改都会改变该值"""
+    return tuple(db.session.query(func.count(StockAlert.id), func.max(StockAlert.updated_at)).one())
+
+def rebuild_stock_alerts():
+    """按当前库存重建预警表，返回预警商品数"""
+    table = StockAlert.__table__
+    now = datetime.now()
+    db.session.execute(delete(table))
+    db.session.execute(insert(table).from_select(
+        ['product_id', 'status', 'quantity', 'alert_threshold', 'created_at', 'updated_at'],
+        select(
+            Inventory.product_id,
+            case((Inventory.quantity <= 0, '缺货'), else_='预警'),
+            Inventory.quantity, Inventory.alert_threshold, literal(now), literal(now)
+        ).where(Inventory.quantity <= Inventory.alert_threshold)
+    ))
+    db.session.commit()
+    return db.session.query(func.count(StockAlert.id)).scalar()
+
+def alert_stream(subscription):
+    """SSE 事件：连接时发送 snapshot，之后推送 raised / changed / cleared
+    
+    其他进程产生的变化通过定期比对预警表版本发现，变化时重新发送 snapshot。
+    """
+    heartbeat = current_app.config.get('SSE_HEARTBEAT', 15)
+    sync_interval = current_app.config.get('STOCK_ALERT_SYNC_INTERVAL', 30)
+    try:
+        send_snapshot = True
+        signature = None
+        synced_at = time.monotonic()
+        while True:
+            if send_snapshot:
+                signature = alert_signature()
+                alerts = list_alerts()
+                # 不在等待期间占用数据库连接
+                db.session.remove()
+                yield sse_event('snapshot', alerts)
+                send_snapshot = False
+            
+            events, overflowed = subscription.get(heartbeat)
+            for event_name, data in events:
+                yield sse_event(event_name, data)
+            if overflowed:
+                send_snapshot = True
+                continue
+            if not events:
+                yield sse_comment()
+            
+            if sync_interval and time.monotonic() - synced_at >= sync_interval:
+                synced_at = time.monotonic()
+                current = alert_signature()
+                db.session.remove()
+                send_snapshot = current != signature
+                signature = current
+    finally:
+        subscription.close()
+
+def _previous_value(state, key):
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.added:
+        return UNKNOWN
+    return history.unchanged[0] if history.unchanged else UNKNOWN
+
+@event.listens_for(Session, 'after_flush')
+def _track_inventory_changes(session, flush_context):
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Inventory):
+            changes.append((obj.product_id, None, None, obj.quantity, obj.alert_threshold))
+    for obj in session.dirty:
+        if isinstance(obj, Inventory):
+            state = inspect(obj)
+            if not (state.attrs.quantity.history.has_changes() or state.attrs.alert_threshold.history.has_changes()):
+                continue
+            changes.append((obj.product_id, _previous_value(state, 'quantity'),
+                            _previous_value(state, 'alert_threshold'), obj.quantity, obj.alert_threshold))
+    for obj in session.deleted:
+        if isinstance(obj, Inventory):
+            changes.append((obj.product_id, UNKNOWN, UNKNOWN, None, None))
+    if changes:
+        track_stock_changes(changes, session)
+
+@event.listens_for(Session, 'after_commit')
+def _publish_alerts(session):
+    for event_name, data in session.info.pop('stock_alert_events', ()):
+        if event_name != 'cleared':
+            alert_logger.warning('库存%s: %s(ID %s) 库存 %s，预警值 %s', data['status'], data['product_name'],
+                                 data['product_id'], data['quantity'], data['alert_threshold'])
+        broker.publish(CHANNEL, event_name, data)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_alerts(session, previous_transaction):
+    # 回滚保存点时不丢弃外层事务的事件
+    if not previous_transaction.nested:
+        session.info.pop('stock_alert_events', None)
@@ -0,0 +1,69 @@
+"""登录用户信息缓存
+
+认证后的请求需要确认用户存在并检查角色，按用户ID缓存用户信息一段时间，
+用户被修改或删除时在事务提交后失效，避免每个请求都查询 users 表。
+"""
+from collections import namedtuple
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from ..extensions import db
+from ..models import User
+from .cache import LRUCache
+
+CachedUser = namedtuple('CachedUser', ['id', 'username', 'name', 'role'])
+
+class UserCache:
+
+    def __init__(self):
+        self.backend = LRUCache(256)
+        self.ttl = 60
+    
+    def init_app(self, app):
+        self.backend = LRUCache(app.config.get('USER_CACHE_SIZE', 256))
+        self.ttl = app.config.get('USER_CACHE_TTL', 60)
+    
+    def get(self, user_id):
+        """返回 CachedUser，用户不存在时返回 None"""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        user = self.backend.get(user_id)
+        if user is None:
+            row = db.session.query(User.id, User.username, User.name, User.role).filter(User.id == user_id).first()
+            if row is None:
+                return None
+            user = CachedUser(*row)
+            self.backend.set(user_id, user, self.ttl)
+        return user
+    
+    def invalidate(self, user_id):
+        self.backend.delete(user_id)
+    
+    def clear(self):
+        self.backend.clear()
+
+user_cache = UserCache()
+
+def get_current_user():
+    """当前登录用户，需在 jwt_required 保护的请求内调用"""
+    return user_cache.get(get_jwt_identity())
+
+# 用户被修改或删除时记录ID，事务提交后使缓存失效
+def _track_user_change(mapper, connection, target):
+    session = Session.object_session(target)
+    session.info.setdefault('user_changes', set()).add(target.id)
+
+event.listen(User, 'after_update', _track_user_change)
+event.listen(User, 'after_delete', _track_user_change)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_users(session):
+    for user_id in session.info.pop('user_changes', ()):
+        user_cache.invalidate(user_id)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_user_changes(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop('user_changes', None)
@@ -0,0 +1,36 @@
+"""数据库引擎参数：服务器数据库的连接池配置，SQLite 的连接 PRAGMA"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# 配置项 -> create_engine 参数
+POOL_OPTIONS = {
+    'DB_POOL_SIZE': 'pool_size',
+    'DB_MAX_OVERFLOW': 'max_overflow',
+    'DB_POOL_TIMEOUT': 'pool_timeout',
+    'DB_POOL_RECYCLE': 'pool_recycle',
+    'DB_POOL_PRE_PING': 'pool_pre_ping',
+}
+
+def engine_options(config):
+    """根据配置生成 SQLALCHEMY_ENGINE_OPTIONS，显式配置的引擎参数优先"""
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # 内存数据库使用单连接池，不接受连接池参数
+        return options
+    for key, option in POOL_OPTIONS.items():
+        if config.get(key) is not None:
+            options.setdefault(option, config[key])
+    return options
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """SQLite 每个新连接建立时执行 PRAGMA，其他数据库忽略"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
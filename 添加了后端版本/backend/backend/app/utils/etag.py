@@ -0,0 +1,28 @@
+"""列表接口的条件请求
+
+以过滤后的行数和最大 updated_at 作为数据版本，连同请求路径和参数生成 ETag。
+收银终端缓存列表响应，再次请求时带上 If-None-Match，版本未变化时返回 304，
+不再查询分页数据和序列化。行数参与版本计算，删除记录也会改变 ETag。
+"""
+import hashlib
+from flask import request, current_app
+
+CACHE_CONTROL = 'private, no-cache'  # 允许客户端缓存，每次使用前须重新验证
+
+def list_etag(version, *extra):
+    """version 为 (行数, 最大更新时间, ...)，extra 为其他影响结果的数据（如搜索命中的ID）"""
+    parts = [request.path, sorted(request.args.items(multi=True)), [str(value) for value in version], extra]
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+def is_fresh(etag):
+    """客户端缓存的版本是否仍然有效"""
+    return etag in request.if_none_match
+
+def not_modified(etag):
+    response = current_app.response_class(status=304)
+    return with_etag(response, etag)
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
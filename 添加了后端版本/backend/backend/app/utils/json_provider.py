@@ -0,0 +1,54 @@
+"""JSON 响应编码
+
+JSON_SERIALIZER 为 auto 时安装了 orjson 就用它替换 Flask 默认的标准库 json 编码，orjson 要求必须安装，
+json 始终使用标准库。orjson 编码的输出与默认编码一致（键排序、日期按 HTTP 日期格式、Decimal 转为字符串），
+只是非 ASCII 字符直接输出 UTF-8，不再转义为 \\uXXXX。
+"""
+import json
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_line_orjson = orjson is not None  # dumps_line 是否使用 orjson，随 JSON_SERIALIZER 配置
+
+class OrjsonProvider(DefaultJSONProvider):
+    """使用 orjson 编码/解码的 JSON 提供者，不支持的类型交给默认编码的 default 处理"""
+    
+    def _encode(self, obj, sort_keys, indent=False):
+        # datetime/date 交给 default，与默认编码一样输出 HTTP 日期格式
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+    
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj, kwargs.get('sort_keys', self.sort_keys), kwargs.get('indent')).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self._encode(obj, self.sort_keys, indent) + b'\n', mimetype=self.mimetype)
+
+def init_json(app):
+    """按 JSON_SERIALIZER 配置选择响应的 JSON 编码"""
+    global _line_orjson
+    serializer = app.config.get('JSON_SERIALIZER', 'auto')
+    if serializer == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_SERIALIZER=orjson 需要安装 orjson 包')
+    _line_orjson = serializer in ('auto', 'orjson') and orjson is not None
+    if _line_orjson:
+        app.json = OrjsonProvider(app)
+
+def dumps_line(obj):
+    """编码为一行紧凑 JSON（保持键顺序，非 ASCII 字符不转义），用于流式导出"""
+    if _line_orjson:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
@@ -0,0 +1,129 @@
+"""列表接口分页
+
+默认使用页码分页（page/limit，返回总数）。请求带 cursor 参数时使用游标分页：
+按排序键做范围查询代替 OFFSET，不统计总数（with_total=1 时统计），
+响应中的 next_cursor 用于请求下一页，首页传空的 cursor 即可。
+"""
+import base64
+import json
+from datetime import date, datetime
+from flask import request
+from sqlalchemy import and_, or_, tuple_
+
+class InvalidCursor(ValueError):
+    """分页游标无法解析"""
+
+def _encode(values):
+    def default(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return str(value)
+    raw = json.dumps(values, default=default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def _decode(cursor, keys):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise InvalidCursor(cursor)
+    
+    decoded = []
+    for value, (expr, _) in zip(values, keys):
+        try:
+            python_type = expr.type.python_type
+        except NotImplementedError:
+            python_type = None
+        try:
+            if value is not None and python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif value is not None and python_type is date:
+                value = date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        decoded.append(value)
+    return decoded
+
+def _seek(keys, values):
+    """游标之后的行：(k1, k2, ...) 按排序方向严格大于/小于游标值"""
+    directions = {desc for _, desc in keys}
+    if len(directions) == 1 and len(keys) > 1:
+        # 排序方向一致时使用行值比较，便于数据库使用复合索引
+        columns = tuple_(*[expr for expr, _ in keys])
+        return columns < tuple_(*values) if keys[0][1] else columns > tuple_(*values)
+    
+    clauses = []
+    for i, (expr, desc) in enumerate(keys):
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, expr < values[i] if desc else expr > values[i]))
+    return or_(*clauses)
+
+class CursorPage:
+    """游标分页结果，字段与 flask_sqlalchemy 的 Pagination 保持一致"""
+    
+    def __init__(self, items, total, next_cursor):
+        self.items = items
+        self.total = total
+        self.next_cursor = next_cursor
+    
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+    
+    def response(self, items):
+        return {
+            'total': self.total,
+            'items': items,
+            'next_cursor': self.next_cursor,
+            'has_more': self.has_next
+        }
+
+class NumberedPage:
+    """页码分页结果"""
+    
+    def __init__(self, pagination, total=None):
+        self.items = pagination.items
+        self.total = pagination.total if total is None else total
+    
+    def response(self, items):
+        return {
+            'total': self.total,
+            'items': items
+        }
+
+def paginate(query, keys, total=None):
+    """按请求参数分页
+    
+    keys 为排序键 [(列或表达式, 是否倒序), ...]，最后一个键必须唯一（通常为主键），
+    两种分页方式都按 keys 排序。调用方已统计过总数时通过 total 传入，不再重复统计。
+    """
+    limit = request.args.get('limit', 10, type=int)
+    query = query.order_by(None).order_by(*[expr.desc() if desc else expr.asc() for expr, desc in keys])
+    
+    cursor = request.args.get('cursor')
+    if cursor is None:
+        page = request.args.get('page', 1, type=int)
+        return NumberedPage(query.paginate(page=page, per_page=limit, error_out=False, count=total is None), total)
+    
+    limit = max(limit, 1)
+    if request.args.get('with_total', type=int) != 1:
+        total = None
+    elif total is None:
+        total = query.order_by(None).count()
+    if cursor:
+        query = query.filter(_seek(keys, _decode(cursor, keys)))
+    
+    # 多取一行判断是否还有下一页，排序键作为附加列一并查出用于生成游标
+    rows = query.add_columns(*[expr for expr, _ in keys]).limit(limit + 1).all()
+    size = len(keys)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    items = []
+    for row in rows:
+        entities = tuple(row[:-size])
+        items.append(entities[0] if len(entities) == 1 else entities)
+    next_cursor = _encode(list(rows[-1][-size:])) if has_more else None
+    return CursorPage(items, total, next_cursor)
@@ -0,0 +1,38 @@
+"""SQL语句计数工具，用于检查接口是否存在 N+1 查询"""
+import threading
+from contextlib import contextmanager
+from sqlalchemy import event
+
+class QueryCounter:
+    """记录代码块内执行的SQL语句"""
+    
+    def __init__(self):
+        self.statements = []
+        self.parameters = []
+    
+    @property
+    def count(self):
+        return len(self.statements)
+
+@contextmanager
+def count_queries(engine):
+    """统计代码块内当前线程在 engine 上执行的SQL语句数量
+
+    用法:
+        with count_queries(db.engine) as counter:
+            client.get('/api/orders')
+        assert counter.count <= 3
+    """
+    counter = QueryCounter()
+    thread_id = threading.get_ident()
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread_id:
+            counter.statements.append(statement)
+            counter.parameters.append(parameters)
+    
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
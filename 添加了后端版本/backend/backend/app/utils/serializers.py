@@ -0,0 +1,137 @@
+"""模型序列化
+
+列表接口每行都要读取十来个属性并格式化时间和金额。这里按模型预先生成取值函数，
+从实例 __dict__ 中一次取出已加载的列值（属性已过期时退回普通属性访问，会触发加载），
+时间用 isoformat 格式化，输出与接口原来手写的字典一致。
+"""
+from operator import attrgetter, itemgetter
+
+class _Fields:
+    """一次读取实例的多个属性，返回元组"""
+    
+    def __init__(self, *names):
+        self._items = itemgetter(*names)
+        self._attrs = attrgetter(*names)
+    
+    def __call__(self, obj):
+        try:
+            return self._items(obj.__dict__)
+        except KeyError:
+            return self._attrs(obj)
+
+def format_datetime(value):
+    """datetime 格式化为 YYYY-MM-DD HH:MM:SS，空值返回 None"""
+    return value.isoformat(' ', 'seconds') if value is not None else None
+
+def _inventory_status(quantity, alert_threshold):
+    if quantity <= 0:
+        return '缺货'
+    if alert_threshold is not None and quantity <= alert_threshold:
+        return '预警'
+    return '正常'
+
+_product_fields = _Fields('id', 'code', 'name', 'barcode', 'price', 'status', 'inventory')
+_inventory_fields = _Fields('id', 'quantity', 'alert_threshold')
+
+def serialize_product(product):
+    """商品及库存，库存关系需预先加载（joinedload）"""
+    product_id, code, name, barcode, price, status, inventory = _product_fields(product)
+    if inventory is not None:
+        _, quantity, alert_threshold = _inventory_fields(inventory)
+    else:
+        quantity, alert_threshold = 0, 10
+    return {
+        'id': product_id,
+        'code': code,
+        'name': name,
+        'barcode': barcode,
+        'price': float(price),
+        'status': status,
+        'inventory': {
+            'quantity': quantity,
+            'alert_threshold': alert_threshold
+        }
+    }
+
+_inventory_product_fields = _Fields('id', 'code', 'name')
+
+def serialize_inventory(inventory, product):
+    """库存记录及所属商品，附带库存状态"""
+    inventory_id, quantity, alert_threshold = _inventory_fields(inventory)
+    product_id, code, name = _inventory_product_fields(product)
+    return {
+        'id': inventory_id,
+        'product_id': product_id,
+        'product_code': code,
+        'product_name': name,
+        'quantity': quantity,
+        'alert_threshold': alert_threshold,
+        'status': _inventory_status(quantity, alert_threshold)
+    }
+
+_member_fields = _Fields('id', 'card_no', 'name', 'phone', 'join_date', 'expire_date', 'total_amount', 'status')
+
+def serialize_member(member):
+    member_id, card_no, name, phone, join_date, expire_date, total_amount, status = _member_fields(member)
+    return {
+        'id': member_id,
+        'card_no': card_no,
+        'name': name,
+        'phone': phone,
+        'join_date': join_date.isoformat(),
+        'expire_date': expire_date.isoformat(),
+        'total_amount': float(total_amount),
+        'status': status
+    }
+
+_order_fields = _Fields('id', 'order_no', 'user', 'member', 'total_amount', 'discount_amount',
+                        'actual_amount', 'created_at')
+_name = attrgetter('name')
+
+def serialize_order(order):
+    """订单列表行，收银员和会员关系需预先加载（joinedload）"""
+    order_id, order_no, user, member, total_amount, discount_amount, actual_amount, created_at = _order_fields(order)
+    return {
+        'id': order_id,
+        'order_no': order_no,
+        'user_name': _name(user) if user is not None else '未知',
+        'member_name': _name(member) if member is not None else None,
+        'total_amount': float(total_amount),
+        'discount_amount': float(discount_amount),
+        'actual_amount': float(actual_amount),
+        'created_at': created_at.isoformat(' ', 'seconds')
+    }
+
+_shift_fields = _Fields('id', 'user_id', 'start_time', 'end_time', 'order_count', 'total_amount', 'status')
+
+def serialize_shift(shift, user_name):
+    shift_id, user_id, start_time, end_time, order_count, total_amount, status = _shift_fields(shift)
+    return {
+        'id': shift_id,
+        'user_id': user_id,
+        'user_name': user_name,
+        'start_time': start_time.isoformat(' ', 'seconds'),
+        'end_time': format_datetime(end_time),
+        'order_count': order_count,
+        'total_amount': float(total_amount),
+        'status': status
+    }
+
+_stock_in_fields = _Fields('id', 'stock_in_no', 'product_id', 'product', 'quantity', 'amount', 'plan_id',
+                           'operator', 'created_at')
+
+def serialize_stock_in(record):
+    """入库记录列表行，商品和操作员关系需预先加载（joinedload）"""
+    record_id, stock_in_no, product_id, product, quantity, amount, plan_id, operator, created_at = \
+        _stock_in_fields(record)
+    return {
+        'id': record_id,
+        'stock_in_no': stock_in_no,
+        'product_id': product_id,
+        'product_name': _name(product) if product is not None else '未知商品',
+        'quantity': quantity,
+        'amount': float(amount),
+        'plan_id': plan_id,
+        'created_by': _name(operator) if operator is not None else '未知',
+        'created_at': created_at.isoformat(' ', 'seconds')
+    }
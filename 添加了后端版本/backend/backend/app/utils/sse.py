@@ -0,0 +1,23 @@
+"""Server-Sent Events 响应工具"""
+import json
+from flask import Response, stream_with_context
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',  # 关闭 nginx 反向代理的响应缓冲
+}
+
+def sse_event(event, data):
+    """格式化一条事件"""
+    return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n'
+
+def sse_comment(text='ping'):
+    """注释行，客户端忽略，用于保持连接并及时发现断开的客户端"""
+    return f': {text}\n\n'
+
+def sse_response(generator, retry_ms=3000):
+    """把事件生成器包装为流式响应，生成器在请求上下文中执行"""
+    def stream():
+        yield f'retry: {retry_ms}\n\n'
+        yield from generator
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers=SSE_HEADERS)
@@ -0,0 +1,122 @@
+"""收银终端商品目录同步基准测试：逐页读取 /products vs /products/sync 完整同步和增量同步
+
+写入商品和库存后依次计时：
+- 游标分页逐页读取 /products（每页 limit 条），终端原来只能这样获取完整目录；
+- /products/sync 完整同步；
+- 没有变化时的增量同步（终端每隔几秒轮询的常见情况）；
+- 若干订单、改价和下架之后的增量同步，并核对增量结果合并到完整目录后与重新完整同步一致。
+
+用法: python benchmarks/bench_catalog_sync.py [商品数量，默认50000] [订单数，默认200]
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'bench_catalog_sync.db')
+os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + DB_PATH
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models import User, Product, Inventory
+
+PAGE_LIMIT = 100
+POLL_ROUNDS = 50
+
+def seed(count):
+    db.drop_all()
+    db.create_all()
+    rnd = random.Random(3)
+    now = datetime.now()
+    db.session.add(User(username='bench', password_hash='-', name='基准', role='admin'))
+    db.session.execute(Product.__table__.insert(), [{
+        'id': i, 'code': f'P{i:07d}', 'name': f'测试商品{i}', 'barcode': f'69{i:011d}', 'category': f'分类{i % 30}',
+        'price': rnd.randint(1, 100), 'status': 1, 'created_at': now, 'updated_at': now
+    } for i in range(1, count + 1)])
+    db.session.execute(Inventory.__table__.insert(), [{
+        'product_id': i, 'quantity': 1000, 'alert_threshold': 10, 'updated_at': now
+    } for i in range(1, count + 1)])
+    db.session.commit()
+
+def page_through(client, headers):
+    """游标分页读取全部商品，返回 (商品数, 响应字节数)"""
+    count, size, cursor = 0, 0, ''
+    while True:
+        resp = client.get(f'/api/products?cursor={cursor}&limit={PAGE_LIMIT}', headers=headers)
+        size += len(resp.data)
+        data = resp.get_json()['data']
+        count += len(data['items'])
+        if not data['has_more']:
+            return count, size
+        cursor = data['next_cursor']
+
+def sync(client, headers, since=None):
+    """返回 (头信息, 商品行列表, 删除的商品ID, 响应字节数)"""
+    resp = client.get('/api/products/sync' + (f'?since={since}' if since is not None else ''), headers=headers)
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    return lines[0], lines[1:-1], lines[-1]['deleted'], len(resp.data)
+
+def timed(func, repeat=1):
+    """重复 repeat 次取最快一次，返回 (毫秒, 结果)"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    order_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    app = create_app('testing')
+    with app.app_context():
+        print(f'写入 {count} 个商品...')
+        seed(count)
+        headers = {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+    client = app.test_client()
+    
+    page_ms, (paged, page_bytes) = timed(lambda: page_through(client, headers))
+    assert paged == count
+    print(f'逐页读取 /products: {page_ms:8.0f} ms  {page_bytes / 1024:8.0f} KB  ({count // PAGE_LIMIT + 1} 次请求)')
+    
+    full_ms, (header, rows, _, full_bytes) = timed(lambda: sync(client, headers))
+    assert header['full'] and len(rows) == count
+    print(f'完整同步:           {full_ms:8.0f} ms  {full_bytes / 1024:8.0f} KB')
+    catalog = {row[0]: row for row in rows}
+    token = header['token']
+    
+    start = time.perf_counter()
+    for _ in range(POLL_ROUNDS):
+        idle = sync(client, headers, token)
+    idle_ms = (time.perf_counter() - start) * 1000 / POLL_ROUNDS
+    assert not idle[0]['full'] and not idle[1]
+    print(f'无变化增量同步:     {idle_ms:8.2f} ms  {idle[3]:8d} B')
+    
+    rnd = random.Random(5)
+    for _ in range(order_count):
+        items = [{'product_id': rnd.randint(1, count), 'quantity': 1, 'price': 1} for _ in range(rnd.randint(1, 5))]
+        client.post('/api/orders', json={'items': items}, headers=headers)
+    for product_id in rnd.sample(range(1, count + 1), 20):
+        client.put(f'/api/products/{product_id}', json={'price': 9.9, 'status': product_id % 2}, headers=headers)
+    
+    delta_ms, (header, rows, deleted, delta_bytes) = timed(lambda: sync(client, headers, token), 3)
+    assert not header['full'] and not header['has_more']
+    print(f'增量同步:           {delta_ms:8.2f} ms  {delta_bytes / 1024:8.1f} KB  ({len(rows)} 个商品变化，'
+          f'{order_count} 个订单 + 20 次修改)')
+    catalog.update((row[0], row) for row in rows)
+    for product_id in deleted:
+        catalog.pop(product_id, None)
+    
+    _, fresh, _, _ = sync(client, headers)
+    assert catalog == {row[0]: row for row in fresh}
+    print('增量结果合并后与完整同步一致')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""多收银台并发下单压测
+
+分别使用默认连接参数（回滚日志模式）和 production 配置（WAL 等 PRAGMA、连接池参数），
+每个收银台使用独立进程（与 gunicorn 多进程部署一致）同时下单，
+统计每秒提交的订单数、失败数和响应时间。
+
+用法: python benchmarks/bench_concurrent_commits.py [收银台数，默认16] [每台下单次数，默认50]
+"""
+import os
+import sys
+import random
+import tempfile
+import multiprocessing
+import time
+from collections import Counter
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'bench_concurrent_commits.db')
+os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + DB_PATH
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.config import config, TestingConfig, ProductionConfig
+from app.extensions import db
+from app.models import User, Product, Inventory, Shift
+
+PRODUCTS = 200
+
+class TunedConfig(TestingConfig):
+    """测试库 + production 的连接参数"""
+    SQLITE_PRAGMAS = ProductionConfig.SQLITE_PRAGMAS
+    DB_POOL_SIZE = ProductionConfig.DB_POOL_SIZE
+    DB_MAX_OVERFLOW = ProductionConfig.DB_MAX_OVERFLOW
+    DB_POOL_TIMEOUT = ProductionConfig.DB_POOL_TIMEOUT
+    DB_POOL_PRE_PING = ProductionConfig.DB_POOL_PRE_PING
+
+config['bench_tuned'] = TunedConfig
+
+def reset_database():
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+
+def cashier(config_name, token, seed, orders, barrier, queue):
+    """单个收银台进程：连续下单并回传结果"""
+    rnd = random.Random(seed)
+    app = create_app(config_name)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    statuses = Counter()
+    errors = Counter()
+    latencies = []
+    barrier.wait()
+    for _ in range(orders):
+        items = [{'product_id': rnd.randint(1, PRODUCTS), 'quantity': rnd.randint(1, 3), 'price': 2.0}
+                 for _ in range(rnd.randint(1, 5))]
+        began = time.perf_counter()
+        try:
+            # 收银台轮询当前交班后下单
+            client.get('/api/shifts/current', headers=headers)
+            statuses[client.post('/api/orders', json={'items': items}, headers=headers).status_code] += 1
+        except Exception as e:
+            statuses['error'] += 1
+            errors[type(e).__name__ + ': ' + ' | '.join(str(e).splitlines()[:2])[:200]] += 1
+        latencies.append(time.perf_counter() - began)
+    queue.put((statuses, errors, latencies))
+
+def run(config_name, cashiers, orders_per_cashier):
+    reset_database()
+    app = create_app(config_name)
+    with app.app_context():
+        db.create_all()
+        journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+        users = [User(username=f'c{i}', password_hash='-', name=f'收银员{i}', role='cashier') for i in range(cashiers)]
+        db.session.add_all(users)
+        db.session.flush()
+        db.session.add_all([Shift(user_id=user.id, start_time=datetime.now(), status=0) for user in users])
+        for i in range(PRODUCTS):
+            product = Product(code=f'P{i}', name=f'商品{i}', barcode=f'690{i:010d}', price=1 + i % 30)
+            db.session.add(product)
+            db.session.flush()
+            db.session.add(Inventory(product_id=product.id, quantity=1000000))
+        db.session.commit()
+        tokens = [create_access_token(identity=user.id) for user in users]
+    
+    ctx = multiprocessing.get_context('fork')
+    queue = ctx.Queue()
+    barrier = ctx.Barrier(cashiers)
+    workers = [ctx.Process(target=cashier, args=(config_name, tokens[i], i, orders_per_cashier, barrier, queue))
+               for i in range(cashiers)]
+    began = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    
+    statuses = Counter()
+    errors = Counter()
+    latencies = []
+    for _ in workers:
+        worker_statuses, worker_errors, worker_latencies = queue.get()
+        statuses.update(worker_statuses)
+        errors.update(worker_errors)
+        latencies.extend(worker_latencies)
+    elapsed = time.perf_counter() - began
+    for worker in workers:
+        worker.join()
+    
+    latencies.sort()
+    committed = statuses[200]
+    print(f'[{config_name}] journal_mode={journal_mode}')
+    print(f'  提交 {committed}/{cashiers * orders_per_cashier} 单，耗时 {elapsed:.2f}s，'
+          f'{committed / elapsed:.1f} 单/秒')
+    print(f'  响应时间 p50={latencies[len(latencies) // 2] * 1000:.1f}ms '
+          f'p95={latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms '
+          f'max={latencies[-1] * 1000:.1f}ms')
+    failed = {status: count for status, count in statuses.items() if status != 200}
+    if failed:
+        print(f'  失败: {failed}')
+    for message, count in errors.most_common(3):
+        print(f'    {count} x {message}')
+
+def main():
+    cashiers = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    orders_per_cashier = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    for config_name in ('testing', 'bench_tuned'):
+        run(config_name, cashiers, orders_per_cashier)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""仪表盘分类占比基准测试：对比按商品合并的旧实现与按分类分组的新实现
+
+商品数默认10万（分布在30个分类中，部分商品未设置分类），近7天订单按商品随机分布。
+两种实现都读取商品日汇总表，计时前清空统计缓存；结果与按订单明细直接分组的SQL核对。
+
+用法: python benchmarks/bench_dashboard_categories.py [订单数量，默认300000] [商品数量，默认100000]
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'bench_dashboard_categories.db')
+os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + DB_PATH
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func
+from app import create_app
+from app.extensions import db
+from app.models import User, Product, Order, OrderItem, ProductSalesDaily
+from app.services.cache import stats_cache
+from app.services.rollup import rebuild_rollups
+
+CATEGORIES = [f'分类{i}' for i in range(30)]
+
+def seed(order_count, product_count, days=7):
+    """批量写入商品和近 days 天的订单（每单1~4个订单项）"""
+    db.drop_all()
+    db.create_all()
+    now = datetime.now()
+    rnd = random.Random(42)
+    db.session.add(User(username='bench', password_hash='-', name='基准', role='admin'))
+    db.session.execute(Product.__table__.insert(), [{
+        'code': f'B{i}', 'name': f'商品{i}', 'barcode': f'69{i:011d}',
+        'category': rnd.choice(CATEGORIES) if i % 50 else None,
+        'price': 1 + i % 50, 'status': 1, 'created_at': now, 'updated_at': now
+    } for i in range(1, product_count + 1)])
+    
+    start = datetime.combine(now.date() - timedelta(days=days - 1), datetime.min.time())
+    span = int((now - start).total_seconds())
+    chunk = 50000
+    item_id = 1
+    for base in range(0, order_count, chunk):
+        orders, items = [], []
+        for oid in range(base + 1, min(base + chunk, order_count) + 1):
+            amount = 0.0
+            for _ in range(rnd.randint(1, 4)):
+                qty = rnd.randint(1, 5)
+                price = float(rnd.randint(1, 50))
+                items.append({
+                    'id': item_id, 'order_id': oid, 'product_id': rnd.randint(1, product_count),
+                    'quantity': qty, 'price': price, 'subtotal': qty * price
+                })
+                item_id += 1
+                amount += qty * price
+            orders.append({
+                'id': oid, 'order_no': f'BO{oid}', 'user_id': 1, 'member_id': None,
+                'total_amount': amount, 'discount_amount': 0, 'actual_amount': amount,
+                'payment_method': '现金', 'status': 'completed',
+                'created_at': start + timedelta(seconds=rnd.randrange(span))
+            })
+        db.session.execute(Order.__table__.insert(), orders)
+        db.session.execute(OrderItem.__table__.insert(), items)
+        db.session.commit()
+    rebuild_rollups()
+
+def legacy_categories(today):
+    """旧实现：逐天读取全部商品的销售额，在 Python 中合并排序后取前5个商品"""
+    product_stats = {}
+    for i in range(7):
+        day = today - timedelta(days=6 - i)
+        rows = db.session.query(
+            ProductSalesDaily.product_id, Product.name, func.sum(ProductSalesDaily.amount)
+        ).outerjoin(Product, ProductSalesDaily.product_id == Product.id).filter(
+            ProductSalesDaily.date == day
+        ).group_by(ProductSalesDaily.product_id, Product.name).order_by(func.sum(ProductSalesDaily.amount).desc()).all()
+        for product_id, name, amount in rows:
+            if product_id not in product_stats:
+                product_stats[product_id] = {'name': name, 'amount': 0}
+            product_stats[product_id]['amount'] += float(amount)
+    sorted_stats = sorted(product_stats.values(), key=lambda x: x['amount'], reverse=True)
+    return sorted_stats[:5], len(product_stats)
+
+def expected_categories(today):
+    """按订单明细直接分组的分类销售额"""
+    category = func.coalesce(func.nullif(Product.category, ''), '未分类')
+    rows = db.session.query(category, func.sum(OrderItem.subtotal)).select_from(OrderItem).join(
+        Order, OrderItem.order_id == Order.id
+    ).join(Product, OrderItem.product_id == Product.id).filter(
+        Order.created_at >= datetime.combine(today - timedelta(days=6), datetime.min.time())
+    ).group_by(category).all()
+    return {name: float(amount) for name, amount in rows}
+
+def main():
+    order_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    product_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    app = create_app('testing')
+    with app.app_context():
+        print(f'写入 {product_count} 个商品、{order_count} 条订单...')
+        t = time.perf_counter()
+        seed(order_count, product_count)
+        print(f'数据准备完成，耗时 {time.perf_counter() - t:.1f}s')
+        
+        token = create_access_token(identity=1)
+        client = app.test_client()
+        today = datetime.now().date()
+        
+        t = time.perf_counter()
+        _, sold_products = legacy_categories(today)
+        legacy_time = time.perf_counter() - t
+        db.session.remove()
+        
+        stats_cache.clear()
+        t = time.perf_counter()
+        resp = client.get('/api/stats/dashboard', headers={'Authorization': f'Bearer {token}'})
+        cold_time = time.perf_counter() - t
+        category = resp.get_json()['data']['category']
+        
+        t = time.perf_counter()
+        client.get('/api/stats/dashboard', headers={'Authorization': f'Bearer {token}'})
+        warm_time = time.perf_counter() - t
+        
+        print(f'旧实现（按商品）: {legacy_time * 1000:.0f} ms  合并商品 {sold_products} 个')
+        print(f'新实现（按分类，无缓存）: {cold_time * 1000:.0f} ms  加速比 {legacy_time / cold_time:.1f}x')
+        print(f'新实现（已结束日期命中缓存）: {warm_time * 1000:.0f} ms')
+        
+        expected = sorted(expected_categories(today).items(), key=lambda item: item[1], reverse=True)
+        assert [item['name'] for item in category[:5]] == [name for name, _ in expected[:5]]
+        assert all(abs(item['amount'] - round(amount, 2)) < 0.01 for item, (_, amount) in zip(category[:5], expected))
+        if len(expected) > 5:
+            assert abs(category[5]['amount'] - sum(amount for _, amount in expected[5:])) < 0.01
+        print('分类结果与订单明细一致:', ', '.join(f"{item['name']}={item['amount']}" for item in category))
+
+if __name__ == '__main__':
+    main()
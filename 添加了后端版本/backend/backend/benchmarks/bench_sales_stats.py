@@ -0,0 +1,115 @@
+"""销售统计基准测试：对比逐单加载的旧实现与读取汇总表的新实现
+
+用法: python benchmarks/bench_sales_stats.py [订单数量，默认1000000]
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'bench_sales_stats.db')
+os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + DB_PATH
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models import User, Product, Order, OrderItem
+from app.services.rollup import rebuild_rollups
+
+def seed(order_count, product_count=1000, days=30):
+    """批量写入订单数据（每单1~3个订单项）"""
+    db.drop_all()
+    db.create_all()
+    now = datetime.now()
+    db.session.add(User(username='bench', password_hash='-', name='基准', role='admin'))
+    db.session.execute(Product.__table__.insert(), [{
+        'code': f'B{i}', 'name': f'商品{i}', 'barcode': f'69{i:011d}',
+        'price': 1 + i % 50, 'status': 1, 'created_at': now, 'updated_at': now
+    } for i in range(1, product_count + 1)])
+    
+    rnd = random.Random(42)
+    start = now - timedelta(days=days)
+    span = days * 86400
+    chunk = 50000
+    item_id = 1
+    for base in range(0, order_count, chunk):
+        orders, items = [], []
+        for oid in range(base + 1, min(base + chunk, order_count) + 1):
+            amount = 0.0
+            for _ in range(rnd.randint(1, 3)):
+                qty = rnd.randint(1, 5)
+                price = float(rnd.randint(1, 50))
+                items.append({
+                    'id': item_id, 'order_id': oid, 'product_id': rnd.randint(1, product_count),
+                    'quantity': qty, 'price': price, 'subtotal': qty * price
+                })
+                item_id += 1
+                amount += qty * price
+            orders.append({
+                'id': oid, 'order_no': f'BO{oid}', 'user_id': 1,
+                'member_id': 1 if rnd.random() < 0.4 else None,
+                'total_amount': amount, 'discount_amount': 0, 'actual_amount': amount,
+                'payment_method': '现金', 'status': 'completed',
+                'created_at': start + timedelta(seconds=rnd.randrange(span))
+            })
+        db.session.execute(Order.__table__.insert(), orders)
+        db.session.execute(OrderItem.__table__.insert(), items)
+        db.session.commit()
+    rebuild_rollups()
+
+def legacy_sales_stats(start_date, end_date):
+    """旧实现：加载全部订单后逐单遍历订单项，并逐天重复扫描"""
+    orders = Order.query.filter(
+        Order.created_at >= start_date,
+        Order.created_at <= end_date
+    ).all()
+    total_amount = sum(float(order.actual_amount) for order in orders)
+    product_count = 0
+    for order in orders:
+        product_count += sum(item.quantity for item in order.items)
+    member_order_count = sum(1 for order in orders if order.member_id is not None)
+    details = []
+    for day in range((end_date - start_date).days + 1):
+        day_start = start_date + timedelta(days=day)
+        day_end = day_start.replace(hour=23, minute=59, second=59)
+        day_orders = [order for order in orders if day_start <= order.created_at <= day_end]
+        details.append((len(day_orders), sum(float(order.actual_amount) for order in day_orders)))
+    return total_amount, len(orders), product_count, member_order_count, details
+
+def main():
+    order_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    app = create_app('testing')
+    with app.app_context():
+        print(f'写入 {order_count} 条订单...')
+        t = time.perf_counter()
+        seed(order_count)
+        print(f'数据准备完成，耗时 {time.perf_counter() - t:.1f}s')
+        
+        token = create_access_token(identity=1)
+        client = app.test_client()
+        today = datetime.now()
+        start_date = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        end_date = today.replace(hour=23, minute=59, second=59)
+        
+        t = time.perf_counter()
+        legacy = legacy_sales_stats(start_date, end_date)
+        legacy_time = time.perf_counter() - t
+        db.session.remove()
+        
+        t = time.perf_counter()
+        resp = client.get(f"/api/stats/sales?type=month&date={today.strftime('%Y-%m-%d')}",
+                          headers={'Authorization': f'Bearer {token}'})
+        new_time = time.perf_counter() - t
+        data = resp.get_json()['data']
+        
+        print(f'旧实现: {legacy_time * 1000:.0f} ms  订单数={legacy[1]} 金额={legacy[0]:.2f}')
+        print(f'新实现: {new_time * 1000:.0f} ms  订单数={data["order_count"]} 金额={data["total_amount"]:.2f}')
+        assert legacy[1] == data['order_count'] and legacy[2] == data['product_count']
+        print(f'加速比: {legacy_time / new_time:.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""商品关键字搜索基准测试：LIKE 全表扫描 vs FTS5 trigram vs 进程内 n-gram 索引
+
+用法: python benchmarks/bench_search.py [商品数量，默认100000]
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'bench_search.db')
+os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + DB_PATH
+
+from app import create_app
+from app.extensions import db
+from app.models import Product
+from app.services.search import search_service, Fts5Index, NgramIndex, SEARCH_FIELDS
+
+BRANDS = ['康师傅', '统一', '农夫山泉', '可口可乐', '百事', '伊利', '蒙牛', '旺旺', '达利园', '娃哈哈', '三只松鼠', '良品铺子']
+ITEMS = ['红烧牛肉面', '老坛酸菜面', '矿泉水', '冰红茶', '纯牛奶', '酸奶', '雪饼', '小面包', '八宝粥', '坚果礼盒', '薯片', '绿茶']
+SPECS = ['500ml', '1L', '120g', '250g', '袋装', '桶装', '箱装', '家庭装']
+KEYWORDS = ['红烧牛肉', '康师傅', '酸奶', '690000012', 'P0001234', '家庭装']
+ROUNDS = 20
+
+def seed(count):
+    db.drop_all()
+    db.create_all()
+    rnd = random.Random(7)
+    now = datetime.now()
+    rows = [{
+        'code': f'P{i:07d}',
+        'name': f'{rnd.choice(BRANDS)}{rnd.choice(ITEMS)}{rnd.choice(SPECS)}',
+        'barcode': f'69{i:011d}',
+        'price': rnd.randint(1, 100),
+        'status': 1,
+        'created_at': now,
+        'updated_at': now
+    } for i in range(1, count + 1)]
+    for start in range(0, count, 20000):
+        db.session.execute(Product.__table__.insert(), rows[start:start + 20000])
+    db.session.commit()
+
+def like_search(keyword):
+    """与原接口一致：统计总数后取第一页"""
+    query = db.session.query(Product.id).filter(
+        (Product.code.like(f'%{keyword}%')) |
+        (Product.name.like(f'%{keyword}%')) |
+        (Product.barcode.like(f'%{keyword}%'))
+    )
+    total = query.count()
+    return [row[0] for row in query.limit(10).all()] if total else []
+
+def timed(fn, keyword):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = fn(keyword)
+    if result is None:
+        return None, 0
+    return (time.perf_counter() - start) / ROUNDS * 1000, len(result)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    app = create_app('testing')
+    with app.app_context():
+        print(f'写入 {count} 个商品...')
+        search_service.indexes = {'products': Fts5Index('products', SEARCH_FIELDS['products'][1])}
+        seed(count)
+        fts = search_service.indexes['products']
+        
+        ngram = NgramIndex(SEARCH_FIELDS['products'][1])
+        start = time.perf_counter()
+        ngram.load(db.session.query(Product.id, Product.code, Product.name, Product.barcode).all())
+        print(f'n-gram 索引加载耗时 {(time.perf_counter() - start) * 1000:.0f} ms')
+        
+        print(f'{"关键字":<12}{"LIKE(ms)":>12}{"FTS5(ms)":>12}{"n-gram(ms)":>12}{"返回数":>10}')
+        for keyword in KEYWORDS:
+            like_ms, _ = timed(like_search, keyword)
+            fts_ms, _ = timed(lambda kw: fts.search(kw, search_service.max_results), keyword)
+            ngram_ms, matches = timed(lambda kw: ngram.search(kw, search_service.max_results), keyword)
+            # 少于3个字符时 FTS5 回退到 LIKE
+            fts_ms = f'{fts_ms:.2f}' if fts_ms is not None else '-'
+            print(f'{keyword:<12}{like_ms:>12.2f}{fts_ms:>12}{ngram_ms:>12.2f}{matches:>10}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""序列化基准测试：对比接口原来手写字典 + 标准库 json 与模型序列化函数 + orjson
+
+每个模型写入若干行并按列表接口的方式（含 joinedload）加载到内存，只计时生成字典和编码响应：
+- 旧实现：逐个属性访问、strftime 格式化，Flask 默认编码（标准库 json）；
+- 序列化函数 + json：utils/serializers 的序列化函数，标准库 json 编码；
+- 序列化函数 + orjson：序列化函数，OrjsonProvider 编码（未安装 orjson 时跳过）。
+每个模型输出每行耗时，并核对三种方式解码后的结果一致。
+
+用法: python benchmarks/bench_serializers.py [每个模型的行数，默认20000] [重复次数，默认5]
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'bench_serializers.db')
+os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + DB_PATH
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.orm import joinedload
+from app import create_app
+from app.extensions import db
+from app.models import User, Product, Inventory, Member, Order, Shift, StockIn
+from app.utils.json_provider import OrjsonProvider, orjson
+from app.utils.serializers import (serialize_product, serialize_inventory, serialize_member,
+                                   serialize_order, serialize_shift, serialize_stock_in)
+
+def seed(count):
+    db.drop_all()
+    db.create_all()
+    rnd = random.Random(42)
+    now = datetime.now().replace(microsecond=0)
+    db.session.execute(User.__table__.insert(), [
+        {'id': i, 'username': f'u{i}', 'password_hash': '-', 'name': f'收银员{i}', 'role': 'cashier'}
+        for i in range(1, 11)
+    ])
+    db.session.execute(Product.__table__.insert(), [{
+        'id': i, 'code': f'P{i:06d}', 'name': f'测试商品{i}', 'barcode': f'69{i:011d}', 'category': '饮料',
+        'price': round(rnd.uniform(1, 100), 2), 'status': 1, 'created_at': now, 'updated_at': now
+    } for i in range(1, count + 1)])
+    db.session.execute(Inventory.__table__.insert(), [{
+        'id': i, 'product_id': i, 'quantity': rnd.randint(0, 200), 'alert_threshold': 10, 'updated_at': now
+    } for i in range(1, count + 1)])
+    db.session.execute(Member.__table__.insert(), [{
+        'id': i, 'card_no': f'M{i:08d}', 'name': f'会员{i}', 'phone': f'138{i:08d}',
+        'join_date': date(2023, 1, 1), 'expire_date': date(2027, 1, 1), 'total_amount': round(rnd.uniform(0, 9999), 2),
+        'status': 1, 'points': 0, 'level': '普通会员', 'created_at': now, 'updated_at': now
+    } for i in range(1, count + 1)])
+    db.session.execute(Order.__table__.insert(), [{
+        'id': i, 'order_no': f'SO{i:012d}', 'user_id': rnd.randint(1, 10), 'member_id': rnd.randint(1, count) if i % 3 else None,
+        'total_amount': 100.0, 'discount_amount': 5.0, 'actual_amount': 95.0, 'payment_method': '现金',
+        'status': 'completed', 'created_at': now - timedelta(minutes=i)
+    } for i in range(1, count + 1)])
+    db.session.execute(Shift.__table__.insert(), [{
+        'id': i, 'user_id': rnd.randint(1, 10), 'start_time': now - timedelta(hours=i),
+        'end_time': now - timedelta(hours=i) + timedelta(minutes=30) if i > 1 else None,
+        'order_count': rnd.randint(0, 300), 'total_amount': round(rnd.uniform(0, 9999), 2), 'status': 1 if i > 1 else 0
+    } for i in range(1, count + 1)])
+    db.session.execute(StockIn.__table__.insert(), [{
+        'id': i, 'stock_in_no': f'SI{i:010d}', 'product_id': rnd.randint(1, count), 'quantity': rnd.randint(1, 100),
+        'amount': round(rnd.uniform(1, 999), 2), 'plan_id': None, 'created_by': rnd.randint(1, 10),
+        'created_at': now - timedelta(minutes=i)
+    } for i in range(1, count + 1)])
+    db.session.commit()
+
+# 接口原来的手写字典
+def legacy_product(product):
+    return {
+        'id': product.id,
+        'code': product.code,
+        'name': product.name,
+        'barcode': product.barcode,
+        'price': float(product.price),
+        'status': product.status,
+        'inventory': {
+            'quantity': product.inventory.quantity if product.inventory else 0,
+            'alert_threshold': product.inventory.alert_threshold if product.inventory else 10
+        }
+    }
+
+def legacy_inventory(row):
+    inventory, product = row
+    status = "正常"
+    if inventory.quantity <= 0:
+        status = "缺货"
+    elif inventory.quantity <= inventory.alert_threshold:
+        status = "预警"
+    return {
+        'id': inventory.id,
+        'product_id': product.id,
+        'product_code': product.code,
+        'product_name': product.name,
+        'quantity': inventory.quantity,
+        'alert_threshold': inventory.alert_threshold,
+        'status': status
+    }
+
+def legacy_member(member):
+    return {
+        'id': member.id,
+        'card_no': member.card_no,
+        'name': member.name,
+        'phone': member.phone,
+        'join_date': member.join_date.strftime('%Y-%m-%d'),
+        'expire_date': member.expire_date.strftime('%Y-%m-%d'),
+        'total_amount': float(member.total_amount),
+        'status': member.status
+    }
+
+def legacy_order(order):
+    return {
+        'id': order.id,
+        'order_no': order.order_no,
+        'user_name': order.user.name if order.user else '未知',
+        'member_name': order.member.name if order.member else None,
+        'total_amount': float(order.total_amount),
+        'discount_amount': float(order.discount_amount),
+        'actual_amount': float(order.actual_amount),
+        'created_at': order.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def legacy_shift(shift):
+    user = shift.user
+    return {
+        'id': shift.id,
+        'user_id': shift.user_id,
+        'user_name': user.name if user else '未知',
+        'start_time': shift.start_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'end_time': shift.end_time.strftime('%Y-%m-%d %H:%M:%S') if shift.end_time else None,
+        'order_count': shift.order_count,
+        'total_amount': float(shift.total_amount),
+        'status': shift.status
+    }
+
+def legacy_stock_in(record):
+    product = record.product
+    user = record.operator
+    return {
+        'id': record.id,
+        'stock_in_no': record.stock_in_no,
+        'product_id': record.product_id,
+        'product_name': product.name if product else '未知商品',
+        'quantity': record.quantity,
+        'amount': float(record.amount),
+        'plan_id': record.plan_id,
+        'created_by': user.name if user else '未知',
+        'created_at': record.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def shift_row(shift):
+    user = shift.user
+    return serialize_shift(shift, user.name if user else '未知')
+
+# (模型, 加载查询, 旧实现, 序列化函数)
+MODELS = [
+    ('Product', lambda: Product.query.options(joinedload(Product.inventory)).order_by(Product.id),
+     legacy_product, serialize_product),
+    ('Inventory', lambda: db.session.query(Inventory, Product).join(Product, Inventory.product_id == Product.id).order_by(Inventory.id),
+     legacy_inventory, lambda row: serialize_inventory(*row)),
+    ('Member', lambda: Member.query.order_by(Member.id), legacy_member, serialize_member),
+    ('Order', lambda: Order.query.options(joinedload(Order.user), joinedload(Order.member)).order_by(Order.id),
+     legacy_order, serialize_order),
+    ('Shift', lambda: Shift.query.options(joinedload(Shift.user)).order_by(Shift.id), legacy_shift, shift_row),
+    ('StockIn', lambda: StockIn.query.options(joinedload(StockIn.product), joinedload(StockIn.operator)).order_by(StockIn.id),
+     legacy_stock_in, serialize_stock_in),
+]
+
+def timed(func, rows, provider, repeat):
+    """重复 repeat 次取最快一次，返回 (秒, 响应体)"""
+    best, body = None, None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        data = [func(row) for row in rows]
+        body = provider.response({'code': 200, 'message': '获取成功', 'data': data}).get_data()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    app = create_app('testing')
+    with app.app_context():
+        print(f'每个模型写入 {count} 行...')
+        seed(count)
+        std_provider = DefaultJSONProvider(app)
+        fast_provider = OrjsonProvider(app) if orjson is not None else None
+        
+        print(f"{'模型':10s} {'旧实现':>12s} {'序列化+json':>12s} {'序列化+orjson':>14s} {'加速比':>7s}  (微秒/行)")
+        for name, query, legacy, serializer in MODELS:
+            rows = query().all()
+            legacy_time, legacy_body = timed(legacy, rows, std_provider, repeat)
+            std_time, std_body = timed(serializer, rows, std_provider, repeat)
+            expected = json.loads(legacy_body)
+            assert json.loads(std_body) == expected, name
+            line = f'{name:10s} {legacy_time / count * 1e6:12.2f} {std_time / count * 1e6:12.2f}'
+            if fast_provider is not None:
+                fast_time, fast_body = timed(serializer, rows, fast_provider, repeat)
+                assert json.loads(fast_body) == expected, name
+                line += f' {fast_time / count * 1e6:14.2f} {legacy_time / fast_time:6.1f}x'
+            else:
+                line += f" {'未安装orjson':>14s} {legacy_time / std_time:6.1f}x"
+            print(line)
+            db.session.expunge_all()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""接口基准测试套件
+
+使用 datagen.py 生成（或复用）模拟数据，驱动真实的 Flask 应用测试收银下单、扫码、统计和列表接口：
+- client 模式：Flask 测试客户端单线程顺序请求，衡量单个请求的处理耗时；
+- http 模式：本机启动多线程 HTTP 服务，多个客户端线程并发请求，衡量吞吐量和排队后的响应时间。
+每个场景输出 p50/p95/p99 响应时间和吞吐量，结果保存为 JSON；
+指定 --compare 时与基准结果对比，p95 变慢或吞吐量下降超过阈值视为回退，退出码为1。
+
+用法: python benchmarks/bench_suite.py [--scale small|medium|full] [--mode client|http|both]
+                                      [--requests N] [--threads N] [--scenarios a,b]
+                                      [--output 结果.json] [--compare 基准.json] [--threshold 0.2]
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import platform
+import sqlite3
+import subprocess
+import threading
+import time
+import logging
+import http.client
+from urllib.parse import quote
+from datetime import datetime, date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from datagen import add_dataset_arguments, ensure_dataset, make_app, scale_params
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import make_server
+from app.extensions import db
+from app.models import Product, Inventory, Member
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+def checkout(rnd, sample):
+    items = [{'product_id': product_id, 'quantity': rnd.randint(1, 3), 'price': price}
+             for product_id, price in rnd.sample(sample['products'], rnd.randint(1, 6))]
+    body = {'items': items, 'payment_method': rnd.choice(['现金', '微信', '支付宝'])}
+    if rnd.random() < 0.4:
+        body['member_id'] = rnd.choice(sample['members'])
+    return 'POST', '/api/orders', body
+
+def stats_query(rnd, sample):
+    body = {'group_by': rnd.choice([['hour'], ['weekday', 'hour'], ['category'], ['day', 'member'], ['cashier', 'category']])}
+    if rnd.random() < 0.5:
+        start = date.fromisoformat(rnd.choice(sample['dates']))
+        body.update(start_date=(start - timedelta(days=30)).isoformat(), end_date=start.isoformat())
+    return 'POST', '/api/stats/query', body
+
+SCENARIOS = {
+    'checkout': checkout,
+    'scan': lambda rnd, sample: ('GET', f"/api/products/scan/{rnd.choice(sample['barcodes'])}", None),
+    'stats_sales_month': lambda rnd, sample: ('GET', f"/api/stats/sales?type=month&date={rnd.choice(sample['dates'])}", None),
+    'stats_products_week': lambda rnd, sample: ('GET', f"/api/stats/products?type=week&date={rnd.choice(sample['dates'])}", None),
+    'stats_dashboard': lambda rnd, sample: ('GET', '/api/stats/dashboard', None),
+    'stats_query': stats_query,
+    'list_products': lambda rnd, sample: ('GET', f'/api/products?page={rnd.randint(1, 50)}&limit=20', None),
+    'search_products': lambda rnd, sample: ('GET', f"/api/products?keyword={quote(rnd.choice(sample['keywords']))}&limit=20", None),
+    'list_orders': lambda rnd, sample: ('GET', f"/api/orders?limit=20&start_date={rnd.choice(sample['dates'])}", None),
+    'list_members': lambda rnd, sample: ('GET', f'/api/members?page={rnd.randint(1, 50)}&limit=20', None),
+    'list_inventory': lambda rnd, sample: ('GET', f'/api/inventory?page={rnd.randint(1, 50)}&limit=20', None),
+}
+
+def load_sample(rnd, metadata):
+    """抽取请求参数：有库存的商品、有效会员、历史日期和搜索关键字"""
+    today = datetime.now().date()
+    end_date = date.fromisoformat(metadata['end_date'])
+    products = db.session.query(Product.id, Product.price, Product.barcode, Product.name).join(
+        Inventory, Inventory.product_id == Product.id
+    ).filter(Product.status == 1, Inventory.quantity >= 200).limit(5000).all()
+    members = [row.id for row in db.session.query(Member.id).filter(
+        Member.status == 1, Member.expire_date >= today
+    ).limit(5000)]
+    names = [name for *_, name in products]
+    return {
+        'products': [(product_id, price) for product_id, price, *_ in products],
+        'barcodes': [barcode for _, _, barcode, _ in products],
+        'members': members,
+        'dates': sorted({(end_date - timedelta(days=offset)).isoformat()
+                         for offset in [0] + rnd.sample(range(metadata['days']), min(5, metadata['days']))}),
+        'keywords': sorted({name[i:i + 3] for name in rnd.sample(names, min(50, len(names)))
+                            for i in (0, max(len(name) - 5, 0))}),
+    }
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    
+    def percentile(p):
+        return round(latencies[min(int(count * p), count - 1)] * 1000, 2)
+    
+    return {
+        'requests': count,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput': round(count / elapsed, 1),
+        'mean_ms': round(sum(latencies) / count * 1000, 2),
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(latencies[-1] * 1000, 2),
+    }
+
+def run_client(app, headers, build, sample, requests, warmup, seed):
+    """测试客户端顺序请求"""
+    rnd = random.Random(seed)
+    client = app.test_client()
+    for _ in range(warmup):
+        method, path, body = build(rnd, sample)
+        client.open(path, method=method, json=body, headers=headers)
+    
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        method, path, body = build(rnd, sample)
+        began = time.perf_counter()
+        response = client.open(path, method=method, json=body, headers=headers)
+        latencies.append(time.perf_counter() - began)
+        if response.status_code != 200:
+            errors += 1
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+def run_http(port, headers, build, sample, requests, warmup, threads, seed):
+    """多个客户端线程通过 HTTP 并发请求，每个线程复用一个连接"""
+    headers = dict(headers, **{'Content-Type': 'application/json'})
+    barrier = threading.Barrier(threads + 1)
+    results = []
+    
+    def worker(index):
+        rnd = random.Random(seed * 1000 + index)
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        
+        def send():
+            method, path, body = build(rnd, sample)
+            payload = json.dumps(body).encode('utf-8') if body is not None else None
+            try:
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                return response.status
+            except Exception:
+                # 连接断开等错误计为失败，下次请求自动重连
+                connection.close()
+                return None
+        
+        for _ in range(warmup):
+            send()
+        latencies, errors = [], 0
+        barrier.wait()
+        for _ in range(requests // threads + (index < requests % threads)):
+            began = time.perf_counter()
+            status = send()
+            latencies.append(time.perf_counter() - began)
+            if status != 200:
+                errors += 1
+        connection.close()
+        results.append((latencies, errors))
+    
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return summarize([latency for latencies, _ in results for latency in latencies],
+                     sum(errors for _, errors in results), elapsed)
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def print_result(mode, name, result):
+    print(f"  {mode:<6} {name:<20} {result['throughput']:>8.1f} 次/秒  p50={result['p50_ms']:>7.2f}ms "
+          f"p95={result['p95_ms']:>7.2f}ms p99={result['p99_ms']:>7.2f}ms  失败 {result['errors']}")
+
+def compare(results, baseline, threshold):
+    """与基准结果对比，返回回退项列表"""
+    regressions = []
+    print(f"\n与基准 {baseline['meta'].get('git_revision')} ({baseline['meta'].get('started_at')}) 对比：")
+    for mode, scenarios in results.items():
+        for name, result in scenarios.items():
+            base = baseline['results'].get(mode, {}).get(name)
+            if not base:
+                continue
+            p95_change = result['p95_ms'] / base['p95_ms'] - 1 if base['p95_ms'] else 0
+            throughput_change = result['throughput'] / base['throughput'] - 1 if base['throughput'] else 0
+            regressed = p95_change > threshold or throughput_change < -threshold
+            print(f"  {mode:<6} {name:<20} p95 {base['p95_ms']:.2f} -> {result['p95_ms']:.2f}ms ({p95_change:+.0%})  "
+                  f"吞吐 {base['throughput']:.1f} -> {result['throughput']:.1f} ({throughput_change:+.0%})"
+                  f"{'  回退' if regressed else ''}")
+            if regressed:
+                regressions.append(f'{mode}/{name}')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='接口基准测试套件')
+    add_dataset_arguments(parser, 'small')
+    parser.add_argument('--mode', choices=['client', 'http', 'both'], default='both', help='请求方式，默认 both')
+    parser.add_argument('--scenarios', help=f"逗号分隔的场景，默认全部：{','.join(SCENARIOS)}")
+    parser.add_argument('--requests', type=int, default=200, help='每个场景的请求数，默认200')
+    parser.add_argument('--warmup', type=int, default=10, help='每个场景（每个线程）预热请求数，默认10')
+    parser.add_argument('--threads', type=int, default=8, help='http 模式的并发线程数，默认8')
+    parser.add_argument('--output', help='结果文件，默认 benchmarks/results/suite-时间.json')
+    parser.add_argument('--compare', help='对比的基准结果文件')
+    parser.add_argument('--threshold', type=float, default=0.2, help='回退阈值，默认0.2即20%%')
+    args = parser.parse_args()
+    
+    names = args.scenarios.split(',') if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知场景: {', '.join(unknown)}")
+    modes = ['client', 'http'] if args.mode == 'both' else [args.mode]
+    
+    started_at = datetime.now()
+    dataset = ensure_dataset(args.db, scale_params(args), args.seed)
+    app = make_app(args.db)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    with app.app_context():
+        sample = load_sample(random.Random(args.seed), dataset)
+        headers = {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+        db.session.remove()
+    
+    server = None
+    if 'http' in modes:
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    results = {mode: {} for mode in modes}
+    print(f"数据：商品 {dataset['products']}，会员 {dataset['members']}，订单 {dataset['orders']}，"
+          f"订单项 {dataset['order_items']}")
+    try:
+        for index, name in enumerate(names):
+            for mode in modes:
+                if mode == 'client':
+                    result = run_client(app, headers, SCENARIOS[name], sample,
+                                        args.requests, args.warmup, args.seed + index)
+                else:
+                    result = run_http(server.server_port, headers, SCENARIOS[name], sample,
+                                      args.requests, args.warmup, args.threads, args.seed + index)
+                results[mode][name] = result
+                print_result(mode, name, result)
+    finally:
+        if server:
+            server.shutdown()
+    
+    report = {
+        'meta': {
+            'started_at': started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'threads': args.threads,
+            'dataset': dataset,
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"suite-{started_at.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'结果已保存到 {output}')
+    
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"回退: {', '.join(regressions)}")
+            raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
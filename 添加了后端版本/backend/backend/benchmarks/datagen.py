@@ -0,0 +1,349 @@
+"""超市模拟数据生成器
+
+按接近真实门店的分布批量写入商品、库存、会员、收银员和历史订单：
+- 订单时间覆盖最近若干天，按星期（周末客流更高）、季节和逐年增长分配每天的订单量，
+  每天按营业时间的小时客流（早、午、晚高峰）分配下单时间；
+- 商品销量服从长尾分布，少数热销商品占大部分订单项；
+- 约40%的订单使用会员卡并享受95折，会员累计消费金额与订单一致。
+写入完成后重建销售汇总表，并在数据库旁写入同名 .json 记录生成参数，供基准测试复用。
+
+用法: python benchmarks/datagen.py [--scale small|medium|full] [--db 路径]
+                                   [--products N] [--members N] [--order-items N] [--days N] [--seed N]
+"""
+import os
+import sys
+import json
+import math
+import random
+import shutil
+import argparse
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.config import config, TestingConfig
+from app.extensions import db
+from app.models import User, Product, Inventory, Member, Order, OrderItem
+from app.services.rollup import rebuild_rollups
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), 'bench_datagen.db')
+
+# 数据规模预设：商品数、会员数、订单项数、天数
+SCALES = {
+    'small': {'products': 10000, 'members': 5000, 'order_items': 200000, 'days': 90},
+    'medium': {'products': 50000, 'members': 20000, 'order_items': 2000000, 'days': 365},
+    'full': {'products': 100000, 'members': 50000, 'order_items': 10000000, 'days': 730},
+}
+
+CATEGORIES = {
+    '饮料': (['矿泉水', '冰红茶', '绿茶', '可乐', '橙汁', '苏打水', '椰汁', '功能饮料'], (2, 8)),
+    '乳制品': (['纯牛奶', '酸奶', '奶酪棒', '乳酸菌饮品', '早餐奶'], (3, 60)),
+    '零食': (['薯片', '雪饼', '坚果', '饼干', '巧克力', '果冻', '牛肉干', '瓜子'], (3, 40)),
+    '方便食品': (['红烧牛肉面', '老坛酸菜面', '自热火锅', '八宝粥', '火腿肠', '速冻水饺'], (3, 30)),
+    '粮油调味': (['大米', '面粉', '花生油', '酱油', '香醋', '食盐', '白糖'], (3, 90)),
+    '酒类': (['啤酒', '白酒', '红酒', '黄酒'], (4, 300)),
+    '日用品': (['抽纸', '卷纸', '洗衣液', '洗洁精', '垃圾袋', '保鲜膜', '电池'], (3, 60)),
+    '个人护理': (['牙膏', '牙刷', '洗发水', '沐浴露', '香皂', '洗面奶'], (5, 80)),
+}
+BRANDS = ['康师傅', '统一', '农夫山泉', '可口可乐', '百事', '伊利', '蒙牛', '旺旺', '达利园', '娃哈哈',
+          '三只松鼠', '良品铺子', '金龙鱼', '海天', '青岛', '雪花', '维达', '清风', '蓝月亮', '立白',
+          '高露洁', '云南白药', '海飞丝', '舒肤佳', '双汇', '三全', '思念', '乐事', '奥利奥', '德芙']
+SPECS = ['250ml', '500ml', '1L', '1.5L', '80g', '120g', '250g', '500g', '5kg', '袋装', '桶装', '箱装', '家庭装']
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗'
+GIVEN_NAMES = '伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀英华'
+PAYMENT_METHODS = ['现金', '微信', '支付宝', '银行卡']
+PAYMENT_WEIGHTS = [10, 45, 35, 10]
+
+# 星期一至星期日的客流系数
+WEEKDAY_WEIGHTS = [0.9, 0.88, 0.9, 0.95, 1.1, 1.3, 1.25]
+# 营业时间 7:00-22:59 各小时的客流系数
+HOUR_WEIGHTS = {7: 3, 8: 6, 9: 5, 10: 5, 11: 7, 12: 8, 13: 6, 14: 4, 15: 4,
+                16: 5, 17: 8, 18: 10, 19: 9, 20: 7, 21: 4, 22: 2}
+# 每单商品种数 1~10 的权重，平均约3.9种
+ITEMS_PER_ORDER_WEIGHTS = [20, 18, 15, 12, 10, 8, 6, 5, 3, 3]
+QUANTITY_WEIGHTS = {1: 60, 2: 22, 3: 9, 4: 5, 5: 2, 6: 2}
+MEMBER_ORDER_RATIO = 0.4
+CASHIERS = 8
+CHUNK_SIZE = 50000
+
+class DatagenConfig(TestingConfig):
+    """写入独立数据库，批量导入时不需要预热扫码索引"""
+    PRODUCT_INDEX_WARM = False
+
+def make_app(db_path=DEFAULT_DB_PATH, config_name='bench_datagen'):
+    """创建连接到指定数据库文件的应用"""
+    config[config_name] = type('BenchDataConfig', (DatagenConfig,), {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.abspath(db_path),
+        'SALES_CUBE_DIR': cube_path(db_path)
+    })
+    return create_app(config_name)
+
+def metadata_path(db_path):
+    return os.path.splitext(db_path)[0] + '.json'
+
+def cube_path(db_path):
+    return os.path.splitext(os.path.abspath(db_path))[0] + '_cube'
+
+def load_metadata(db_path):
+    """读取数据库的生成参数，数据库或参数文件不存在时返回 None"""
+    if not os.path.exists(db_path) or not os.path.exists(metadata_path(db_path)):
+        return None
+    with open(metadata_path(db_path), encoding='utf-8') as f:
+        return json.load(f)
+
+def remove_database(db_path):
+    for path in (db_path, db_path + '-wal', db_path + '-shm', metadata_path(db_path)):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(cube_path(db_path), ignore_errors=True)
+
+def _insert(model, rows):
+    if rows:
+        db.session.execute(model.__table__.insert(), rows)
+
+def _day_weights(days, end_day, rnd):
+    """每天的订单量权重：星期、季节（冬季节假日偏高）、逐年增长和随机波动"""
+    weights = []
+    for offset in range(days):
+        day = end_day - timedelta(days=days - 1 - offset)
+        season = 1 + 0.12 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 20) / 365)
+        growth = 0.85 + 0.3 * offset / max(days - 1, 1)
+        weights.append((day, WEEKDAY_WEIGHTS[day.weekday()] * season * growth * rnd.uniform(0.92, 1.08)))
+    return weights
+
+def _products(count, rnd, now):
+    """生成商品、库存，返回 (商品价格列表, 按销量排名打乱的商品ID, 长尾累计权重)"""
+    categories = list(CATEGORIES.items())
+    prices = [0.0] * (count + 1)
+    for base in range(0, count, CHUNK_SIZE):
+        products, inventory = [], []
+        for product_id in range(base + 1, min(base + CHUNK_SIZE, count) + 1):
+            category, (items, (low, high)) = categories[product_id % len(categories)]
+            price = round(rnd.uniform(low, high), 1)
+            prices[product_id] = price
+            products.append({
+                'id': product_id,
+                'code': f'P{product_id:07d}',
+                'name': f'{rnd.choice(BRANDS)}{rnd.choice(items)}{rnd.choice(SPECS)}',
+                'barcode': f'69{product_id:011d}',
+                'category': category,
+                'price': price,
+                'status': 1 if rnd.random() < 0.97 else 0,
+                'created_at': now,
+                'updated_at': now
+            })
+            inventory.append({
+                'product_id': product_id,
+                'quantity': rnd.randint(20, 800),
+                'alert_threshold': 10,
+                'updated_at': now
+            })
+        _insert(Product, products)
+        _insert(Inventory, inventory)
+        db.session.commit()
+    
+    # 销量排名与商品ID无关，按排名的幂律权重抽样
+    ranked = list(range(1, count + 1))
+    rnd.shuffle(ranked)
+    cumulative, total = [], 0.0
+    for rank in range(1, count + 1):
+        total += 1 / rank ** 0.9
+        cumulative.append(total)
+    return prices, ranked, cumulative
+
+def _members(count, rnd, now, end_day):
+    """生成会员，约90%的会员卡在有效期内"""
+    rows = []
+    for member_id in range(1, count + 1):
+        join_date = end_day - timedelta(days=rnd.randint(30, 1100))
+        if rnd.random() < 0.9:
+            expire_date = end_day + timedelta(days=rnd.randint(30, 720))
+        else:
+            expire_date = end_day - timedelta(days=rnd.randint(1, 365))
+        rows.append({
+            'id': member_id,
+            'card_no': f'M{member_id:08d}',
+            'name': rnd.choice(SURNAMES) + ''.join(rnd.choices(GIVEN_NAMES, k=rnd.randint(1, 2))),
+            'phone': f'13{member_id:09d}',
+            'join_date': join_date,
+            'expire_date': expire_date,
+            'total_amount': 0,
+            'status': 1,
+            'points': 0,
+            'level': '普通会员',
+            'created_at': now,
+            'updated_at': now
+        })
+        if len(rows) >= CHUNK_SIZE:
+            _insert(Member, rows)
+            rows = []
+    _insert(Member, rows)
+    db.session.commit()
+
+def generate(products, members, order_items, days, seed=1, progress=print):
+    """在当前应用上下文的数据库中生成数据，返回生成参数和实际写入的行数"""
+    started = time.perf_counter()
+    rnd = random.Random(seed)
+    now = datetime.now()
+    end_day = date.today()
+    
+    db.drop_all()
+    db.create_all()
+    
+    # 导入期间不需要崩溃保护，关闭同步写盘加快写入
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(db.text('PRAGMA synchronous=OFF'))
+    
+    _insert(User, [{'id': 1, 'username': 'admin', 'password_hash': '-', 'name': '管理员', 'role': 'admin'}] + [
+        {'id': i + 2, 'username': f'cashier{i + 1}', 'password_hash': '-', 'name': f'收银员{i + 1}', 'role': 'cashier'}
+        for i in range(CASHIERS)
+    ])
+    prices, ranked, cumulative = _products(products, rnd, now)
+    _members(members, rnd, now, end_day)
+    progress(f'商品 {products}、会员 {members} 写入完成，{time.perf_counter() - started:.1f}s')
+    
+    avg_items = sum((i + 1) * w for i, w in enumerate(ITEMS_PER_ORDER_WEIGHTS)) / sum(ITEMS_PER_ORDER_WEIGHTS)
+    order_count = max(int(order_items / avg_items), 1)
+    day_weights = _day_weights(days, end_day, rnd)
+    weight_total = sum(weight for _, weight in day_weights)
+    hours = list(HOUR_WEIGHTS)
+    hour_weights = list(HOUR_WEIGHTS.values())
+    item_counts = range(1, len(ITEMS_PER_ORDER_WEIGHTS) + 1)
+    quantities = list(QUANTITY_WEIGHTS)
+    quantity_weights = list(QUANTITY_WEIGHTS.values())
+    ranks = range(products)
+    member_spent = defaultdict(float)
+    
+    order_id = item_id = 0
+    next_report = order_items // 10
+    orders, items = [], []
+    for day, weight in day_weights:
+        day_start = datetime.combine(day, datetime.min.time())
+        day_orders = round(order_count * weight / weight_total)
+        # 当天的下单时间按小时客流分布后排序，订单ID随时间递增
+        offsets = sorted(h * 3600 + rnd.randrange(3600) for h in rnd.choices(hours, hour_weights, k=day_orders))
+        for offset in offsets:
+            created_at = day_start + timedelta(seconds=offset)
+            if created_at > now:
+                continue
+            order_id += 1
+            total = 0.0
+            line_count = rnd.choices(item_counts, ITEMS_PER_ORDER_WEIGHTS)[0]
+            # 同一单内的商品不重复
+            product_ids = {ranked[i] for i in rnd.choices(ranks, cum_weights=cumulative, k=line_count)}
+            for product_id in product_ids:
+                item_id += 1
+                quantity = rnd.choices(quantities, quantity_weights)[0]
+                price = prices[product_id]
+                subtotal = round(price * quantity, 2)
+                total += subtotal
+                items.append({
+                    'id': item_id, 'order_id': order_id, 'product_id': product_id,
+                    'quantity': quantity, 'price': price, 'subtotal': subtotal
+                })
+            member_id = rnd.randint(1, members) if members and rnd.random() < MEMBER_ORDER_RATIO else None
+            discount = round(total * 0.05, 2) if member_id else 0
+            actual = round(total - discount, 2)
+            if member_id:
+                member_spent[member_id] += actual
+            orders.append({
+                'id': order_id,
+                'order_no': f'GEN{order_id:010d}',
+                'user_id': rnd.randint(2, CASHIERS + 1),
+                'member_id': member_id,
+                'total_amount': round(total, 2),
+                'discount_amount': discount,
+                'actual_amount': actual,
+                'payment_method': rnd.choices(PAYMENT_METHODS, PAYMENT_WEIGHTS)[0],
+                'status': 'completed',
+                'created_at': created_at
+            })
+        if len(items) >= CHUNK_SIZE:
+            _insert(Order, orders)
+            _insert(OrderItem, items)
+            db.session.commit()
+            orders, items = [], []
+            if item_id >= next_report:
+                next_report += order_items // 10
+                progress(f'  {day} 订单 {order_id}，订单项 {item_id}，{time.perf_counter() - started:.1f}s')
+    _insert(Order, orders)
+    _insert(OrderItem, items)
+    
+    db.session.execute(Member.__table__.update().where(Member.__table__.c.id == db.bindparam('member_id')), [
+        {'member_id': member_id, 'total_amount': round(amount, 2)} for member_id, amount in member_spent.items()
+    ])
+    db.session.commit()
+    progress(f'订单 {order_id}，订单项 {item_id} 写入完成，{time.perf_counter() - started:.1f}s')
+    
+    hour_rows, product_day_rows = rebuild_rollups()
+    progress(f'汇总表重建完成：小时汇总 {hour_rows} 行，商品日汇总 {product_day_rows} 行')
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+    
+    return {
+        'products': products,
+        'members': members,
+        'order_items_target': order_items,
+        'days': days,
+        'seed': seed,
+        'orders': order_id,
+        'order_items': item_id,
+        'end_date': end_day.isoformat(),
+        'generated_at': now.strftime('%Y-%m-%d %H:%M:%S'),
+        'seconds': round(time.perf_counter() - started, 1)
+    }
+
+def ensure_dataset(db_path, params, seed=1, progress=print):
+    """数据库已按相同参数生成时直接复用，否则重新生成，返回生成记录"""
+    metadata = load_metadata(db_path)
+    if metadata and all(metadata.get(key) == value for key, value in params.items()) and metadata.get('seed') == seed:
+        progress(f'复用已有数据 {db_path}')
+        return metadata
+    
+    remove_database(db_path)
+    app = make_app(db_path)
+    with app.app_context():
+        metadata = generate(params['products'], params['members'], params['order_items_target'],
+                            params['days'], seed, progress)
+        db.session.remove()
+        db.engine.dispose()
+    with open(metadata_path(db_path), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    return metadata
+
+def scale_params(args):
+    """根据规模预设和命令行覆盖项得到生成参数"""
+    params = dict(SCALES[args.scale])
+    for key in ('products', 'members', 'order_items', 'days'):
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+    params['order_items_target'] = params.pop('order_items')
+    return params
+
+def add_dataset_arguments(parser, default_scale):
+    parser.add_argument('--scale', choices=SCALES, default=default_scale, help=f'数据规模预设，默认 {default_scale}')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help=f'数据库文件，默认 {DEFAULT_DB_PATH}')
+    parser.add_argument('--products', type=int, help='商品数')
+    parser.add_argument('--members', type=int, help='会员数')
+    parser.add_argument('--order-items', type=int, help='订单项总数')
+    parser.add_argument('--days', type=int, help='订单覆盖的天数（截止今天）')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+
+def main():
+    parser = argparse.ArgumentParser(description='生成超市模拟数据')
+    add_dataset_arguments(parser, 'full')
+    parser.add_argument('--force', action='store_true', help='已有相同参数的数据时也重新生成')
+    args = parser.parse_args()
+    
+    if args.force:
+        remove_database(args.db)
+    metadata = ensure_dataset(args.db, scale_params(args), args.seed)
+    print(json.dumps(metadata, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,7 @@ from app.models.inventory import Inventory
 from app.models.order import Order, OrderItem
 from app.models.purchase import PurchasePlan
 from app.models.shift import Shift
+from app.services.rollup import rebuild_rollups
 import bcrypt
 from datetime import datetime, timedelta
 
@@ -277,6 +278,9 @@ def init_data():
         
         # 提交所有更改
         db.session.commit()
+        
+        # 根据订单生成销售汇总表
+        rebuild_rollups()
         print('测试数据初始化完成！')
 
 if __name__ == '__main__':
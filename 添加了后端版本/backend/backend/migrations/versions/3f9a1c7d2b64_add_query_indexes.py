@@ -0,0 +1,101 @@
+"""add query indexes and unique inventory.product_id
+
+原有数据表由 db.create_all() 创建。此迁移补充后来新增的汇总表、幂等记录表，
+以及查询索引和约束；新建的数据库在建表时已包含这些内容，升级时会跳过。
+新建汇总表后需执行 flask rollup-rebuild 生成历史数据。
+
+Revision ID: 3f9a1c7d2b64
+Revises:
+Create Date: 2026-10-18 13:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c7d2b64'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (索引名, 表名, 字段)
+INDEXES = [
+    ('ix_orders_created_at', 'orders', ['created_at']),
+    ('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at']),
+    ('ix_order_items_order_id', 'order_items', ['order_id']),
+    ('ix_order_items_product_id', 'order_items', ['product_id']),
+    ('ix_shifts_user_id_status', 'shifts', ['user_id', 'status']),
+    ('ix_shifts_start_time', 'shifts', ['start_time']),
+    ('ix_purchase_plans_created_at', 'purchase_plans', ['created_at']),
+    ('ix_stock_in_created_at', 'stock_in', ['created_at']),
+]
+
+
+def _existing_indexes(inspector, table):
+    names = {index['name'] for index in inspector.get_indexes(table)}
+    names.update(constraint['name'] for constraint in inspector.get_unique_constraints(table))
+    return names
+
+
+def _create_missing_tables(inspector):
+    tables = set(inspector.get_table_names())
+    if 'sales_hourly' not in tables:
+        op.create_table(
+            'sales_hourly',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('hour', sa.DateTime(), nullable=False, unique=True),
+            sa.Column('order_count', sa.Integer(), nullable=False),
+            sa.Column('member_order_count', sa.Integer(), nullable=False),
+            sa.Column('product_count', sa.Integer(), nullable=False),
+            sa.Column('amount', sa.Float(), nullable=False)
+        )
+    if 'product_sales_daily' not in tables:
+        op.create_table(
+            'product_sales_daily',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id'), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.UniqueConstraint('date', 'product_id', name='uq_product_sales_daily_date_product')
+        )
+    if 'order_requests' not in tables:
+        op.create_table(
+            'order_requests',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('idempotency_key', sa.String(length=64), nullable=False, unique=True),
+            sa.Column('order_id', sa.Integer(), sa.ForeignKey('orders.id'), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False)
+        )
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    _create_missing_tables(inspector)
+
+    for name, table, columns in INDEXES:
+        if name not in _existing_indexes(inspector, table):
+            op.create_index(name, table, columns)
+
+    if 'uq_inventory_product_id' not in _existing_indexes(inspector, 'inventory'):
+        duplicates = bind.execute(sa.text(
+            'SELECT product_id FROM inventory GROUP BY product_id HAVING COUNT(*) > 1'
+        )).scalars().all()
+        if duplicates:
+            raise RuntimeError(f'inventory 表存在重复的商品库存记录，请先合并: product_id={duplicates}')
+        with op.batch_alter_table('inventory') as batch_op:
+            batch_op.create_unique_constraint('uq_inventory_product_id', ['product_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('inventory') as batch_op:
+        batch_op.drop_constraint('uq_inventory_product_id', type_='unique')
+
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+
+    op.drop_table('order_requests')
+    op.drop_table('product_sales_daily')
+    op.drop_table('sales_hourly')
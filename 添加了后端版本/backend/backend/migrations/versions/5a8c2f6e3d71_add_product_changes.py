@@ -0,0 +1,34 @@
+"""add product_changes
+
+商品和库存的变更记录，供 /products/sync 增量同步。已有数据库升级后没有历史记录，
+终端首次同步时下载完整商品目录。
+
+Revision ID: 5a8c2f6e3d71
+Revises: e7d3a9b05c18
+Create Date: 2026-10-18 16:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a8c2f6e3d71'
+down_revision = 'e7d3a9b05c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'product_changes',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False)
+    )
+    op.create_index('ix_product_changes_created_at', 'product_changes', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_product_changes_created_at', table_name='product_changes')
+    op.drop_table('product_changes')
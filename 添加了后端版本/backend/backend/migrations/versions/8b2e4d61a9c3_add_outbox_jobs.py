@@ -0,0 +1,38 @@
+"""add outbox_jobs
+
+订单提交后的后台任务表（会员积分和等级；库存预警在下单事务内由 stock_alert 登记，不经过任务表）。
+
+Revision ID: 8b2e4d61a9c3
+Revises: 3f9a1c7d2b64
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d61a9c3'
+down_revision = '3f9a1c7d2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'outbox_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('job_type', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', sa.Integer(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('processed_at', sa.DateTime(), nullable=True)
+    )
+    op.create_index('ix_outbox_jobs_status_id', 'outbox_jobs', ['status', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_outbox_jobs_status_id', table_name='outbox_jobs')
+    op.drop_table('outbox_jobs')
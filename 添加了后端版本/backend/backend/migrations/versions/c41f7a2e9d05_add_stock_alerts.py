@@ -0,0 +1,40 @@
+"""add stock_alerts
+
+库存预警集合，按升级时的库存生成初始数据。
+
+Revision ID: c41f7a2e9d05
+Revises: 8b2e4d61a9c3
+Create Date: 2026-10-18 14:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f7a2e9d05'
+down_revision = '8b2e4d61a9c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'stock_alerts',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id'), nullable=False, unique=True),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('alert_threshold', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False)
+    )
+    op.execute(
+        "INSERT INTO stock_alerts (product_id, status, quantity, alert_threshold, created_at, updated_at) "
+        "SELECT product_id, CASE WHEN quantity <= 0 THEN '缺货' ELSE '预警' END, quantity, alert_threshold, "
+        "CURRENT_TIMESTAMP, CURRENT_TIMESTAMP FROM inventory WHERE quantity <= alert_threshold"
+    )
+
+
+def downgrade():
+    op.drop_table('stock_alerts')
@@ -0,0 +1,37 @@
+"""add updated_at indexes
+
+商品、库存、会员列表的 ETag 按 max(updated_at) 计算，为 updated_at 建索引。
+
+Revision ID: e7d3a9b05c18
+Revises: c41f7a2e9d05
+Create Date: 2026-10-18 15:40:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7d3a9b05c18'
+down_revision = 'c41f7a2e9d05'
+branch_labels = None
+depends_on = None
+
+# (索引名, 表名, 字段)
+INDEXES = [
+    ('ix_products_updated_at', 'products', ['updated_at']),
+    ('ix_inventory_updated_at', 'inventory', ['updated_at']),
+    ('ix_members_updated_at', 'members', ['updated_at']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        if name not in {index['name'] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,4 @@
+"""接口测试
+
+在 backend 目录下运行: python -m pytest tests 或 python -m unittest
+"""
@@ -0,0 +1,52 @@
+"""测试基类：每个测试类使用临时目录中的独立 SQLite 数据库"""
+import os
+import shutil
+import tempfile
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.config import config, TestingConfig
+from app.extensions import db
+from app.services.jobs import job_queue
+
+class AppTestCase(unittest.TestCase):
+    """setUpClass 创建应用和空表并调用 seed 写入数据，每个测试方法在应用上下文内执行"""
+    
+    CONFIG = {}  # 覆盖的配置项
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp(prefix='supermarket_test_')
+        cls.config_name = f'test_{cls.__name__}'
+        config[cls.config_name] = type(f'{cls.__name__}Config', (TestingConfig,), {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(cls.tmpdir, 'test.db'),
+            'SALES_CUBE_DIR': os.path.join(cls.tmpdir, 'sales_cube'),
+            **cls.CONFIG
+        })
+        cls.app = create_app(cls.config_name)
+        with cls.app.app_context():
+            db.create_all()
+            cls.seed()
+            cls.headers = {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+        cls.client = cls.app.test_client()
+    
+    @classmethod
+    def tearDownClass(cls):
+        job_queue.wait(10)
+        with cls.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        config.pop(cls.config_name, None)
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+    
+    @classmethod
+    def seed(cls):
+        """写入测试数据，在应用上下文内调用"""
+    
+    def setUp(self):
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+    
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
@@ -0,0 +1,54 @@
+"""并发收银超卖测试
+
+多个线程同时对同一商品下单，检查成功扣减的数量与库存变化一致且库存不为负。
+"""
+import threading
+from collections import Counter
+from app.extensions import db
+from app.models import User, Product, Inventory, OrderItem
+from .helpers import AppTestCase
+
+INITIAL_STOCK = 50
+THREADS = 16
+ATTEMPTS = 10  # 每个线程的下单次数
+
+class ConcurrentCheckoutTest(AppTestCase):
+    
+    @classmethod
+    def seed(cls):
+        db.session.add(User(username='cashier', password_hash='-', name='收银员', role='cashier'))
+        product = Product(code='HOT', name='热销商品', barcode='6900000000001', price=3.5)
+        db.session.add(product)
+        db.session.flush()
+        db.session.add(Inventory(product_id=product.id, quantity=INITIAL_STOCK))
+        db.session.commit()
+        cls.product_id = product.id
+    
+    def test_no_oversell(self):
+        results = Counter()
+        lock = threading.Lock()
+        
+        def cashier():
+            client = self.app.test_client()
+            for _ in range(ATTEMPTS):
+                resp = client.post('/api/orders', json={
+                    'items': [{'product_id': self.product_id, 'quantity': 1, 'price': 3.5}]
+                }, headers=self.headers)
+                with lock:
+                    results[resp.status_code] += 1
+        
+        workers = [threading.Thread(target=cashier) for _ in range(THREADS)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        db.session.remove()
+        remaining = Inventory.query.filter_by(product_id=self.product_id).first().quantity
+        sold = db.session.query(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)).filter(
+            OrderItem.product_id == self.product_id
+        ).scalar()
+        self.assertGreaterEqual(remaining, 0)
+        self.assertEqual(sold, INITIAL_STOCK - remaining)
+        self.assertEqual(results[200], sold, dict(results))
+        self.assertEqual(sum(results.values()), THREADS * ATTEMPTS)
@@ -0,0 +1,33 @@
+"""仪表盘统计测试：已结束日期的分类占比在商品修改分类后更新"""
+from datetime import date, timedelta
+from app.extensions import db
+from app.models import User, Product, ProductSalesDaily
+from app.services.cache import stats_cache
+from .helpers import AppTestCase
+
+class DashboardTest(AppTestCase):
+
+    @classmethod
+    def seed(cls):
+        db.session.add(User(username='admin', password_hash='-', name='管理员', role='admin'))
+        product = Product(code='P1', name='矿泉水', barcode='6900000000001', category='饮料', price=2)
+        db.session.add(product)
+        db.session.flush()
+        db.session.add(ProductSalesDaily(date=date.today() - timedelta(days=1), product_id=product.id,
+                                         quantity=5, amount=10))
+        db.session.commit()
+        cls.product_id = product.id
+        stats_cache.clear()
+    
+    def categories(self):
+        resp = self.client.get('/api/stats/dashboard', headers=self.headers)
+        self.assertEqual(resp.status_code, 200, resp.get_data(as_text=True))
+        return resp.get_json()['data']['category']
+    
+    def test_category_change_refreshes_cached_days(self):
+        self.assertEqual(self.categories(), [{'name': '饮料', 'amount': 10}])
+        self.assertEqual(self.categories(), [{'name': '饮料', 'amount': 10}])
+        
+        db.session.get(Product, self.product_id).category = '饮品'
+        db.session.commit()
+        self.assertEqual(self.categories(), [{'name': '饮品', 'amount': 10}])
@@ -0,0 +1,40 @@
+"""今日销售实时汇总测试：订单ID小的事务晚提交时仍计入"""
+from datetime import datetime
+from app.extensions import db
+from app.models import User, Product, Order, OrderItem
+from app.services.live_sales import live_sales, track_orders
+from .helpers import AppTestCase
+
+class LiveSalesTest(AppTestCase):
+
+    @classmethod
+    def seed(cls):
+        db.session.add(User(username='cashier', password_hash='-', name='收银员', role='cashier'))
+        db.session.add(Product(code='P1', name='矿泉水', barcode='6900000000001', price=2))
+        db.session.commit()
+    
+    def add_order(self, order_id, amount):
+        order = Order(id=order_id, order_no=f'SO{order_id}', user_id=1, total_amount=amount, actual_amount=amount,
+                      payment_method='现金', status='completed', created_at=datetime.now())
+        item = OrderItem(id=order_id, order_id=order_id, product_id=1, quantity=1, price=amount, subtotal=amount)
+        db.session.add_all([order, item])
+        db.session.flush()
+        track_orders([(order, [item])], {1: '矿泉水'})
+        db.session.commit()
+    
+    def test_late_commit_with_lower_id(self):
+        self.add_order(1, 2)
+        subscription, snapshot = live_sales.subscribe()
+        subscription.close()
+        self.assertEqual(snapshot['today']['order_count'], 1)
+        
+        # 订单3先提交，订单2的事务后提交
+        self.add_order(3, 4)
+        self.add_order(2, 3)
+        today = live_sales.snapshot()['today']
+        self.assertEqual((today['order_count'], today['sales'], today['product_count']), (3, 9, 3))
+        
+        # 重新加载后与增量结果一致
+        live_sales.synced_at -= 30
+        live_sales.sync(30)
+        self.assertEqual(live_sales.snapshot()['today'], today)
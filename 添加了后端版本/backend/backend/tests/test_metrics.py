@@ -0,0 +1,26 @@
+"""性能监控测试：/metrics 只允许配置的地址或带令牌的请求访问"""
+from .helpers import AppTestCase
+
+class MetricsAccessTest(AppTestCase):
+
+    CONFIG = {'METRICS_ENABLED': True, 'METRICS_ALLOWED_IPS': '10.0.0.0/8', 'METRICS_TOKEN': 'secret'}
+    
+    def get(self, remote_addr, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        return self.client.get('/metrics', headers=headers, environ_base={'REMOTE_ADDR': remote_addr})
+    
+    def test_access(self):
+        self.assertEqual(self.get('127.0.0.1').status_code, 403)
+        self.assertEqual(self.get('192.168.1.5', 'wrong').status_code, 403)
+        self.assertEqual(self.get('10.1.2.3').status_code, 200)
+        resp = self.get('192.168.1.5', 'secret')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('http_requests_total', resp.get_data(as_text=True))
+
+class MetricsDefaultAccessTest(AppTestCase):
+
+    CONFIG = {'METRICS_ENABLED': True}
+    
+    def test_loopback_only(self):
+        self.assertEqual(self.client.get('/metrics', environ_base={'REMOTE_ADDR': '127.0.0.1'}).status_code, 200)
+        self.assertEqual(self.client.get('/metrics', environ_base={'REMOTE_ADDR': '10.1.2.3'}).status_code, 403)
@@ -0,0 +1,75 @@
+"""离线订单批量上传测试：字段校验和同一幂等键的并发上传"""
+from datetime import datetime
+from unittest import mock
+from app.extensions import db
+from app.models import User, Product, Inventory, Order, OrderRequest
+from app.services import order_batch
+from .helpers import AppTestCase
+
+class OrderBatchTest(AppTestCase):
+
+    @classmethod
+    def seed(cls):
+        db.session.add(User(username='cashier', password_hash='-', name='收银员', role='cashier'))
+        product = Product(code='P1', name='矿泉水', barcode='6900000000001', price=2)
+        db.session.add(product)
+        db.session.flush()
+        db.session.add(Inventory(product_id=product.id, quantity=100))
+        db.session.commit()
+        cls.product_id = product.id
+    
+    def upload(self, orders):
+        resp = self.client.post('/api/orders/batch', json={'orders': orders}, headers=self.headers)
+        self.assertEqual(resp.status_code, 200, resp.get_data(as_text=True))
+        return resp.get_json()['data']['results']
+    
+    def order(self, key, **item):
+        return {'idempotency_key': key, 'items': [dict({'product_id': self.product_id, 'quantity': 1, 'price': 2}, **item)]}
+    
+    def test_invalid_items_fail_only_their_order(self):
+        orders = [
+            {'idempotency_key': 'bad-item', 'items': ['x']},
+            {'idempotency_key': 'bad-items', 'items': 'x'},
+            self.order('str-quantity', quantity='2'),
+            self.order('float-quantity', quantity=1.5),
+            self.order('str-price', price='2'),
+            self.order('negative', quantity=-1),
+            dict(self.order('bad-member'), member_id='1'),
+            dict(self.order('bad-time'), created_at=20240101),
+            dict(self.order('bad-payment'), payment_method=['现金']),
+            self.order('ok'),
+        ]
+        results = self.upload(orders)
+        self.assertEqual([result['status'] for result in results], ['failed'] * 9 + ['created'])
+        self.assertTrue(all(result['message'] for result in results[:9]))
+    
+    def test_unhashable_product_id_with_valid_order(self):
+        results = self.upload([self.order('valid'), self.order('list-product', product_id=[self.product_id])])
+        self.assertEqual([result['status'] for result in results], ['created', 'failed'])
+    
+    def test_concurrent_duplicate_key_reported_as_duplicate(self):
+        load_stock_rows = order_batch.load_stock_rows
+        committed = {}
+        
+        def commit_same_key_first(product_ids):
+            # 模拟另一请求在本请求查询幂等键之后、写入之前提交了同一幂等键
+            if not committed:
+                with db.engine.begin() as conn:
+                    order_id = conn.execute(Order.__table__.insert().values(
+                        order_no='SO-OTHER', user_id=1, total_amount=2, discount_amount=0, actual_amount=2,
+                        payment_method='现金', status='completed', created_at=datetime.now()
+                    )).inserted_primary_key[0]
+                    conn.execute(OrderRequest.__table__.insert().values(
+                        idempotency_key='race', order_id=order_id, created_at=datetime.now()
+                    ))
+                committed['order_id'] = order_id
+            return load_stock_rows(product_ids)
+        
+        with mock.patch.object(order_batch, 'load_stock_rows', commit_same_key_first):
+            results = self.upload([self.order('race'), self.order('race-other')])
+        
+        self.assertEqual(results[0]['status'], 'duplicate')
+        self.assertEqual(results[0]['order_id'], committed['order_id'])
+        self.assertEqual(results[1]['status'], 'created')
+        db.session.remove()
+        self.assertEqual(OrderRequest.query.filter_by(idempotency_key='race').count(), 1)
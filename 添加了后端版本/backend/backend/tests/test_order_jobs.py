@@ -0,0 +1,51 @@
+"""订单后台任务测试：只为会员订单登记任务，清理已完成的任务"""
+from datetime import date, datetime, timedelta
+from app.extensions import db
+from app.models import User, Product, Inventory, Member, OutboxJob
+from app.services.jobs import job_queue, PENDING, DONE, FAILED
+from .helpers import AppTestCase
+
+class OrderJobsTest(AppTestCase):
+
+    @classmethod
+    def seed(cls):
+        db.session.add(User(username='cashier', password_hash='-', name='收银员', role='cashier'))
+        product = Product(code='P1', name='矿泉水', barcode='6900000000001', price=2)
+        member = Member(card_no='M1', name='会员', phone='13800000000', join_date=date.today(),
+                        expire_date=date.today() + timedelta(days=365))
+        db.session.add_all([product, member])
+        db.session.flush()
+        db.session.add(Inventory(product_id=product.id, quantity=100))
+        db.session.commit()
+        cls.product_id, cls.member_id = product.id, member.id
+    
+    def checkout(self, **extra):
+        resp = self.client.post('/api/orders', json=dict(
+            items=[{'product_id': self.product_id, 'quantity': 1, 'price': 2}], **extra
+        ), headers=self.headers)
+        self.assertEqual(resp.status_code, 200, resp.get_data(as_text=True))
+        job_queue.wait(10)
+    
+    def test_jobs_only_for_member_orders(self):
+        jobs = OutboxJob.query.filter_by(job_type='orders_created')
+        self.checkout()
+        self.assertEqual(jobs.count(), 0)
+        self.checkout(member_id=self.member_id)
+        self.assertEqual(jobs.count(), 1)
+        self.assertEqual(db.session.get(Member, self.member_id).points, 1)
+    
+    def test_prune_done_jobs(self):
+        old = datetime.now() - timedelta(days=10)
+        db.session.add_all([
+            OutboxJob(job_type='old_done', payload='{}', status=DONE, processed_at=old),
+            OutboxJob(job_type='old_failed', payload='{}', status=FAILED, processed_at=old),
+            OutboxJob(job_type='old_pending', payload='{}', status=PENDING),
+            OutboxJob(job_type='new_done', payload='{}', status=DONE, processed_at=datetime.now()),
+        ])
+        db.session.commit()
+        
+        result = self.app.test_cli_runner().invoke(args=['jobs-prune', '--days', '7'])
+        self.assertIn('已删除 1 个', result.output)
+        remaining = {job_type for job_type, in db.session.query(OutboxJob.job_type).filter(
+            OutboxJob.job_type.in_(['old_done', 'old_failed', 'old_pending', 'new_done']))}
+        self.assertEqual(remaining, {'old_failed', 'old_pending', 'new_done'})
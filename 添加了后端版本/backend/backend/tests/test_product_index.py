@@ -0,0 +1,40 @@
+"""扫码商品索引测试：其他进程的商品和库存变更按同步间隔读取"""
+from app.extensions import db
+from app.models import Product, Inventory
+from app.services.product_index import product_index
+from .helpers import AppTestCase
+
+class ProductIndexTest(AppTestCase):
+
+    @classmethod
+    def seed(cls):
+        product = Product(code='P1', name='矿泉水', barcode='6900000000001', price=2)
+        db.session.add(product)
+        db.session.flush()
+        db.session.add(Inventory(product_id=product.id, quantity=100))
+        db.session.commit()
+        cls.product_id = product.id
+    
+    def test_changes_from_other_processes(self):
+        product_index.warm()
+        self.assertEqual(product_index.lookup('6900000000001')['price'], 2)
+        
+        # 直接修改数据库而不调用 refresh，相当于其他进程的写入
+        product = db.session.get(Product, self.product_id)
+        product.price = 3
+        product.barcode = '6900000000002'
+        Inventory.query.filter_by(product_id=self.product_id).one().quantity = 80
+        db.session.commit()
+        self.assertEqual(product_index.lookup('6900000000001')['price'], 2)
+        
+        product_index.synced_at -= product_index.sync_interval
+        self.assertIsNone(product_index.lookup('6900000000001'))
+        entry = product_index.lookup('6900000000002')
+        self.assertEqual((entry['price'], entry['inventory']['quantity']), (3, 80))
+        
+        # 商品删除后从索引中移除
+        Inventory.query.filter_by(product_id=self.product_id).delete()
+        Product.query.filter_by(id=self.product_id).delete()
+        db.session.commit()
+        product_index.refresh([self.product_id])
+        self.assertIsNone(product_index.lookup('P1'))
@@ -0,0 +1,80 @@
+"""列表接口SQL语句数量测试
+
+对每个列表接口分别以不同的每页数量请求，统计执行的SQL语句数，
+超过上限或随每页数量增长（N+1查询）时失败。
+"""
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models import (User, Product, Member, Inventory, Order, OrderItem,
+                        PurchasePlan, StockIn, Shift)
+from app.utils.query_counter import count_queries
+from .helpers import AppTestCase
+
+# 每个请求允许的最大SQL语句数（分页计数 + 数据查询，留少量余量）
+MAX_QUERIES = 4
+PAGE_SIZES = (5, 50)
+
+LIST_ENDPOINTS = [
+    '/api/orders',
+    '/api/products',
+    '/api/members',
+    '/api/inventory',
+    '/api/shifts',
+    '/api/purchase-plans',
+    '/api/stock-in',
+]
+
+class QueryCountTest(AppTestCase):
+    
+    @classmethod
+    def seed(cls, rows=60):
+        now = datetime.now()
+        users = [User(username=f'u{i}', password_hash='-', name=f'用户{i}', role='admin') for i in range(3)]
+        db.session.add_all(users)
+        db.session.flush()
+        for i in range(rows):
+            product = Product(code=f'P{i}', name=f'商品{i}', barcode=f'690{i}', price=1 + i)
+            member = Member(card_no=f'M{i}', name=f'会员{i}', phone=f'138{i:08d}',
+                            join_date=now.date(), expire_date=(now + timedelta(days=365)).date())
+            db.session.add_all([product, member])
+            db.session.flush()
+            user = users[i % len(users)]
+            order = Order(order_no=f'O{i}', user_id=user.id, member_id=member.id,
+                          total_amount=1, discount_amount=0, actual_amount=1,
+                          payment_method='现金', status='completed')
+            plan = PurchasePlan(plan_no=f'PP{i}', product_id=product.id, quantity=1, created_by=user.id)
+            db.session.add_all([
+                Inventory(product_id=product.id, quantity=10),
+                order,
+                plan,
+                Shift(user_id=user.id, start_time=now, status=1),
+            ])
+            db.session.flush()
+            db.session.add_all([
+                OrderItem(order_id=order.id, product_id=product.id, quantity=1, price=1, subtotal=1),
+                StockIn(stock_in_no=f'SI{i}', product_id=product.id, quantity=1, amount=1,
+                        plan_id=plan.id, created_by=user.id),
+            ])
+        db.session.commit()
+    
+    def setUp(self):
+        super().setUp()
+        # 进程的首个请求会检查待执行的后台任务，不计入统计
+        self.client.get('/api/', headers=self.headers)
+    
+    def count(self, url):
+        db.session.remove()
+        with count_queries(db.engine) as counter:
+            resp = self.client.get(url, headers=self.headers)
+        self.assertEqual(resp.status_code, 200, url)
+        return counter.count
+    
+    def test_list_endpoints(self):
+        for url in LIST_ENDPOINTS:
+            with self.subTest(url=url):
+                counts = [self.count(f'{url}?page=1&limit={size}') for size in PAGE_SIZES]
+                self.assertLessEqual(max(counts), MAX_QUERIES, f'{url} SQL数量 {counts}')
+                self.assertEqual(len(set(counts)), 1, f'{url} SQL数量随每页数量变化 {counts}')
+    
+    def test_order_detail(self):
+        self.assertLessEqual(self.count('/api/orders/1'), MAX_QUERIES)
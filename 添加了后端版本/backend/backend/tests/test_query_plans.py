@@ -0,0 +1,100 @@
+"""热点查询执行计划测试
+
+请求各接口并记录实际执行的SQL，对其中的查询执行 EXPLAIN QUERY PLAN（SQLite），
+检查是否使用了预期的索引、是否对大表做全表扫描。
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app.extensions import db
+from app.models import (User, Product, Member, Inventory, Order, OrderItem,
+                        PurchasePlan, StockIn, Shift)
+from app.utils.query_counter import count_queries
+from .helpers import AppTestCase
+
+# (说明, 方法, 地址, 请求体, 预期使用的索引, 不允许全表扫描的表)
+CHECKS = [
+    ('按日期查询订单', 'get', '/api/orders?start_date={day}&end_date={day}',
+     None, ['ix_orders_created_at'], ['orders']),
+    ('按收银员和日期查询订单', 'get', '/api/orders?user_id=1&start_date={day}&end_date={day}',
+     None, ['ix_orders_user_id_created_at'], ['orders']),
+    ('订单详情', 'get', '/api/orders/1',
+     None, ['ix_order_items_order_id'], ['order_items']),
+    ('当前交班', 'get', '/api/shifts/current',
+     None, ['ix_shifts_user_id_status'], ['shifts']),
+    ('订单列表游标分页', 'get', '/api/orders?cursor=&limit=20',
+     None, ['ix_orders_created_at'], ['orders']),
+    ('按日期查询入库记录', 'get', '/api/stock-in?start_date={day}&end_date={day}',
+     None, ['ix_stock_in_created_at'], ['stock_in']),
+    ('进货计划列表', 'get', '/api/purchase-plans?cursor=&limit=20',
+     None, ['ix_purchase_plans_created_at'], ['purchase_plans']),
+    ('创建订单锁定库存', 'post', '/api/orders',
+     {'items': [{'product_id': 1, 'quantity': 1, 'price': 1}, {'product_id': 2, 'quantity': 1, 'price': 2}]},
+     ['sqlite_autoindex_inventory'], ['inventory']),  # 唯一约束在 SQLite 中以自动索引实现
+]
+
+def explain(statement, parameters):
+    """返回执行计划中每个步骤的说明"""
+    rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, tuple(parameters or ()))
+    return [row[-1] for row in rows]
+
+class QueryPlanTest(AppTestCase):
+    
+    @classmethod
+    def seed(cls, products=200, orders=5000, days=30):
+        now = datetime.now()
+        users = [User(username=f'u{i}', password_hash='-', name=f'用户{i}', role='admin') for i in range(5)]
+        db.session.add_all(users)
+        db.session.flush()
+        
+        for i in range(products):
+            product = Product(code=f'P{i}', name=f'商品{i}', barcode=f'690{i}', price=1 + i % 20)
+            db.session.add(product)
+            db.session.flush()
+            plan = PurchasePlan(plan_no=f'PP{i}', product_id=product.id, quantity=1, created_by=users[0].id,
+                                created_at=now - timedelta(hours=i))
+            db.session.add_all([Inventory(product_id=product.id, quantity=100000), plan])
+            db.session.flush()
+            db.session.add(StockIn(stock_in_no=f'SI{i}', product_id=product.id, quantity=1, amount=1,
+                                   plan_id=plan.id, created_by=users[0].id, created_at=now - timedelta(hours=i)))
+        db.session.add(Member(card_no='M1', name='会员', phone='13800000000',
+                              join_date=now.date(), expire_date=(now + timedelta(days=365)).date()))
+        
+        for user in users:
+            db.session.add(Shift(user_id=user.id, start_time=now - timedelta(days=days), status=1,
+                                 end_time=now - timedelta(days=days - 1)))
+        db.session.add(Shift(user_id=users[0].id, start_time=now - timedelta(hours=2), status=0))
+        
+        db.session.execute(Order.__table__.insert(), [{
+            'order_no': f'O{i}', 'user_id': users[i % len(users)].id, 'total_amount': 1, 'discount_amount': 0,
+            'actual_amount': 1, 'payment_method': '现金', 'status': 'completed',
+            'created_at': now - timedelta(minutes=i * days * 24 * 60 // orders)
+        } for i in range(orders)])
+        db.session.execute(OrderItem.__table__.insert(), [{
+            'order_id': i + 1, 'product_id': i % products + 1, 'quantity': 1, 'price': 1, 'subtotal': 1
+        } for i in range(orders)])
+        db.session.commit()
+        # 生成统计信息，使查询规划器与真实数据量下的选择一致
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+    
+    def test_hot_queries_use_indexes(self):
+        day = (datetime.now() - timedelta(days=3)).strftime('%Y-%m-%d')
+        for name, method, url, body, indexes, tables in CHECKS:
+            url = url.format(day=day)
+            with self.subTest(name, url=url):
+                db.session.remove()
+                with count_queries(db.engine) as counter:
+                    resp = getattr(self.client, method)(url, headers=self.headers, json=body)
+                self.assertEqual(resp.status_code, 200)
+                
+                plans = []
+                for statement, parameters in zip(counter.statements, counter.parameters):
+                    if statement.lstrip().upper().startswith('SELECT'):
+                        plans.extend(explain(statement, parameters))
+                db.session.rollback()
+                
+                missing = [index for index in indexes if not any(index in line for line in plans)]
+                scans = [line for line in plans for table in tables
+                         if line.startswith(f'SCAN {table}') and 'INDEX' not in line]
+                self.assertEqual(missing, [], '未使用索引')
+                self.assertEqual(scans, [], '全表扫描')
@@ -0,0 +1,66 @@
+"""关键字搜索测试：n-gram 索引的多进程同步、保存点回滚和结果截断"""
+from datetime import datetime
+from app.extensions import db
+from app.models import User, Product
+from app.services.search import search_service
+from .helpers import AppTestCase
+
+class NgramSearchTest(AppTestCase):
+
+    CONFIG = {'SEARCH_BACKEND': 'ngram'}
+    
+    @classmethod
+    def seed(cls):
+        db.session.add(User(username='admin', password_hash='-', name='管理员', role='admin'))
+        db.session.add_all([Product(code=f'P{i}', name=f'矿泉水{i}', barcode=f'69000000000{i}', price=2)
+                            for i in range(5)])
+        db.session.commit()
+    
+    def search(self, keyword):
+        ids, _ = search_service.search('products', keyword)
+        return {product.name for product in Product.query.filter(Product.id.in_(ids))}
+    
+    def test_changes_from_other_processes(self):
+        search_service.warm()
+        index = search_service.indexes['products']
+        # 绕过会话直接写入，相当于其他进程的修改
+        now = datetime.now()
+        with db.engine.begin() as connection:
+            connection.execute(Product.__table__.insert().values(
+                code='Q1', name='苏打水', barcode='6911', price=3, status=1, created_at=now, updated_at=now))
+            connection.execute(Product.__table__.update().where(Product.code == 'P0').values(
+                name='纯净水', updated_at=now))
+        self.assertEqual(self.search('苏打'), set())
+        
+        index.synced_at -= search_service.sync_interval
+        self.assertEqual(self.search('苏打'), {'苏打水'})
+        self.assertEqual(self.search('纯净'), {'纯净水'})
+        
+        with db.engine.begin() as connection:
+            connection.execute(Product.__table__.delete().where(Product.code == 'Q1'))
+        index.synced_at -= search_service.sync_interval
+        self.assertEqual(self.search('苏打'), set())
+    
+    def test_savepoint_rollback_keeps_outer_changes(self):
+        search_service.warm()
+        db.session.add(Product(code='S1', name='柠檬茶', barcode='6922', price=4))
+        db.session.flush()
+        savepoint = db.session.begin_nested()
+        db.session.add(Product(code='S2', name='红茶', barcode='6933', price=4))
+        db.session.flush()
+        savepoint.rollback()
+        db.session.commit()
+        self.assertEqual(self.search('柠檬'), {'柠檬茶'})
+    
+    def test_truncated_results(self):
+        max_results = search_service.max_results
+        search_service.max_results = 3
+        try:
+            resp = self.client.get('/api/products?keyword=矿泉', headers=self.headers)
+        finally:
+            search_service.max_results = max_results
+        data = resp.get_json()['data']
+        self.assertEqual((data['total'], data['truncated']), (3, True))
+        
+        resp = self.client.get('/api/members?keyword=矿泉', headers=self.headers)
+        self.assertFalse(resp.get_json()['data']['truncated'])